@@ -0,0 +1,112 @@
+"""
+Compares building a DOM from `response.text` against building it straight from `response.content` bytes
+with `Url.build_DOM`, on a `tests/data/files.html` sized page. Reports time per page, the peak of the Python heap
+per page and the resident memory a kept tree takes.
+
+tracemalloc only sees the Python heap, so its peak is the decoded text `response.text` builds from, and not the tree
+libxml2 allocates in C. Trees are measured by the growth of the resident set size (Linux only) of a new process
+keeping them.
+
+Usage: python benchmarks/bench_dom.py [pages]
+"""
+from __future__ import print_function
+
+import gc
+import multiprocessing
+import os
+import sys
+import timeit
+import tracemalloc
+
+from lxml import html
+from requests.models import Response
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from demonoid.urls import Url  # noqa: E402
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'files.html')
+
+STATM_PATH = '/proc/self/statm'
+
+
+def make_response(content, content_type):
+    response = Response()
+    response._content = content
+    response.status_code = 200
+    response.headers['Content-Type'] = content_type
+    # requests caches nothing, so every `.text` access decodes (and possibly guesses) again
+    response.encoding = None
+    return response
+
+
+def from_text(response):
+    return html.fromstring(response.text)
+
+
+def from_content(response):
+    return Url.build_DOM(response.content, Url.get_encoding(response))
+
+
+def peak_memory(function, response):
+    # the Python heap only, libxml2's allocations aren't traced
+    tracemalloc.start()
+    function(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def current_rss():
+    with open(STATM_PATH) as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def kept_tree_memory(function_name, content_type, count, connection):
+    # run in a new process, so freed memory of earlier runs isn't reused by these trees
+    with open(FIXTURE, 'rb') as fixture:
+        response = make_response(fixture.read(), content_type)
+    function = globals()[function_name]
+    function(response)
+    gc.collect()
+    before = current_rss()
+    trees = [function(response) for _ in range(count)]
+    connection.send((current_rss() - before) // len(trees))
+
+
+def tree_memory(function, content_type, count=100):
+    # resident memory per kept tree, libxml2's included. None where /proc isn't there
+    if not os.path.exists(STATM_PATH):
+        return None
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(False)
+    process = context.Process(target=kept_tree_memory, args=(function.__name__, content_type, count, sender))
+    process.start()
+    size = receiver.recv()
+    process.join()
+    return size
+
+
+def main(pages=200):
+    with open(FIXTURE, 'rb') as fixture:
+        content = fixture.read()
+    print('page size: {0} bytes, pages: {1}'.format(len(content), pages))
+    for content_type in ('text/html', 'text/html; charset=utf-8'):
+        response = make_response(content, content_type)
+        print('Content-Type: {0}'.format(content_type))
+        results = {}
+        for function in (from_text, from_content):
+            seconds = timeit.timeit(lambda: function(response), number=pages) / pages
+            results[function.__name__] = (seconds, peak_memory(function, response))
+            tree = tree_memory(function, content_type)
+            print('  {0:<14} {1:8.3f} ms/page {2:10d} B Python heap peak {3:>10} B RSS per kept tree'.format(
+                function.__name__, seconds * 1000, results[function.__name__][1], 'n/a' if tree is None else tree))
+        text_seconds, text_peak = results['from_text']
+        content_seconds, content_peak = results['from_content']
+        print('  saved {0:.3f} ms/page and {1} B Python heap peak/page (the decoded text, not the tree)'.format(
+            (text_seconds - content_seconds) * 1000, text_peak - content_peak))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
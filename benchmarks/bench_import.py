@@ -0,0 +1,53 @@
+"""
+Measures the import time of the demonoid package with `python -X importtime` in fresh interpreters
+and checks it against a budget. Exits with status 1 if the median is over budget.
+
+Usage: python benchmarks/bench_import.py [runs]
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# statement -> budget of its cumulative import time in microseconds
+BUDGETS = [
+    ('import demonoid', 5000),
+    ('from demonoid import Demonoid', 20000),
+]
+
+
+def import_time(statement):
+    output = subprocess.check_output([sys.executable, '-X', 'importtime', '-c', statement],
+                                     stderr=subprocess.STDOUT, cwd=ROOT)
+    cumulative = 0
+    for line in output.decode().splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # top level imports of the package (nested ones are already in their parent's cumulative time)
+        if name.startswith(' demonoid'):
+            cumulative += int(cumulative_us)
+    return cumulative
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(runs=9):
+    over_budget = False
+    for statement, budget in BUDGETS:
+        result = median([import_time(statement) for _ in range(runs)])
+        status = 'ok' if result <= budget else 'OVER BUDGET'
+        over_budget = over_budget or result > budget
+        print('{0:<32} {1:>8} us (budget {2:>6} us) {3}'.format(statement, result, budget, status))
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,60 @@
+"""
+Load tests the client against a local `synthetic.MockServer` serving generated pages with simulated latency,
+server errors and 429 throttling, fetching the pages one by one and concurrently from a thread pool.
+
+Usage: python benchmarks/bench_load.py [pages] [latency ms] [error %] [throttle %] [concurrency]
+"""
+from __future__ import print_function
+
+import os
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from demonoid.structures import Paginated  # noqa: E402
+from demonoid.synthetic import MockServer, PageGenerator  # noqa: E402
+from demonoid.transports import RequestsTransport  # noqa: E402
+from demonoid.urls import Url  # noqa: E402
+
+
+def crawl(server, transport, page):
+    url = Url(server.base_url, transport=transport)
+    url.add_param('page', page)
+    try:
+        return len(Paginated(url).items)
+    except Exception:
+        return 0
+
+
+def sequential(server, transport, pages, concurrency):
+    return sum(crawl(server, transport, page) for page in range(1, pages + 1))
+
+
+def concurrent(server, transport, pages, concurrency):
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(concurrency)
+    try:
+        return sum(pool.map(lambda page: crawl(server, transport, page), range(1, pages + 1)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(pages=50, latency=50, errors=2, throttled=5, concurrency=8):
+    print('pages: {0}, latency: {1} ms, errors: {2}%, throttled: {3}%'.format(pages, latency, errors, throttled))
+    for function in (sequential, concurrent):
+        server = MockServer(PageGenerator(pages), latency / 1000.0, errors / 100.0, throttled / 100.0)
+        transport = RequestsTransport()
+        with server:
+            start = default_timer()
+            torrents = function(server, transport, pages, concurrency)
+            seconds = default_timer() - start
+        transport.close()
+        print('  {0:<11} {1:8.3f} s {2:6d} torrents {3:8.1f} pages/s  statuses: {4}'.format(
+            function.__name__, seconds, torrents, pages / seconds, sorted(server.stats.items())))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
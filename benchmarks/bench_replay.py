@@ -0,0 +1,68 @@
+"""
+Replays a recorded multipage crawl of `tests/data/files.html` sized pages with simulated latency and bandwidth,
+and compares fetching the pages one by one against fetching them concurrently with `Transport.get_many`.
+Nothing goes over the network, so runs are reproducible.
+
+Usage: python benchmarks/bench_replay.py [pages] [latency ms] [bandwidth KB/s]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from demonoid.recording import Recording, ReplayTransport  # noqa: E402
+from demonoid.structures import Paginated  # noqa: E402
+from demonoid.urls import Url  # noqa: E402
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'files.html')
+EMPTY_CONTENT = b'<html><body><p>No torrents found</p></body></html>'
+
+
+def record(directory, pages):
+    with open(FIXTURE, 'rb') as fixture:
+        content = fixture.read()
+    recording = Recording(directory)
+    for page in range(1, pages + 2):
+        recording.save(Url.DEFAULT_BASE_URL, {'page': page}, 200, {'Content-Type': 'text/html; charset=utf-8'},
+                       content if page <= pages else EMPTY_CONTENT)
+    return len(content)
+
+
+def sequential(transport, pages):
+    return len(Paginated(Url(transport=transport), multipage=True).items)
+
+
+def concurrent(transport, pages):
+    requests = [(Url.DEFAULT_BASE_URL, {'page': page}) for page in range(1, pages + 1)]
+    torrents = 0
+    for response in transport.get_many(requests):
+        url = Url(transport=transport)
+        url._DOM = Url.build_DOM(response.content, Url.get_encoding(response))
+        torrents += len(Paginated(url).items)
+    return torrents
+
+
+def main(pages=20, latency=50, bandwidth=1024):
+    directory = tempfile.mkdtemp()
+    try:
+        size = record(directory, pages)
+        transport = ReplayTransport(directory, latency / 1000.0, bandwidth * 1024)
+        print('pages: {0} of {1} bytes, latency: {2} ms, bandwidth: {3} KB/s'.format(pages, size, latency, bandwidth))
+        for function in (sequential, concurrent):
+            start = default_timer()
+            torrents = function(transport, pages)
+            seconds = default_timer() - start
+            print('  {0:<11} {1:8.3f} s {2:6d} torrents {3:8.1f} ms/page'.format(function.__name__, seconds, torrents,
+                                                                             seconds * 1000 / pages))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
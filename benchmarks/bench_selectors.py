@@ -0,0 +1,41 @@
+"""
+Compares evaluating every `Parser` selector with `element.xpath(expression)`, which compiles the expression on
+every call, against the precompiled `xpaths.Selector`, on the `tests/data/files.html` page.
+
+Usage: python benchmarks/bench_selectors.py [repeats]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+from lxml import html
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from demonoid.xpaths import DEFAULT_SELECTORS  # noqa: E402
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'files.html')
+
+
+def main(repeats=20):
+    with open(FIXTURE, 'rb') as fixture:
+        dom = html.fromstring(fixture.read())
+    rows = DEFAULT_SELECTORS.torrents_list(dom)[:-3]
+    # the elements each selector runs on while parsing a page
+    targets = {'torrents_list': [dom], 'date_tag': rows, 'first_row': rows[1::2]}
+    print('{0:<14} {1:>8} {2:>14} {3:>14} {4:>8}'.format('selector', 'calls', 'xpath() us', 'compiled us', 'speedup'))
+    for name in DEFAULT_SELECTORS.NAMES:
+        selector = getattr(DEFAULT_SELECTORS, name)
+        elements = targets[name]
+        by_string = timeit.timeit(lambda: [element.xpath(selector.expression) for element in elements], number=repeats)
+        compiled = timeit.timeit(lambda: [selector(element) for element in elements], number=repeats)
+        calls = len(elements) * repeats
+        print('{0:<14} {1:>8} {2:>14.2f} {3:>14.2f} {4:>7.1f}x'.format(name, calls, by_string / calls * 1e6,
+                                                                      compiled / calls * 1e6, by_string / compiled))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -1,3 +1,47 @@
-from .constants import Category, SortBy, Quality, Language, TrackedBy, State
-from .structures import Torrent, List, Paginated, Search, Demonoid
-from .urls import Url
+import sys
+from importlib import import_module
+
+
+# Public names and the modules they live in. They're imported on first access (PEP 562),
+# so `import demonoid` doesn't pay for requests, lxml and the constants trees.
+_LAZY_ATTRIBUTES = {
+    'Category': 'constants',
+    'SortBy': 'constants',
+    'Quality': 'constants',
+    'Language': 'constants',
+    'TrackedBy': 'constants',
+    'State': 'constants',
+    'Torrent': 'structures',
+    'List': 'structures',
+    'Paginated': 'structures',
+    'Page': 'structures',
+    'Search': 'structures',
+    'Demonoid': 'structures',
+    'Url': 'urls',
+    'Resolver': 'resolvers',
+    'Metrics': 'metrics',
+    'Profiler': 'profiling',
+    'QueryPlan': 'planner',
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+    value = getattr(import_module('.' + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+# module level __getattr__ is supported since Python 3.7
+if sys.version_info < (3, 7):
+    for _name in __all__:
+        __getattr__(_name)
@@ -0,0 +1,31 @@
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """
+       The InstrumentedAdapter is a `requests` transport adapter, which reports the time spent opening new connections
+       (DNS resolution included) as stage `fetch.connect`. `Url` mounts it only when metrics are turned on.
+    """
+
+    def __init__(self, metrics, **kwargs):
+        self.metrics = metrics
+        super(InstrumentedAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(InstrumentedAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': self._timed_pool_class(HTTPConnectionPool, HTTPConnection),
+            'https': self._timed_pool_class(HTTPSConnectionPool, HTTPSConnection),
+        }
+
+    def _timed_pool_class(self, pool_class, connection_class):
+        metrics = self.metrics
+
+        def _new_conn(connection):
+            with metrics.timer('fetch.connect'):
+                return connection_class._new_conn(connection)
+
+        timed_connection_class = type('Timed' + connection_class.__name__, (connection_class,), {'_new_conn': _new_conn})
+        return type('Timed' + pool_class.__name__, (pool_class,), {'ConnectionCls': timed_connection_class})
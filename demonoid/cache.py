@@ -0,0 +1,291 @@
+from collections import OrderedDict
+from threading import Event, Lock
+from time import time
+
+
+class TTLCache(object):
+    """
+       The TTLCache is a small thread-safe key-value store, whose entries expire `ttl` seconds after they're set.
+       Expired entries are dropped lazily on access or explicitly with `expire`.
+    """
+
+    def __init__(self, ttl, clock=None):
+        """
+        Creates a TTLCache instance.
+
+        :param ttl: Seconds an entry stays valid after it's set. None means entries never expire.
+        :type ttl: int or float or None
+        :param clock: Callable returning the current time in seconds. Default is `time.time`
+        :type clock: callable or None
+        """
+        self.ttl = ttl
+        self._clock = clock or time
+        self._items = {}
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Gets the value stored under `key` if it hasn't expired yet.
+
+        :param key: key to look up
+        :param default: value to return when `key` is missing or expired
+        :return: the stored value or `default`
+        """
+        with self._lock:
+            try:
+                expires_at, value = self._items[key]
+            except KeyError:
+                return default
+            if expires_at is not None and expires_at <= self._clock():
+                del self._items[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        """
+        Stores `value` under `key` and (re)starts its time to live.
+
+        :param key: key to store under
+        :param value: value to store
+        :return: self
+        :rtype: TTLCache
+        """
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._items[key] = (expires_at, value)
+        return self
+
+    def expire(self):
+        """
+        Drops all expired entries.
+
+        :return: count of dropped entries
+        :rtype: int
+        """
+        now = self._clock()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._items.items()
+                       if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del self._items[key]
+        return len(expired)
+
+    def clear(self):
+        """
+        Drops all entries.
+
+        :return: self
+        :rtype: TTLCache
+        """
+        with self._lock:
+            self._items.clear()
+        return self
+
+    def __contains__(self, key):
+        marker = object()
+        return self.get(key, marker) is not marker
+
+    def __len__(self):
+        self.expire()
+        return len(self._items)
+
+
+class CachedPage(object):
+    """
+       The CachedPage keeps a page's validators (ETag and Last-Modified), the digest of its torrents rows
+       and what was parsed from it. The page is then requested conditionally and reused, when the server answers
+       304 Not Modified or when its rows have the same digest as last time.
+    """
+
+    def __init__(self, etag=None, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = None  # of the torrents rows, see `layouts.Layout.digest`
+        self.parsed = None  # as the page's torrents. Set by whoever parses the page
+
+    def store(self, validators, digest, parsed):
+        """
+        Keeps what was parsed from a response of the page along with the response's validators.
+        They're stored together once the page is parsed, so validators never vouch for what wasn't parsed from it.
+
+        :param tuple validators: ETag and Last-Modified of the response, each None if it's missing
+        :param digest: digest of the torrents rows
+        :type digest: str or None
+        :param iterable parsed: what was parsed from the response
+        :return: self
+        :rtype: CachedPage
+        """
+        self.etag, self.last_modified = validators
+        self.digest = digest
+        self.parsed = tuple(parsed)
+        return self
+
+    def conditional_headers(self):
+        """
+        Gives the headers asking the server to answer 304 Not Modified if the page hasn't changed.
+
+        :rtype: dict
+        """
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache(object):
+    """
+       The PageCache is a thread-safe store of `CachedPage` per fully qualified url.
+       Only the `max_pages` most recently used pages are kept.
+
+       It counts how pages were loaded: `not_modified` (answered 304), `unchanged` (same rows digest,
+       so torrents weren't built again) and `parsed`.
+
+       :attr: DEFAULT_MAX_PAGES is the default count of kept pages.
+       :attr: OUTCOMES are the ways a page is loaded.
+    """
+
+    DEFAULT_MAX_PAGES = 128
+    OUTCOMES = ('not_modified', 'unchanged', 'parsed')
+
+    def __init__(self, max_pages=None):
+        """
+        Creates a PageCache instance.
+
+        :param max_pages: count of kept pages. Default is PageCache.DEFAULT_MAX_PAGES
+        :type max_pages: int or None
+        """
+        self.max_pages = max_pages or self.DEFAULT_MAX_PAGES
+        self._pages = OrderedDict()
+        self._outcomes = dict.fromkeys(self.OUTCOMES, 0)
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Gets the page stored under `key` and marks it as the most recently used.
+
+        :param key: key to look up
+        :rtype: CachedPage or None
+        """
+        with self._lock:
+            page = self._pages.pop(key, None)
+            if page is not None:
+                self._pages[key] = page
+            return page
+
+    def set(self, key, page):
+        """
+        Stores `page` under `key`, dropping the least recently used page when full.
+
+        :param key: key to store under
+        :param CachedPage page: page to store
+        :return: self
+        :rtype: PageCache
+        """
+        with self._lock:
+            self._pages.pop(key, None)
+            self._pages[key] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return self
+
+    def record(self, outcome):
+        """
+        Counts a page loaded with `outcome`, one of PageCache.OUTCOMES.
+
+        :param str outcome: how the page was loaded
+        :return: self
+        :rtype: PageCache
+        """
+        with self._lock:
+            self._outcomes[outcome] += 1
+        return self
+
+    @property
+    def stats(self):
+        """
+        Gives the count of pages per outcome and `hit_rate`, the share of pages whose torrents were reused.
+
+        :rtype: dict
+        """
+        with self._lock:
+            stats = dict(self._outcomes)
+        loaded = sum(stats.values())
+        stats['hit_rate'] = (stats['not_modified'] + stats['unchanged']) / float(loaded) if loaded else 0.0
+        return stats
+
+    def clear(self):
+        """
+        Drops all pages. Counts are kept.
+
+        :return: self
+        :rtype: PageCache
+        """
+        with self._lock:
+            self._pages.clear()
+        return self
+
+    def __len__(self):
+        return len(self._pages)
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """
+       The SingleFlight coalesces identical concurrent calls: while a call for a key is in flight,
+       other threads calling with the same key wait for it and share its result (or its exception)
+       instead of making their own. Finished calls aren't remembered, so the next call for a key runs again.
+
+       :attr: coalesced counts the calls that shared another one's result.
+    """
+
+    def __init__(self):
+        """
+        Creates a SingleFlight instance.
+        """
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = Lock()
+
+    def do(self, key, function):
+        """
+        Calls `function`, unless a call for `key` is already in flight, then waits for that call's result.
+
+        :param key: key of identical calls
+        :param callable function: Callable without arguments making the call
+        :return: the result and if it's shared from another call
+        :rtype: tuple
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result, True
+        try:
+            call.result = function()
+        except Exception as exception:
+            call.exception = exception
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def __len__(self):
+        return len(self._calls)
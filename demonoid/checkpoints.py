@@ -0,0 +1,141 @@
+import json
+import os
+from datetime import datetime
+from threading import Lock
+
+from .exceptions import CheckpointMismatchException
+from .exporters import torrent_record
+
+
+# fields rebuilding a `structures.Torrent`, in its constructor's order
+TORRENT_FIELDS = ('date', 'id', 'title', 'tracked_by', 'category_url', 'url', 'category', 'subcategory', 'quality',
+                  'language', 'user', 'user_url', 'torrent_link', 'size', 'comments', 'times_completed', 'seeders',
+                  'leechers')
+
+
+def decode_torrent(record):
+    """
+    Rebuilds a torrent from its checkpointed record. "Any" placeholders come back as their constants
+    and undated torrents, as rows before any date row give, stay undated.
+
+    :param dict record: values per `TORRENT_FIELDS`
+    :rtype: structures.Torrent
+    """
+    from .structures import Torrent
+
+    values = dict(record)
+    if values['date'] is not None:
+        values['date'] = datetime.strptime(values['date'], '%Y-%m-%d').date()
+    return Torrent(**values)
+
+
+class CheckpointLog(object):
+    """
+       The CheckpointLog is a durable, append-only log of a crawl's finished pages, a JSON line per page with its torrents.
+       Every line is fsynced before the page's torrents are given out, so the log holds every page the crawl gave
+       and a crawl restarted with it continues where it stopped. The first line identifies the crawl (its url and
+       params, but the page), so a log isn't continued by another crawl. An empty page is logged too, ending the crawl.
+
+       A crash mid-write leaves a torn last line, which is cut when the log is opened again.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a CheckpointLog instance. The file is created on the first append.
+
+        :param str path: path of the log file
+        """
+        self.path = path
+        self.last_page = None
+        self.done = False
+        self._lock = Lock()
+
+    def open(self, crawl):
+        """
+        Checks the log belongs to `crawl`, cuts a torn last line and finds the last committed page.
+        An empty or missing log is started for `crawl`.
+
+        :param list crawl: what identifies the crawl. It must be JSON serializable
+        :return: the last committed page or None if there's none
+        :rtype: int or None
+        :raises CheckpointMismatchException: if the log belongs to another crawl
+        """
+        crawl = json.loads(json.dumps(crawl))
+        with self._lock:
+            self.last_page = None
+            self.done = False
+            committed = 0
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as log:
+                    for index, line in enumerate(log):
+                        record = self._decode_line(line)
+                        if record is None:
+                            break
+                        if index == 0:
+                            if record.get('crawl') != crawl:
+                                raise CheckpointMismatchException('{0} is the checkpoint of another crawl'.format(self.path))
+                        else:
+                            self.last_page = record['page']
+                            self.done = not record['torrents']
+                        committed += len(line)
+                if committed != os.path.getsize(self.path):
+                    with open(self.path, 'r+b') as log:
+                        log.truncate(committed)
+            if not committed:
+                self._write({'crawl': crawl})
+        return self.last_page
+
+    @staticmethod
+    def _decode_line(line):
+        if not line.endswith(b'\n'):
+            return None
+        try:
+            return json.loads(line.decode('utf-8'))
+        except ValueError:
+            return None
+
+    def append(self, page, torrents):
+        """
+        Commits a finished page.
+
+        :param int page: page number
+        :param list structures.Torrent torrents: the page's torrents, before any deduplication
+        """
+        record = {'page': page, 'torrents': [torrent_record(torrent, TORRENT_FIELDS) for torrent in torrents]}
+        with self._lock:
+            self._write(record)
+            self.last_page = page
+            self.done = not torrents
+
+    def _write(self, record):
+        with open(self.path, 'ab') as log:
+            log.write(json.dumps(record, sort_keys=True).encode('utf-8') + b'\n')
+            log.flush()
+            os.fsync(log.fileno())
+
+    def pages(self):
+        """
+        Gives the committed pages in order, as they were logged.
+
+        :return: every page's number and torrents
+        :rtype: generator
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as log:
+            next(log, None)
+            for line in log:
+                record = self._decode_line(line)
+                if record is None:
+                    return
+                yield record['page'], [decode_torrent(values) for values in record['torrents']]
+
+    def clear(self):
+        """
+        Removes the log, so the next crawl starts over.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.last_page = None
+            self.done = False
@@ -0,0 +1,284 @@
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+
+try:
+    from time import perf_counter as default_timer
+except ImportError:
+    from time import time as default_timer
+
+from .exporters import EXPORTERS, FIELDS, guess_format, make_exporter
+from .structures import Demonoid
+from .transports import HTTP2Transport, RateLimitedTransport, RequestsTransport
+from .urls import Url
+
+
+# search criteria taken as options, all of them integers but the sort order
+SEARCH_OPTIONS = ('category', 'subcategory', 'quality', 'language', 'seeded', 'external')
+
+
+def build_parser():
+    """
+    Builds the command line's argument parser.
+
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog='demonoid', description='Crawls a Demonoid search straight to a file. '
+                                     'An interrupted crawl to a file is resumed by running it again.')
+    parser.add_argument('query', nargs='?', default='', help='searched text. Default is every torrent')
+    for option in SEARCH_OPTIONS:
+        parser.add_argument('--' + option, type=int, help='{0} id, as in constants'.format(option))
+    parser.add_argument('--sort', help='sort order, as in constants.SortBy. Default is by date')
+    parser.add_argument('--page', type=int, default=1, help='first page. Default is 1')
+    parser.add_argument('--single-page', action='store_true', help='crawl only the first page')
+    parser.add_argument('--dedupe', action='store_true', help='drop torrents seen on previous pages')
+    parser.add_argument('-o', '--output', default='-', help='file to write. Default is the standard output')
+    parser.add_argument('-f', '--format', choices=sorted(EXPORTERS),
+                        help="output format. Default is guessed from the output's extension, else ndjson")
+    parser.add_argument('--compression',
+                        help="'gzip', 'bz2' or 'xz' (or Parquet's codec). Default is guessed from the output's extension")
+    parser.add_argument('--fields', help='comma separated exported fields. Default is {0}'.format(','.join(FIELDS)))
+    parser.add_argument('--base-url', help='Demonoid mirror to crawl')
+    parser.add_argument('--concurrency', type=positive_int, default=1, help='pages fetched at a time. Default is 1')
+    parser.add_argument('--http2', action='store_true',
+                        help='request over HTTP/2, multiplexing concurrent pages. https mirrors negotiate it, '
+                             'falling back to HTTP/1.1. http mirrors must speak HTTP/2 without TLS '
+                             '(needs `pip install httpx[http2]`)')
+    parser.add_argument('--rate-limit', type=float, help='maximum of requests per second. Default is no limit')
+    parser.add_argument('--cache-dir', help='directory keeping fetched pages, so they are never fetched again')
+    parser.add_argument('--restart', action='store_true', help="ignore the output's checkpoint and crawl from the start")
+    parser.add_argument('-q', '--quiet', action='store_true', help="don't print progress")
+    return parser
+
+
+def positive_int(value):
+    """
+    Parses a count of at least 1.
+
+    :param str value: argument
+    :rtype: int
+    """
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise argparse.ArgumentTypeError('{0!r} is not a whole number of at least 1'.format(value))
+    return count
+
+
+def search_params(args):
+    """
+    Gives the `structures.Search` criteria given as arguments.
+
+    :param argparse.Namespace args: parsed arguments
+    :rtype: dict
+    """
+    params = {'query': args.query}
+    for option in SEARCH_OPTIONS + ('sort',):
+        value = getattr(args, option)
+        if value is not None:
+            params[option] = value
+    return params
+
+
+def fetch_pages(search, first_page, concurrency=1, multipage=True):
+    """
+    Gives every page's number and torrents in order, from `first_page` until an empty page.
+    Up to `concurrency` pages are fetched at a time, as a sliding window ahead of the page given.
+    Pages aren't kept, so a crawl holds the window only.
+
+    :param structures.Search search: search to crawl
+    :param int first_page: page to start from
+    :param int concurrency: pages fetched at a time
+    :param bool multipage: if pages after the first one are crawled
+    :rtype: generator
+    """
+    search.page = first_page
+    numbers = None if multipage else [first_page]
+    for page in search.pages(numbers, prefetch=concurrency - 1 if multipage else None, keep=False):
+        if page.torrents:
+            yield page.number, page.torrents
+
+
+class Checkpoint(object):
+    """
+       The Checkpoint remembers the last page of a crawl written whole to its output, with the count of torrents
+       and the output's size until then, so the crawl can resume after that page, cutting anything written later.
+       Deduplicated crawls remember that page's torrent ids too, so torrents shifted from it to the next page
+       while the crawl was stopped aren't written again. It's saved to a file aside and replaced atomically.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """
+        Gives the saved state or None if there isn't one.
+
+        :rtype: dict or None
+        """
+        try:
+            with open(self.path) as saved:
+                return json.load(saved)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self, crawl, page, count, size, seen=None):
+        """
+        Saves the state of `crawl` after `page`.
+
+        :param dict crawl: what identifies the crawl
+        :param int page: last page written whole
+        :param int count: count of torrents written until then
+        :param int size: size of the output until then
+        :param seen: ids of the torrents of `page`, for deduplicated crawls
+        :type seen: list str or None
+        """
+        temporary_path = self.path + '.tmp'
+        state = {'crawl': crawl, 'page': page, 'count': count, 'size': size}
+        if seen is not None:
+            state['seen'] = seen
+        with open(temporary_path, 'w') as temporary:
+            json.dump(state, temporary, sort_keys=True)
+            temporary.flush()
+            os.fsync(temporary.fileno())
+        getattr(os, 'replace', os.rename)(temporary_path, self.path)
+
+    def clear(self):
+        """
+        Removes the saved state, if there's one.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Progress(object):
+    """
+       The Progress prints live crawl throughput, updated in place on terminals and a line per page otherwise.
+    """
+
+    def __init__(self, stream=None, clock=default_timer):
+        self.stream = stream or sys.stderr
+        self._clock = clock
+        self._start = clock()
+        self._live = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.pages = 0
+        self.torrents = 0
+
+    def update(self, page, torrents):
+        self.pages += 1
+        self.torrents += torrents
+        elapsed = max(self._clock() - self._start, 1e-9)
+        line = 'page {0}: {1} torrents, {2:.1f} pages/s, {3:.0f} torrents/s'.format(
+            page, self.torrents, self.pages / elapsed, self.torrents / elapsed)
+        self.stream.write('\r' + line if self._live else line + '\n')
+        self.stream.flush()
+
+    def finish(self):
+        if self._live and self.pages:
+            self.stream.write('\n')
+
+
+def build_transport(args):
+    # cached pages are served without waiting for the rate limit
+    if args.http2:
+        # plain http is only spoken with HTTP/2 by prior knowledge, as HTTP/2 is negotiated over TLS
+        base_url = args.base_url or Url.DEFAULT_BASE_URL
+        transport = HTTP2Transport(http1=not base_url.startswith('http://'))
+    else:
+        transport = RequestsTransport()
+    if args.rate_limit:
+        transport = RateLimitedTransport(transport, args.rate_limit)
+    if args.cache_dir:
+        from .recording import CachingTransport
+
+        transport = CachingTransport(args.cache_dir, transport)
+    return transport
+
+
+def main(argv=None):
+    """
+    Runs a crawl, streaming its torrents to the output, and reports their count on the standard error.
+    Crawls to a file are checkpointed to `<output>.checkpoint` after every page, unless the format is binary,
+    and resumed from it. It's removed once the crawl is done.
+
+    :param argv: command line arguments. Default is `sys.argv`
+    :type argv: list str or None
+    :return: exit status
+    :rtype: int
+    """
+    args = build_parser().parse_args(argv)
+    fields = tuple(args.fields.split(',')) if args.fields else None
+    format = args.format
+    if args.output == '-':
+        output = getattr(sys.stdout, 'buffer', sys.stdout)
+        format = format or 'ndjson'
+    else:
+        output = args.output
+        format = format or guess_format(output)
+
+    checkpoint = state = None
+    crawl = {'base_url': args.base_url, 'params': search_params(args), 'fields': list(fields or FIELDS),
+             'format': format, 'compression': args.compression, 'dedupe': args.dedupe}
+    if output is args.output and format in EXPORTERS and not EXPORTERS[format].binary:
+        checkpoint = Checkpoint(output + '.checkpoint')
+        state = None if args.restart else checkpoint.load()
+        if state is not None and not os.path.exists(output):
+            state = None
+        if state is not None and state['crawl'] != crawl:
+            print('demonoid: {0} belongs to another crawl. Pass --restart to start over'.format(checkpoint.path),
+                  file=sys.stderr)
+            return 2
+    if state is not None:
+        # whatever was written after the last checkpoint is written again
+        with open(output, 'r+b') as partial:
+            partial.truncate(state['size'])
+
+    try:
+        transport = build_transport(args)
+    except ImportError as error:
+        print('demonoid: {0}'.format(error), file=sys.stderr)
+        return 2
+    search = Demonoid(args.base_url, transport=transport).search(dedupe=args.dedupe or None, **search_params(args))
+    if state is not None and search.deduplicator is not None:
+        # torrents of the last page written are dropped if they shifted to the next one meanwhile
+        for torrent_id in state.get('seen', ()):
+            search.deduplicator.seen.add(torrent_id)
+    first_page = state['page'] + 1 if state is not None else args.page
+    count = state['count'] if state is not None else 0
+    progress = None if args.quiet else Progress()
+    page = None
+    try:
+        exporter = make_exporter(output, format, fields, args.compression, append=state is not None)
+        with exporter:
+            for page, page_torrents in fetch_pages(search, first_page, args.concurrency, not args.single_page):
+                torrents = search.unique(page_torrents)
+                count += exporter.write(torrents)
+                if checkpoint is not None:
+                    seen = [torrent.id for torrent in page_torrents] if search.deduplicator is not None else None
+                    checkpoint.save(crawl, page, count, exporter.flush(), seen)
+                if progress is not None:
+                    progress.update(page, len(torrents))
+    except ValueError as error:
+        print('demonoid: {0}'.format(error), file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print('\ndemonoid: interrupted after page {0}. Run again to resume'.format(page), file=sys.stderr)
+        return 130
+    except Exception as error:
+        print('\ndemonoid: {0!r} after page {1}. Run again to resume'.format(error, page), file=sys.stderr)
+        return 1
+    finally:
+        transport.close()
+        if progress is not None:
+            progress.finish()
+    if checkpoint is not None:
+        checkpoint.clear()
+    if output is not args.output:
+        output.flush()
+    print('{0} torrents'.format(count), file=sys.stderr)
+    return 0
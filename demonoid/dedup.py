@@ -0,0 +1,141 @@
+from hashlib import md5
+from math import ceil, log
+from struct import unpack_from
+from threading import Lock
+
+
+class SeenSet(object):
+    """
+       The SeenSet remembers torrent ids exactly. Ids as '3159986/003226642800' are stored as the integer
+       of their first part, which is a lot smaller than the string. Other ids are stored as they are.
+    """
+
+    def __init__(self):
+        self._seen = set()
+
+    @staticmethod
+    def compact(torrent_id):
+        head = torrent_id.split('/', 1)[0]
+        return int(head) if head.isdigit() else torrent_id
+
+    def add(self, torrent_id):
+        """
+        Remembers `torrent_id`.
+
+        :param str torrent_id: id to remember
+        :return: if `torrent_id` was seen before
+        :rtype: bool
+        """
+        key = self.compact(torrent_id)
+        if key in self._seen:
+            return True
+        self._seen.add(key)
+        return False
+
+    def __contains__(self, torrent_id):
+        return self.compact(torrent_id) in self._seen
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class BloomFilter(object):
+    """
+       The BloomFilter remembers torrent ids in a fixed-size bit array, for crawls too long to keep every id.
+       It may report an unseen id as seen with probability `error_rate` (once `capacity` ids are added),
+       so a few unique torrents may be dropped, but it never reports a seen id as unseen.
+    """
+
+    def __init__(self, capacity=10 ** 6, error_rate=0.001):
+        """
+        Creates a BloomFilter instance.
+
+        :param int capacity: count of ids expected to be added
+        :param float error_rate: false positive probability at `capacity`
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = int(ceil(-capacity * log(error_rate) / log(2) ** 2))  # in bits
+        self.hashes = max(1, int(round(self.size / float(capacity) * log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, torrent_id):
+        # double hashing: the i-th position is h1 + i * h2
+        first, second = unpack_from('<QQ', md5(torrent_id.encode('utf-8')).digest())
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, torrent_id):
+        """
+        Remembers `torrent_id`.
+
+        :param str torrent_id: id to remember
+        :return: if `torrent_id` was (probably) seen before
+        :rtype: bool
+        """
+        seen = True
+        for position in self._positions(torrent_id):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                seen = False
+                self._bits[byte] |= 1 << bit
+        if not seen:
+            self._count += 1
+        return seen
+
+    def __contains__(self, torrent_id):
+        for position in self._positions(torrent_id):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def __len__(self):
+        return self._count
+
+
+class Deduplicator(object):
+    """
+       The Deduplicator drops torrents already seen during a crawl, page by page.
+
+       Date sorted pages shift when torrents are posted mid-crawl: the torrents at the end of a page
+       are pushed to the start of the next one. Those come back as leading duplicates of the next page,
+       so they're dropped and counted as a shift. Nothing is skipped by such a shift, since torrents only move
+       further back. Torrents removed mid-crawl shift pages the other way and can't be detected.
+    """
+
+    def __init__(self, seen=None):
+        """
+        Creates a Deduplicator instance.
+
+        :param seen: remembered ids. Default is a new `SeenSet`. Pass a `BloomFilter` for very long crawls
+        :type seen: SeenSet or BloomFilter or None
+        """
+        self.seen = seen if seen is not None else SeenSet()
+        self.duplicates = 0
+        self.shifts = 0  # pages starting with duplicates
+        self.shifted = 0  # torrents pushed from a page to the next one
+        self._lock = Lock()
+
+    def filter_page(self, torrents):
+        """
+        Gives the torrents of a page, which weren't seen before, and remembers them.
+
+        :param list structures.Torrent torrents: torrents of a page in page order
+        :return: unseen torrents in page order
+        :rtype: list structures.Torrent
+        """
+        unique = []
+        leading_duplicates = 0
+        with self._lock:
+            for torrent in torrents:
+                if self.seen.add(torrent.id):
+                    self.duplicates += 1
+                    if not unique:
+                        leading_duplicates += 1
+                else:
+                    unique.append(torrent)
+            if leading_duplicates:
+                self.shifts += 1
+                self.shifted += leading_duplicates
+        return unique
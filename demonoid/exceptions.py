@@ -11,3 +11,15 @@ class HeadReachedException(BaseDemonoidException):
 class InvalidSearchParameterException(BaseDemonoidException):
     """A Search instance has received a search criteria (parameter) that's not supported by
        Demonoid's search form."""
+
+
+class UnknownLayoutException(BaseDemonoidException):
+    """A page has torrents, but its layout doesn't match any registered layout, so they can't be parsed reliably."""
+
+
+class RecordingNotFoundException(BaseDemonoidException):
+    """A replayed request has no recorded response."""
+
+
+class CheckpointMismatchException(BaseDemonoidException):
+    """A crawl was given the checkpoint log of another crawl."""
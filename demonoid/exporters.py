@@ -0,0 +1,366 @@
+import io
+import json
+import os
+from datetime import date
+
+from .constants import ConstantType
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+
+# exported torrent fields, in column order
+FIELDS = ('id', 'date', 'title', 'tracked_by', 'category', 'subcategory', 'quality', 'language', 'user', 'size',
+          'size_in_bytes', 'comments', 'times_completed', 'seeders', 'leechers', 'url', 'category_url', 'user_url',
+          'torrent_link')
+
+# integer fields, the others are strings
+INTEGER_FIELDS = ('size_in_bytes', 'comments', 'times_completed', 'seeders', 'leechers')
+
+COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+
+def torrent_record(torrent, fields=FIELDS):
+    """
+    Gives a torrent's `fields` as plain values: dates in ISO format, integers for `INTEGER_FIELDS` and text or None
+    for the others.
+
+    :param structures.Torrent torrent: torrent to export
+    :param tuple fields: exported fields
+    :rtype: dict
+    """
+    record = {}
+    for field in fields:
+        value = getattr(torrent, field)
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif field not in INTEGER_FIELDS:
+            value = text_value(value)
+        record[field] = value
+    return record
+
+
+def text_value(value):
+    """
+    Gives a text field's value as text, None for missing values and "any" placeholders such as `Category.ALL` or
+    `Quality.ALL`, and the name of any other constant.
+
+    :param value: field value
+    :rtype: str or None
+    """
+    if isinstance(value, ConstantType):
+        return None if value.value == 0 else value.__name__
+    if value is None or value == 0:
+        return None
+    return value if isinstance(value, string_types) else str(value)
+
+
+def guess_compression(path):
+    """
+    Gives the compression of `path` from its extension, one of `COMPRESSIONS`.
+
+    :param str path: file path
+    :return: compression or None if the file isn't compressed
+    :rtype: str or None
+    """
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def guess_format(path):
+    """
+    Gives the format of `path` from its extension, one of `EXPORTERS`. Compression extensions are ignored.
+
+    :param str path: file path
+    :return: format or None if it isn't known
+    :rtype: str or None
+    """
+    root, extension = os.path.splitext(path)
+    if extension.lower() in COMPRESSIONS:
+        extension = os.path.splitext(root)[1]
+    extension = extension.lower().lstrip('.')
+    return extension if extension in EXPORTERS else None
+
+
+def open_compressed(stream, compression):
+    """
+    Wraps the binary `stream` with a compressing one.
+
+    :param stream: binary file object to write to
+    :param compression: one of `COMPRESSIONS` values or None for no compression
+    :type compression: str or None
+    :return: binary file object or None for no compression
+    """
+    if compression is None:
+        return None
+    if compression == 'gzip':
+        import gzip
+
+        return gzip.GzipFile(fileobj=stream, mode='wb')
+    if compression == 'bz2':
+        import bz2
+
+        return bz2.BZ2File(stream, mode='wb')
+    if compression == 'xz':
+        import lzma
+
+        return lzma.LZMAFile(stream, mode='wb')
+    raise ValueError('{0} is not a valid compression. The valid compressions are {1}'.format(
+        compression, ','.join(sorted(COMPRESSIONS.values()))))
+
+
+class Exporter(object):
+    """
+       The Exporter streams torrents to a file. Torrents are written as they come, so exporting a bounded
+       `structures.Paginated` crawl keeps a page of torrents in memory at most, whatever the crawl's length.
+       Text formats can be appended to, so a crawl can be resumed into the file it was writing (see `flush`).
+
+       Exporters are context managers. Closing one flushes and closes the file, if the exporter opened it.
+    """
+
+    binary = False
+
+    def __init__(self, output, fields=None, compression=None, append=False):
+        """
+        Creates an Exporter instance.
+
+        :param output: path of the file to write or a binary file object
+        :type output: str or file
+        :param fields: exported torrent fields. Default is `FIELDS`
+        :type fields: tuple or None
+        :param compression: 'gzip', 'bz2' or 'xz'. Default is guessed from the path's extension. Binary formats ignore it
+        :type compression: str or None
+        :param bool append: if torrents are added to the end of an existing file. Binary formats can't be appended to
+        """
+        self.fields = tuple(fields or FIELDS)
+        for field in self.fields:
+            if field not in FIELDS:
+                raise ValueError('{0} is not a valid field. The valid fields are {1}'.format(field, ','.join(FIELDS)))
+        if append and self.binary:
+            raise ValueError("{0} can't append to a file".format(type(self).__name__))
+        self.count = 0
+        # the file continues existing content, so it gets no header
+        self.appending = False
+        if hasattr(output, 'write'):
+            self._file = None
+            self._raw = output
+        else:
+            if compression is None and not self.binary:
+                compression = guess_compression(output)
+            self.appending = append and os.path.exists(output) and os.path.getsize(output) > 0
+            self._file = self._raw = open(output, 'ab' if append else 'wb')
+        # binary formats compress by themselves
+        self.compression = None if self.binary else compression
+        self._open_stream()
+
+    def _open_stream(self):
+        self._compressed = open_compressed(self._raw, self.compression)
+        stream = self._compressed or self._raw
+        self._stream = stream if self.binary else io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    def _close_stream(self):
+        self._stream.flush()
+        if not self.binary:
+            # detached, so the text wrapper doesn't close a given file object
+            self._stream.detach()
+        if self._compressed is not None:
+            self._compressed.close()
+
+    def write(self, torrents):
+        """
+        Writes `torrents`, consuming them one by one.
+
+        :param torrents: iterable of torrents, as a `structures.Search`
+        :return: count of written torrents
+        :rtype: int
+        """
+        count = self.count
+        for torrent in torrents:
+            self.write_record(torrent_record(torrent, self.fields))
+        return self.count - count
+
+    def write_record(self, record):
+        """
+        Writes a torrent's record, as `torrent_record` gives.
+
+        :param dict record: values per field
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Makes the file whole up to here, so it can be cut at the given size and appended to later.
+        Compressed files get their current member (or stream) finished and a new one started.
+
+        :return: size of the file in bytes
+        :rtype: int
+        """
+        if self.binary:
+            raise ValueError("{0} can't make a partial file whole".format(type(self).__name__))
+        if self._compressed is None:
+            self._stream.flush()
+        else:
+            self._close_stream()
+        self._raw.flush()
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        # measured before the next member's header is written
+        size = self._raw.tell()
+        if self._compressed is not None:
+            self._open_stream()
+        return size
+
+    def close(self):
+        """
+        Flushes everything written and closes the file, if it was opened by the exporter.
+        """
+        self._close_stream()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CSVExporter(Exporter):
+    """
+       The CSVExporter writes torrents as CSV rows, after a header row of the field names. Missing values are empty.
+    """
+
+    def __init__(self, output, fields=None, compression=None, append=False):
+        super(CSVExporter, self).__init__(output, fields, compression, append)
+        if not self.appending:
+            self._writer.writeheader()
+
+    def _open_stream(self):
+        import csv
+
+        super(CSVExporter, self)._open_stream()
+        self._writer = csv.DictWriter(self._stream, self.fields)
+
+    def write_record(self, record):
+        self._writer.writerow(record)
+        self.count += 1
+
+
+class NDJSONExporter(Exporter):
+    """
+       The NDJSONExporter writes torrents as newline delimited JSON, an object per line. Missing values are null.
+    """
+
+    def write_record(self, record):
+        self._stream.write(json.dumps(record, sort_keys=True))
+        self._stream.write('\n')
+        self.count += 1
+
+
+class ParquetExporter(Exporter):
+    """
+       The ParquetExporter writes torrents as a Parquet file, `row_group_size` torrents per row group,
+       so memory is bound by a row group. It needs the optional `pyarrow` package (`pip install pyarrow`).
+       `compression` is Parquet's column compression, as 'snappy' (the default), 'gzip' or 'zstd'.
+
+       :attr: DEFAULT_ROW_GROUP_SIZE is the default count of torrents per row group.
+    """
+
+    binary = True
+    DEFAULT_ROW_GROUP_SIZE = 10000
+
+    def __init__(self, output, fields=None, compression=None, append=False, row_group_size=None):
+        """
+        Creates a ParquetExporter instance.
+
+        :param output: path of the file to write or a binary file object
+        :type output: str or file
+        :param fields: exported torrent fields. Default is `FIELDS`
+        :type fields: tuple or None
+        :param compression: Parquet compression codec. Default is 'snappy'
+        :type compression: str or None
+        :param bool append: must be False, Parquet files can't be appended to
+        :param row_group_size: count of torrents per row group. Default is ParquetExporter.DEFAULT_ROW_GROUP_SIZE
+        :type row_group_size: int or None
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('ParquetExporter needs pyarrow. Install it with `pip install pyarrow`')
+
+        # the codec is Parquet's own, the file itself isn't compressed
+        super(ParquetExporter, self).__init__(output, fields, append=append)
+        self._pyarrow = pyarrow
+        self.row_group_size = row_group_size or self.DEFAULT_ROW_GROUP_SIZE
+        self.schema = pyarrow.schema([(field, pyarrow.int64() if field in INTEGER_FIELDS else pyarrow.string())
+                                      for field in self.fields])
+        self._writer = pyarrow.parquet.ParquetWriter(self._stream, self.schema, compression=compression or 'snappy')
+        self._columns = dict((field, []) for field in self.fields)
+
+    def write_record(self, record):
+        for field in self.fields:
+            self._columns[field].append(record[field])
+        self.count += 1
+        if len(self._columns[self.fields[0]]) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        if not self._columns[self.fields[0]]:
+            return
+        table = self._pyarrow.Table.from_arrays(
+            [self._pyarrow.array(self._columns[field], type=self.schema.field(field).type) for field in self.fields],
+            schema=self.schema)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        for column in self._columns.values():
+            del column[:]
+
+    def close(self):
+        self._write_row_group()
+        self._writer.close()
+        super(ParquetExporter, self).close()
+
+
+EXPORTERS = {
+    'csv': CSVExporter,
+    'ndjson': NDJSONExporter,
+    'jsonl': NDJSONExporter,
+    'parquet': ParquetExporter,
+}
+
+
+def make_exporter(output, format=None, fields=None, compression=None, append=False):
+    """
+    Creates the exporter of `format`.
+
+    :param output: path of the file to write or a binary file object
+    :type output: str or file
+    :param format: one of `EXPORTERS`. Default is guessed from the path's extension
+    :type format: str or None
+    :param fields: exported torrent fields. Default is `FIELDS`
+    :type fields: tuple or None
+    :param compression: compression of the file (or Parquet's codec). Default is guessed from the path's extension
+    :type compression: str or None
+    :param bool append: if torrents are added to the end of an existing file
+    :rtype: Exporter
+    """
+    if format is None and not hasattr(output, 'write'):
+        format = guess_format(output)
+    if format is None:
+        raise ValueError("Can't guess the format of {0}. The valid formats are {1}".format(output, ','.join(sorted(EXPORTERS))))
+    if format not in EXPORTERS:
+        raise ValueError('{0} is not a valid format. The valid formats are {1}'.format(format, ','.join(sorted(EXPORTERS))))
+    return EXPORTERS[format](output, fields, compression, append)
+
+
+def export(torrents, output, format=None, fields=None, compression=None):
+    """
+    Streams `torrents` to `output` in `format`. See `make_exporter` for the arguments.
+
+    :param torrents: iterable of torrents, as a bounded `structures.Search`
+    :return: count of written torrents
+    :rtype: int
+    """
+    with make_exporter(output, format, fields, compression) as exporter:
+        return exporter.write(torrents)
@@ -0,0 +1,199 @@
+from hashlib import md5
+
+from .exceptions import UnknownLayoutException
+from .parser import Parser
+from .xpaths import DEFAULT_SELECTORS, Selector
+
+
+class Layout(object):
+    """
+       The Layout is the row-parser strategy of one version of Demonoid's result pages. It recognizes its pages by a
+       fingerprint, finds their torrent rows, groups the rows per torrent and parses every group.
+
+       This base class handles the known layout: rows come from `selectors.torrents_list` (trimming the last 3 rows),
+       every date row is followed by torrents of 2 rows each.
+    """
+
+    def __init__(self, name, fingerprint, selectors=DEFAULT_SELECTORS):
+        """
+        Creates a Layout instance.
+
+        :param str name: name of the layout
+        :param str fingerprint: XPATH expression evaluating to true only on this layout's pages
+        :param xpaths.SelectorSet selectors: selectors used to find rows and their parts
+        """
+        self.name = name
+        self.fingerprint = Selector(fingerprint)
+        self.selectors = selectors
+
+    def matches(self, dom):
+        """
+        Checks if `dom` is a page of this layout.
+
+        :param lxml.HtmlElement dom: page to check
+        :rtype: bool
+        """
+        return bool(self.fingerprint(dom))
+
+    def get_rows(self, dom):
+        """
+        Gets the torrent list rows (date rows included) of `dom`.
+
+        :param lxml.HtmlElement dom: page to get rows from
+        :rtype: list lxml.HtmlElement
+        """
+        return Parser.get_torrents_rows(dom, self.selectors)
+
+    def group_rows(self, rows, on_date_error=None):
+        """
+        Groups `rows` per torrent. Rows are cleared once parsed, as they aren't needed anymore.
+
+        :param list lxml.HtmlElement rows: rows from `get_rows`
+        :param on_date_error: called with the exception and the row of a date row failing to parse, instead of raising.
+         The torrents after it get a None date
+        :type on_date_error: callable or None
+        :return: generator of every torrent's date and rows
+        :rtype: generator tuple
+        """
+        current_date = None
+        torrent_rows = []  # 2 rows hold info about 1 torrent
+        for row in rows:
+            date_td = Parser.get_date_td(row, self.selectors)
+            if date_td is not None:
+                current_date = self.parse_date_row(date_td, row, on_date_error)
+                row.clear()
+                continue
+            torrent_rows.append(row)
+            if len(torrent_rows) == 2:
+                yield current_date, torrent_rows
+                for torrent_row in torrent_rows:
+                    torrent_row.clear()
+                torrent_rows = []
+
+    @staticmethod
+    def parse_date_row(date_td, row, on_date_error=None):
+        """
+        Parses the date of a date row, reporting a failure to `on_date_error` if it's given.
+
+        :param lxml.HtmlElement date_td: the row's date table data
+        :param lxml.HtmlElement row: the date row
+        :param on_date_error: called with the exception and `row` instead of raising
+        :type on_date_error: callable or None
+        :return: the date or None if it failed to parse
+        :rtype: datetime.date or None
+        """
+        try:
+            return Parser.parse_date(date_td)
+        except Exception as exception:
+            if on_date_error is None:
+                raise
+            on_date_error(exception, row)
+            return None
+
+    def digest(self, rows):
+        """
+        Hashes the markup of `rows`, so pages with the same torrents list get the same digest
+        whatever changed around the list, as ads.
+
+        :param list lxml.HtmlElement rows: rows from `get_rows`
+        :rtype: str
+        """
+        from lxml import etree
+
+        digest = md5()
+        for row in rows:
+            digest.update(etree.tostring(row))
+        return digest.hexdigest()
+
+    def parse_torrent(self, rows, url):
+        """
+        Parses a torrent's rows from `group_rows`.
+
+        :param list lxml.HtmlElement rows: the torrent's rows
+        :param urls.Url url: Url used to combine base url's with scrapped links
+        :return: `structures.Torrent` arguments after its date
+        :rtype: list
+        """
+        return Parser.parse_first_row(rows[0], url, self.selectors) + Parser.parse_second_row(rows[1], url)
+
+    def __repr__(self):
+        return 'Layout({0!r})'.format(self.name)
+
+
+class AnchoredLayout(Layout):
+    """
+       The AnchoredLayout finds torrents by their details links instead of by their position in the page,
+       so it keeps working when the list table moves or gains rows. Every row with a details link starts a torrent,
+       whose second row is the row right after it. Rows that are neither dates nor torrents are skipped.
+    """
+
+    DETAILS_LINK_XPATH = './td/a[contains(@href, "/files/details/")]'
+
+    def __init__(self, name='anchored', fingerprint='boolean(//tr/td/a[contains(@href, "/files/details/")])',
+                 selectors=None):
+        selectors = selectors or DEFAULT_SELECTORS.override(
+            name, torrents_list='//tr[td/a[contains(@href, "/files/details/")]]/parent::*/tr')
+        super(AnchoredLayout, self).__init__(name, fingerprint, selectors)
+        self.details_link = Selector(self.DETAILS_LINK_XPATH)
+
+    def get_rows(self, dom):
+        return self.selectors.torrents_list(dom)
+
+    def group_rows(self, rows, on_date_error=None):
+        current_date = None
+        first_row = None
+        for row in rows:
+            if first_row is not None:
+                yield current_date, [first_row, row]
+                first_row.clear()
+                row.clear()
+                first_row = None
+                continue
+            date_td = Parser.get_date_td(row, self.selectors)
+            if date_td is not None:
+                current_date = self.parse_date_row(date_td, row, on_date_error)
+            elif self.details_link(row):
+                first_row = row
+
+
+KNOWN_LAYOUT = Layout('table-6', 'boolean(' + DEFAULT_SELECTORS.torrents_list.expression + '/td/a[contains(@href, "/files/details/")])')
+ANCHORED_LAYOUT = AnchoredLayout()
+
+# tried in order. The anchored layout matches any page with torrents, so it's the last resort
+_registry = [KNOWN_LAYOUT, ANCHORED_LAYOUT]
+_has_torrents = Selector('boolean(//a[contains(@href, "/files/details/")])')
+
+
+def register_layout(layout, index=None):
+    """
+    Registers `layout` to be tried by `detect_layout`. The anchored layout stays the last resort.
+
+    :param Layout layout: layout to register
+    :param index: position among the registered layouts. Default is right before the anchored layout
+    :type index: int or None
+    :return: `layout`
+    :rtype: Layout
+    """
+    if index is None:
+        index = len(_registry) - 1 if ANCHORED_LAYOUT in _registry else len(_registry)
+    _registry.insert(index, layout)
+    return layout
+
+
+def detect_layout(dom):
+    """
+    Fingerprints `dom` once and gives the layout to parse it with.
+    Layouts are tried in their registered order, so pages of the known layout cost a single XPATH evaluation
+    and the anchored fallback is only used for the pages that need it.
+
+    :param lxml.HtmlElement dom: page to fingerprint
+    :return: layout of `dom` or None if `dom` has no torrents at all (as the page after the last page)
+    :rtype: Layout or None
+    :raises UnknownLayoutException: if `dom` has torrents, but no registered layout matches it
+    """
+    for layout in _registry:
+        if layout.matches(dom):
+            return layout
+    if _has_torrents(dom):
+        raise UnknownLayoutException('The page has torrents, but no registered layout matches it.')
+    return None
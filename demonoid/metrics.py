@@ -0,0 +1,198 @@
+from threading import Lock
+
+try:
+    from time import perf_counter as default_timer
+except ImportError:
+    from time import time as default_timer
+
+
+class Metrics(object):
+    """
+       The Metrics class collects stage timers and counters from `Url` and `structures` and dispatches
+       every event to its sinks. A sink is any callable accepting `(kind, name, value)`, where `kind` is either
+       `Metrics.TIMER` (`value` in seconds) or `Metrics.COUNTER`.
+
+       The measured stages are `fetch` (the whole request), `fetch.connect` (new connections, DNS resolution
+       included), `fetch.ttfb` (until response headers), `fetch.download` (response body), `dom.build` (parsing
+       the page to a tree), `parser.layout` (detecting the page's layout), `parser.rows` (getting the torrent rows)
+       and `parser.row` (every torrent). The counters are `fetch.bytes`, `fetch.wire_bytes` (`fetch.bytes` as sent
+       by the server, compressed or not), `parser.rows`, `parser.torrents`, `parser.errors` (rows skipped by
+       tolerant lists), `dedup.duplicates` (torrents dropped by deduplicating lists), `fetch.not_modified`
+       (conditional requests answered with 304 Not Modified), `fetch.coalesced` (pages shared from an identical
+       request in flight) and `parser.unchanged` (pages whose torrents rows didn't change, so their torrents
+       were reused).
+
+       :attr: TIMER is the kind of timer events.
+       :attr: COUNTER is the kind of counter events.
+    """
+
+    TIMER = 'timer'
+    COUNTER = 'counter'
+    enabled = True
+
+    def __init__(self, sinks=None):
+        """
+        Creates a Metrics instance.
+
+        :param sinks: callables receiving every event. Default is []
+        :type sinks: list callable or None
+        """
+        self.sinks = list(sinks or [])
+
+    def add_sink(self, sink):
+        """
+        Adds `sink` to the receivers of every following event.
+
+        :param callable sink: callable accepting `(kind, name, value)`
+        :return: self
+        :rtype: Metrics
+        """
+        self.sinks.append(sink)
+        return self
+
+    def timer(self, name):
+        """
+        Gives a context manager timing its block as stage `name`.
+
+        :param str name: stage name
+        :rtype: Timer
+        """
+        return Timer(self, name)
+
+    def observe(self, name, seconds):
+        """
+        Records that stage `name` took `seconds`.
+
+        :param str name: stage name
+        :param float seconds: duration of the stage
+        """
+        self._emit(self.TIMER, name, seconds)
+
+    def increment(self, name, amount=1):
+        """
+        Increments counter `name` by `amount`.
+
+        :param str name: counter name
+        :param int amount: increment
+        """
+        self._emit(self.COUNTER, name, amount)
+
+    def _emit(self, kind, name, value):
+        for sink in self.sinks:
+            sink(kind, name, value)
+
+
+class NullMetrics(Metrics):
+    """
+       The NullMetrics is the turned-off Metrics used by default. Every hook is a no-op,
+       so instrumented hot paths pay only a method call.
+    """
+
+    enabled = False
+
+    def timer(self, name):
+        return NULL_TIMER
+
+    def observe(self, name, seconds):
+        pass
+
+    def increment(self, name, amount=1):
+        pass
+
+
+class Timer(object):
+    """
+       The Timer is a context manager, which reports the wall-clock duration of its block to a `Metrics` instance.
+    """
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self.name = name
+        self._started_at = None
+
+    def __enter__(self):
+        self._started_at = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._metrics.observe(self.name, default_timer() - self._started_at)
+        return False
+
+
+class NullTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_TIMER = NullTimer()
+NULL_METRICS = NullMetrics()
+
+
+class LoggingSink(object):
+    """
+       The LoggingSink logs every event with `logger` (default is the `demonoid.metrics` logger)
+       at `level` (default is DEBUG).
+    """
+
+    def __init__(self, logger=None, level=None):
+        # logging is only imported when a LoggingSink is used
+        import logging
+
+        self.logger = logger or logging.getLogger('demonoid.metrics')
+        self.level = logging.DEBUG if level is None else level
+
+    def __call__(self, kind, name, value):
+        if kind == Metrics.TIMER:
+            self.logger.log(self.level, '%s took %.6fs', name, value)
+        else:
+            self.logger.log(self.level, '%s +%s', name, value)
+
+
+class PrometheusSink(object):
+    """
+       The PrometheusSink aggregates events and renders them in Prometheus' text exposition format.
+       Timers become summaries with `_count` and `_sum` samples (seconds) and counters become `_total` counters.
+       Dots in names are replaced with underscores and names are prefixed with `prefix`.
+    """
+
+    def __init__(self, prefix='demonoid'):
+        self.prefix = prefix
+        self._timers = {}
+        self._counters = {}
+        self._lock = Lock()
+
+    def __call__(self, kind, name, value):
+        with self._lock:
+            if kind == Metrics.TIMER:
+                count, total = self._timers.get(name, (0, 0.0))
+                self._timers[name] = (count + 1, total + value)
+            else:
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def metric_name(self, name):
+        return '{0}_{1}'.format(self.prefix, name.replace('.', '_'))
+
+    def render(self):
+        """
+        Renders all aggregated events.
+
+        :return: Prometheus text exposition
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._timers):
+                count, total = self._timers[name]
+                metric = self.metric_name(name) + '_seconds'
+                lines.append('# TYPE {0} summary'.format(metric))
+                lines.append('{0}_count {1}'.format(metric, count))
+                lines.append('{0}_sum {1!r}'.format(metric, total))
+            for name in sorted(self._counters):
+                metric = self.metric_name(name) + '_total'
+                lines.append('# TYPE {0} counter'.format(metric))
+                lines.append('{0} {1}'.format(metric, self._counters[name]))
+        return '\n'.join(lines) + '\n'
@@ -1,8 +1,10 @@
 from __future__ import unicode_literals
 
+import re
 from datetime import date, datetime
 
 from .constants import Category, Language, Quality
+from .xpaths import DEFAULT_SELECTORS
 
 
 class Parser:
@@ -15,34 +17,49 @@ class Parser:
        :attr: DATE_TAG_XPATH is a XPATH expression used to capture the HTML parent `tr`'s  `td` element holding the date row.
        :attr: DATE_STRPTIME_FORMAT is a `datetime`-compliant string used to parse the DATE_TAG's date text.
        :attr: FIRST_ROW_XPATH is a XPATH used to capture the first torrent's table row's id, title, tracked_by, category_url and torrent_url (torrents consist of 2 table rows).
+       :attr: SIZE_UNITS maps the size units shown in torrents lists to their count of bytes.
+       :attr: PAGE_LABEL_PATTERN matches the torrent ranges labeling the pagination's pages, as `51 - 100`.
+       :attr: ITEMS_TOTAL_PATTERN matches the count of torrents the pagination shows, as `600,652 items total`.
+       :attr: selectors is the `xpaths.SelectorSet` of compiled XPATH expressions used by default. Methods using XPATH expressions also accept a `selectors` parameter to use another set, as one for a mirror.
     """
 
-    TORRENTS_LIST_XPATH = '//*[@id="fslispc"]/table/tr/td[1]/table[6]/tr/td/table/tr[position() > 4]'
-    DATE_TAG_XPATH = './td[@class="added_today"]'
+    selectors = DEFAULT_SELECTORS
+    TORRENTS_LIST_XPATH = DEFAULT_SELECTORS.torrents_list.expression
+    DATE_TAG_XPATH = DEFAULT_SELECTORS.date_tag.expression
     DATE_STRPTIME_FORMAT = '%A, %b %d, %Y'
-    FIRST_ROW_XPATH = './td/a | ./td/font'
+    SIZE_UNITS = {'B': 1, 'BYTES': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
+    SIZE_PATTERN = re.compile(r'([\d.,]+)\s*([a-zA-Z]+)')
+    FIRST_ROW_XPATH = DEFAULT_SELECTORS.first_row.expression
+    PAGE_LABEL_PATTERN = re.compile(r'^\s*([\d,]+)\s*-\s*([\d,]+)\s*$')
+    ITEMS_TOTAL_PATTERN = re.compile(r'([\d,]+)\s+items total')
 
     @staticmethod
-    def get_torrents_rows(dom):
+    def get_torrents_rows(dom, selectors=None):
         """
         Static method that gets the torrent list rows from the given `dom` by running `TORRENTS_LIST_XPATH` and trims the last() - 3 non-torrent rows, which are actually sorting preferences rows.
 
         :param lxml.HtmlElement dom: the dom to operate on
+        :param selectors: selectors to use. Default is `Parser.selectors`
+        :type selectors: xpaths.SelectorSet or None
         :return: returns torrent rows
         :rtype: list lxml.HtmlElement
         """
-        return dom.xpath(Parser.TORRENTS_LIST_XPATH)[:-3]  # trim non-torrents
+        selectors = selectors or Parser.selectors
+        return selectors.torrents_list(dom)[:-3]  # trim non-torrents
 
     @staticmethod
-    def get_date_td(rows):
+    def get_date_td(rows, selectors=None):
         """
         Static method that gets the torrent data element containing the torrents' date. Executes :attr:`DATE_TAG_XPATH <DATE_TAG_XPATH>` on given `dom`.
 
         :param list lxml.HtmlElement rows: the rows to search in
+        :param selectors: selectors to use. Default is `Parser.selectors`
+        :type selectors: xpaths.SelectorSet or None
         :return: table data containg torrents' date
         :rtype: lxml.HtmlElement
         """
-        tds = rows.xpath(Parser.DATE_TAG_XPATH)
+        selectors = selectors or Parser.selectors
+        tds = selectors.date_tag(rows)
         return tds[0] if tds else None
 
     @staticmethod
@@ -91,19 +108,22 @@ class Parser:
         return datetime.strptime(text[1], Parser.DATE_STRPTIME_FORMAT).date()
 
     @staticmethod
-    def parse_first_row(row, url_instance):
+    def parse_first_row(row, url_instance, selectors=None):
         """
         Static method that parses a given table row element by executing `Parser.FIRST_ROW_XPATH` and scrapping torrent's
         id, title, tracked by status, category url and torrent url. Used specifically with a torrent's first table row.
 
         :param lxml.HtmlElement row: row to parse
         :param urls.Url url_instance: Url used to combine base url's with scrapped links from tr
+        :param selectors: selectors to use. Default is `Parser.selectors`
+        :type selectors: xpaths.SelectorSet or None
         :return: scrapped id, title, tracked by status, category url and torrent url
         :rtype: list
         """
-        tags = row.xpath(Parser.FIRST_ROW_XPATH)
+        selectors = selectors or Parser.selectors
+        tags = selectors.first_row(row)
         category_url = url_instance.combine(tags[0].get('href'))
-        title = unicode(tags[1].text)
+        title = tags[1].text
         # work with the incomplete URL to get str_id
         torrent_url = tags[1].get('href')
         str_id = torrent_url.split('details/')[1]
@@ -134,7 +154,8 @@ class Parser:
         :rtype: list
         """
         tags = row.findall('./td')
-        category, subcategory, quality, language = Parser.parse_torrent_properties(tags[0])
+        properties = Parser.parse_torrent_properties(tags[0])
+        category, subcategory, quality, language = [properties[key] for key in ('category', 'subcategory', 'quality', 'language')]
         user_info = tags[1].find('./a')
         user = user_info.text_content()
         user_url = url.combine(user_info.get('href'))
@@ -143,10 +164,7 @@ class Parser:
         # Don't combine it with BASE_URL, since it's an absolute url.
         torrent_link = Parser.parse_torrent_link(tags[2])
         size = tags[3].text  # as 10.5 GB
-        comments = tags[4].text
-        times_completed = tags[5].text
-        seeders = tags[6].text
-        leechers = tags[7].text
+        comments, times_completed, seeders, leechers = [Parser.parse_count(tag) for tag in tags[4:8]]
         return [category, subcategory, quality, language, user, user_url, torrent_link,
                 size, comments, times_completed, seeders, leechers]
 
@@ -160,7 +178,11 @@ class Parser:
         :return: identified category, subcategory, quality and languages.
         :rtype: dict
         """
-        output = {'category': table_datas[0].text, 'subcategory': None, 'quality': None, 'language': None}
+        output = {'category': None, 'subcategory': None, 'quality': None, 'language': None}
+        # some torrents have no properties at all
+        if not len(table_datas):
+            return output
+        output['category'] = table_datas[0].text
         for i in range(1, len(table_datas)):
             td = table_datas[i]
             url = td.get('href')
@@ -188,6 +210,67 @@ class Parser:
         link_tag = anchors[0] if len(anchors) < 2 else anchors[1]
         return link_tag.get('href')
 
+    @staticmethod
+    def parse_count(table_data):
+        """
+        Static method that parses a table data element holding a count, as comments or seeders.
+        Counts may be wrapped in a `font` element for their color.
+
+        :param lxml.HtmlElement table_data: table data to parse
+        :return: the count or None if the table data doesn't hold one
+        :rtype: int or None
+        """
+        text = table_data.text_content().strip().replace(',', '')
+        return int(text) if text.isdigit() else None
+
+    @staticmethod
+    def parse_size(text):
+        """
+        Static method that parses a torrent's size text, as `9.21 GB`, to a count of bytes.
+
+        :param str text: size text to parse
+        :return: the size in bytes or None if the text isn't a known size
+        :rtype: int or None
+        """
+        match = Parser.SIZE_PATTERN.search(text or '')
+        if match is None:
+            return None
+        multiplier = Parser.SIZE_UNITS.get(match.group(2).upper())
+        if multiplier is None:
+            return None
+        return int(float(match.group(1).replace(',', '')) * multiplier)
+
+    @staticmethod
+    def parse_pagination(dom):
+        """
+        Static method that parses the pagination of a torrents list page: the last page it links to,
+        the count of torrents per page and the count of torrents of the whole list.
+        The pagination links to a window of pages, so the last linked page isn't always the list's last one.
+
+        :param lxml.HtmlElement dom: the dom to operate on
+        :return: last linked page, page size and items total, each None if the page doesn't show it
+        :rtype: tuple
+        """
+        last_page = page_size = total = None
+        # the current page is underlined instead of linked
+        for element in dom.iter('a', 'u'):
+            match = Parser.PAGE_LABEL_PATTERN.match(element.text_content())
+            if match is None:
+                continue
+            if page_size is None:
+                start, end = (int(number.replace(',', '')) for number in match.groups())
+                page_size = end - start + 1
+            if element.tag == 'a':
+                page = Parser.get_params(element.get('href') or '').get('page')
+                if isinstance(page, int):
+                    last_page = max(last_page or page, page)
+        for element in dom.iter('strong'):
+            match = Parser.ITEMS_TOTAL_PATTERN.search(element.text_content())
+            if match is not None:
+                total = int(match.group(1).replace(',', ''))
+                break
+        return last_page, page_size, total
+
     @staticmethod
     def is_subcategory(params):
         """
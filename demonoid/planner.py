@@ -0,0 +1,183 @@
+from itertools import islice
+from threading import BoundedSemaphore, Event, Thread
+
+try:
+    from queue import Empty, Full, Queue
+except ImportError:
+    from Queue import Empty, Full, Queue
+
+from .constants import Category, ConstantType, SortBy
+from .dedup import Deduplicator
+from .ranking import merge
+
+
+_DONE = object()
+
+
+class _Failure(object):
+
+    def __init__(self, exception):
+        self.exception = exception
+
+
+def date_order_key(torrent):
+    """
+    Gives the key sorting torrents the way date sorted pages list them: newest date first.
+    Pages list torrents of the same date by posting time, which isn't shown, so those keep their page order.
+
+    :param structures.Torrent torrent: torrent to key
+    :rtype: int
+    """
+    return -torrent.date.toordinal() if torrent.date else 0
+
+
+def categories():
+    """
+    Gives the values of all top-level categories in `constants.Category` except `Category.ALL`.
+
+    :rtype: list int
+    """
+    values = []
+    for name in dir(Category):
+        attr = getattr(Category, name)
+        if isinstance(attr, ConstantType) and attr.value not in (None, Category.ALL.value):
+            values.append(attr.value)
+    return sorted(values)
+
+
+class QueryPlan(object):
+    """
+       The QueryPlan runs a broad search (any category, sorted by date) as one sub-search per `constants.Category`.
+       The sub-searches are crawled in parallel threads, at most `concurrency` pages being fetched at a time,
+       and their torrents are merged back by date with a k-way merge, so they come in the original query's order.
+
+       Categories are disjoint, so splitting by them neither loses nor repeats torrents. Splitting further by
+       subcategory isn't done, since torrents without a subcategory can't be searched for on their own.
+       Any other search (a single category or another sort order) runs as a single sub-search.
+
+       Pages of the original query don't map to pages of the sub-searches, so split sub-searches start from
+       their first page and the merged torrents before the original query's `page` are skipped.
+
+       :attr: DEFAULT_CONCURRENCY is the default maximum of pages fetched at a time.
+       :attr: PREFETCH_PAGES is how many pages every sub-search may fetch ahead of the merge.
+       :attr: PAGE_SIZE is the count of torrents per page of the original query.
+    """
+
+    DEFAULT_CONCURRENCY = 4
+    PREFETCH_PAGES = 2
+    PAGE_SIZE = 50
+
+    def __init__(self, demonoid, concurrency=None, dedupe=None, **params):
+        """
+        Creates a QueryPlan instance.
+
+        :param structures.Demonoid demonoid: client making the sub-searches
+        :param concurrency: maximum of pages fetched at a time. Default is QueryPlan.DEFAULT_CONCURRENCY
+        :type concurrency: int or None
+        :param dedupe: deduplicator for the merged torrents, as in `structures.Paginated`
+        :type dedupe: bool or dedup.Deduplicator or None
+        :param params: search criteria, as `page` and `query`, of the original search
+        """
+        self._demonoid = demonoid
+        self.concurrency = concurrency or self.DEFAULT_CONCURRENCY
+        self.params = params
+        self.dedupe = dedupe
+
+    @property
+    def is_split(self):
+        category = self.params.get('category', Category.ALL.value)
+        sort = self.params.get('sort', SortBy.DATE)
+        return category == Category.ALL.value and sort == SortBy.DATE
+
+    def sub_searches(self):
+        """
+        Builds the sub-searches of the plan.
+
+        :rtype: list structures.Search
+        """
+        if not self.is_split:
+            return [self._demonoid.search(**self.params)]
+        sub_searches = []
+        for category in categories():
+            params = dict(self.params, category=category)
+            params.pop('page', None)
+            sub_searches.append(self._demonoid.search(**params))
+        return sub_searches
+
+    def __iter__(self):
+        sub_searches = self.sub_searches()
+        slots = BoundedSemaphore(self.concurrency)
+        stop = Event()
+        queues = [Queue(self.PREFETCH_PAGES) for _ in sub_searches]
+        threads = [Thread(target=self._crawl, args=(sub_search, queue, slots, stop))
+                   for sub_search, queue in zip(sub_searches, queues)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        deduplicator = Deduplicator() if self.dedupe is True else self.dedupe or None
+        merged = self.merge([self._pages(queue) for queue in queues])
+        if self.is_split:
+            merged = islice(merged, (self.params.get('page', 1) - 1) * self.PAGE_SIZE, None)
+        try:
+            for torrent in merged:
+                if deduplicator is None or deduplicator.filter_page([torrent]):
+                    yield torrent
+        finally:
+            stop.set()
+            for queue in queues:
+                self._drain(queue)
+
+    @staticmethod
+    def merge(streams, key=date_order_key):
+        """
+        K-way merges `streams` of torrents, each already sorted by `key`, as `ranking.merge` does.
+
+        :param list iterator streams: sorted streams of torrents
+        :param callable key: sort key
+        :rtype: generator
+        """
+        return merge(streams, key)
+
+    def _crawl(self, sub_search, queue, slots, stop):
+        page = sub_search.page
+        try:
+            while not stop.is_set():
+                with slots:
+                    torrents = sub_search._fetch_torrents(sub_search._url.snapshot(page=page))
+                if not torrents or not self._put(queue, torrents, stop):
+                    break
+                page += 1
+        except Exception as exception:
+            self._put(queue, _Failure(exception), stop)
+        finally:
+            self._put(queue, _DONE, stop)
+
+    @staticmethod
+    def _put(queue, item, stop):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    @staticmethod
+    def _pages(queue):
+        while True:
+            item = queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exception
+            for torrent in item:
+                yield torrent
+
+    @staticmethod
+    def _drain(queue):
+        try:
+            while True:
+                queue.get_nowait()
+        except Empty:
+            pass
@@ -0,0 +1,203 @@
+import os
+import sys
+import threading
+from threading import Lock, local
+
+try:
+    from time import perf_counter as default_timer
+except ImportError:
+    from time import time as default_timer
+
+
+PACKAGE_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+class Profiler(object):
+    """
+       The Profiler is a deterministic profiler scoped to the demonoid package. Only calls of functions defined
+       in the package are traced, so the crawl's own cost isn't drowned by `requests` or `lxml` internals, whose time
+       is accounted to the package function calling them.
+
+       It can be used as a (re-entrant) context manager or passed to `Demonoid(profile=...)`. The collected costs
+       are given per function by `stats` and `parse_costs` and per call stack by `write_collapsed`,
+       whose output is the collapsed-stack format flamegraph tools read.
+
+       :attr: PARSE_COST_MARKERS are name fragments of the functions reported by `parse_costs`.
+    """
+
+    PARSE_COST_MARKERS = ('Parser.', 'List._build_', 'Layout.')
+
+    def __init__(self, package_path=PACKAGE_PATH, clock=default_timer):
+        """
+        Creates a Profiler instance.
+
+        :param str package_path: directory whose functions are traced. Default is the demonoid package
+        :param callable clock: clock giving seconds. Default is `time.perf_counter`
+        """
+        self.package_path = package_path
+        self._clock = clock
+        self._local = local()
+        self._lock = Lock()
+        self._depth = 0
+        # hooks left in other threads remove themselves once tracing is stopped
+        self._active = False
+        self._functions = {}  # name -> [calls, total seconds, own seconds]
+        self._stacks = {}  # tuple of names -> own seconds
+
+    def start(self):
+        """
+        Starts tracing calls in this and in every thread started afterwards. A thread that was already running
+        when tracing started is traced while it holds the profiler, as a crawl's worker threads are.
+        Nested starts are counted, so only the outermost `stop` stops tracing, from whichever thread it's called.
+
+        :return: self
+        :rtype: Profiler
+        """
+        with self._lock:
+            self._depth += 1
+            if self._depth == 1:
+                self._local = local()
+                self._active = True
+                threading.setprofile(self._trace)
+            depth = self._local.__dict__.get('depth', 0)
+            self._local.depth = depth + 1
+            if not depth and sys.getprofile() != self._trace:
+                self._local.installed = True
+                sys.setprofile(self._trace)
+        return self
+
+    def stop(self):
+        """
+        Stops tracing, if this is the outermost `stop`. The hook is removed from this thread at once
+        and from any other traced thread on its next call. Otherwise a thread whose hook was installed by its `start`
+        stops being traced once it no longer holds the profiler.
+
+        :return: self
+        :rtype: Profiler
+        """
+        with self._lock:
+            self._depth -= 1
+            depth = self._local.__dict__.get('depth', 0)
+            if depth:
+                self._local.depth = depth - 1
+            if self._depth == 0:
+                self._active = False
+                sys.setprofile(None)
+                threading.setprofile(None)
+            elif depth == 1 and self._local.__dict__.pop('installed', False):
+                sys.setprofile(None)
+                self._local.stack = []
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def _trace(self, frame, event, arg):
+        if not self._active:
+            sys.setprofile(None)
+            return
+        if event not in ('call', 'return'):
+            return
+        code = frame.f_code
+        if not code.co_filename.startswith(self.package_path) or frame.f_globals.get('__name__') == __name__:
+            return
+        stack = self._local.__dict__.setdefault('stack', [])
+        now = self._clock()
+        if event == 'call':
+            # [name, started at, time spent in traced callees]
+            stack.append([self.function_name(frame), now, 0.0])
+        elif stack:
+            name, started_at, callees = stack.pop()
+            total = now - started_at
+            if stack:
+                stack[-1][2] += total
+            path = tuple(entry[0] for entry in stack) + (name,)
+            with self._lock:
+                function = self._functions.setdefault(name, [0, 0.0, 0.0])
+                function[0] += 1
+                function[1] += total
+                function[2] += total - callees
+                self._stacks[path] = self._stacks.get(path, 0.0) + total - callees
+
+    @staticmethod
+    def function_name(frame):
+        """
+        Gives a readable name of `frame`'s function as `demonoid.parser:Parser.parse_date`.
+
+        :param frame frame: frame to name
+        :rtype: str
+        """
+        code = frame.f_code
+        name = getattr(code, 'co_qualname', None)
+        if name is None:
+            # before Python 3.11 methods can still be qualified by their first argument
+            name = code.co_name
+            if code.co_argcount and code.co_varnames[0] in ('self', 'cls'):
+                owner = frame.f_locals.get(code.co_varnames[0])
+                owner = owner if isinstance(owner, type) else type(owner)
+                name = '{0}.{1}'.format(owner.__name__, name)
+        return '{0}:{1}'.format(frame.f_globals.get('__name__'), name)
+
+    def stats(self):
+        """
+        Gives the cost of every traced function, the most expensive one first.
+
+        :return: tuples of function name, calls, total (inclusive) seconds and own (exclusive) seconds
+        :rtype: list tuple
+        """
+        with self._lock:
+            rows = [(name, calls, total, own) for name, (calls, total, own) in self._functions.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def parse_costs(self):
+        """
+        Gives the cost of the `Parser` static methods, `List._build_*` methods and `layouts.Layout` methods only.
+
+        :return: tuples of function name, calls, total seconds and own seconds
+        :rtype: list tuple
+        """
+        return [row for row in self.stats() if any(marker in row[0] for marker in self.PARSE_COST_MARKERS)]
+
+    def format_report(self, rows=None):
+        """
+        Formats `rows` (default is `parse_costs`) as a text table.
+
+        :rtype: str
+        """
+        rows = self.parse_costs() if rows is None else rows
+        lines = ['{0:>10} {1:>12} {2:>12}  {3}'.format('calls', 'total (s)', 'own (s)', 'function')]
+        for name, calls, total, own in rows:
+            lines.append('{0:>10} {1:>12.6f} {2:>12.6f}  {3}'.format(calls, total, own, name))
+        return '\n'.join(lines) + '\n'
+
+    def write_collapsed(self, path):
+        """
+        Writes the own time of every traced call stack in microseconds, one `caller;callee count` line per stack.
+        The file can be fed to flamegraph.pl, speedscope or any other collapsed-stack reader.
+
+        :param str path: file to write
+        :return: count of written stacks
+        :rtype: int
+        """
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        with open(path, 'w') as output:
+            for stack, own in stacks:
+                output.write('{0} {1}\n'.format(';'.join(stack), int(round(own * 1000000))))
+        return len(stacks)
+
+    def reset(self):
+        """
+        Drops all collected costs.
+
+        :return: self
+        :rtype: Profiler
+        """
+        with self._lock:
+            self._functions.clear()
+            self._stacks.clear()
+        return self
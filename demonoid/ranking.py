@@ -0,0 +1,140 @@
+import heapq
+from itertools import islice
+
+from .constants import SortBy
+
+
+# numeric Torrent fields and the server sort orders listing torrents by them
+FIELDS = {
+    'times_completed': SortBy.COMPLETED,
+    'leechers': SortBy.LEECHERS,
+    'seeders': SortBy.SEEDERS,
+    'size_in_bytes': SortBy.SIZE,
+}
+
+
+def field_key(field, largest=True):
+    """
+    Gives the key sorting torrents by a numeric `field`, largest first by default.
+    Torrents missing the field sort last either way.
+
+    :param str field: one of `FIELDS`
+    :param bool largest: if larger values come first
+    :rtype: callable
+    """
+    if field not in FIELDS:
+        raise ValueError('{0} is not a numeric field. The numeric fields are {1}'.format(field, ', '.join(sorted(FIELDS))))
+
+    def key(torrent):
+        value = getattr(torrent, field)
+        if value is None:
+            return (1, 0)
+        return (0, -value if largest else value)
+    return key
+
+
+def server_sort(field, largest=True):
+    """
+    Gives the `constants.SortBy` code of the server sort order listing torrents by `field`.
+
+    :param str field: one of `FIELDS`
+    :param bool largest: if larger values come first
+    :rtype: str
+    """
+    order = FIELDS[field]
+    return order.DESCENDING if largest else order.ASCENDING
+
+
+def is_server_sorted(source, field, largest=True):
+    """
+    Checks if `source` is a search that the server already sorts by `field`.
+
+    :param source: search or torrents
+    :param str field: one of `FIELDS`
+    :param bool largest: if larger values come first
+    :rtype: bool
+    """
+    from .structures import Search
+
+    return isinstance(source, Search) and source.sort == server_sort(field, largest)
+
+
+def stream(source):
+    """
+    Gives the torrents of `source` one at a time. Paginated sources are streamed page by page,
+    so they're fetched only as far as the stream is consumed.
+
+    :param source: `structures.Paginated` or any iterable of torrents
+    :rtype: iterator
+    """
+    iter_torrents = getattr(source, 'iter_torrents', None)
+    return iter_torrents() if iter_torrents is not None else iter(source)
+
+
+def top(source, k, field='seeders', largest=True):
+    """
+    Gives the `k` torrents of `source` with the largest (or smallest) `field`, keeping at most `k` torrents
+    in memory. Searches are ranked over all of their pages, without being changed. When the server can sort
+    a search by `field` (see `structures.Search.server_sorted`), only the first `k` torrents are fetched.
+
+    :param source: search or torrents
+    :param int k: count of torrents to give
+    :param str field: one of `FIELDS`
+    :param bool largest: if the largest values are wanted
+    :return: top torrents, best first
+    :rtype: list structures.Torrent
+    """
+    from .structures import Search
+
+    key = field_key(field, largest)
+    if isinstance(source, Search):
+        source = source.server_sorted(field, largest)
+        if is_server_sorted(source, field, largest):
+            return list(islice(stream(source), k))
+    return heapq.nsmallest(k, stream(source), key=key)
+
+
+def merge(streams, key):
+    """
+    K-way merges `streams`, each already sorted by `key`, into one stream sorted by `key`.
+    Only the head of every stream is held. Torrents with equal keys keep their stream order
+    and come stream by stream.
+
+    :param list iterator streams: sorted streams of torrents
+    :param callable key: sort key
+    :rtype: generator
+    """
+    heap = []
+    for index, torrents in enumerate(streams):
+        torrents = iter(torrents)
+        for torrent in torrents:
+            heap.append((key(torrent), index, torrent, torrents))
+            break
+    heapq.heapify(heap)
+    while heap:
+        _, index, torrent, torrents = heap[0]
+        yield torrent
+        for torrent in torrents:
+            heapq.heapreplace(heap, (key(torrent), index, torrent, torrents))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+def merge_sorted(sources, field='seeders', largest=True):
+    """
+    Merges `sources`, each sorted by `field`, into one stream sorted by `field`. Searches are merged as copies
+    switched to the server sort order of `field` and crawling every page, so every one of them is fetched
+    only as far as the merge is consumed. The searches themselves aren't changed.
+
+    :param list sources: searches or sorted torrents
+    :param str field: one of `FIELDS`
+    :param bool largest: if larger values come first
+    :rtype: generator
+    """
+    from .structures import Search
+
+    key = field_key(field, largest)
+    sources = [source.copy(sort=server_sort(field, largest)).make_multipage() if isinstance(source, Search) else source
+               for source in sources]
+    return merge([stream(source) for source in sources], key)
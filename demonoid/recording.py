@@ -0,0 +1,244 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from hashlib import sha1
+from threading import Lock
+from time import sleep as default_sleep
+
+from .exceptions import RecordingNotFoundException
+from .transports import RequestsTransport, Transport
+
+
+class Recording(object):
+    """
+       The Recording is a directory of recorded responses. Bodies are stored once per content, gzipped and named
+       by their SHA-1, so pages recorded under many urls with the same content cost a single file.
+       `index.jsonl` maps every request's full url to its response's status, headers and body digest. It's append-only,
+       a JSON line per saved response, so saving costs the same however long the recording is. A later line
+       of the same url replaces the earlier ones and a torn last line, left by a crash, is ignored.
+
+       :attr: INDEX_NAME is the file name of the index.
+       :attr: LEGACY_INDEX_NAME is the file name of the index of older recordings, a single JSON object.
+        It's still read, before `INDEX_NAME`.
+       :attr: SKIPPED_HEADERS are the headers not recorded, since bodies are recorded decoded.
+    """
+
+    INDEX_NAME = 'index.jsonl'
+    LEGACY_INDEX_NAME = 'index.json'
+    SKIPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+    def __init__(self, directory):
+        """
+        Creates a Recording instance, loading the index of `directory` if there's one.
+
+        :param str directory: directory holding the recording. It's created on the first save
+        """
+        self.directory = directory
+        self._lock = Lock()
+        self._index = {}
+        try:
+            with open(self._path(self.LEGACY_INDEX_NAME)) as index:
+                self._index.update(json.load(index))
+        except (IOError, OSError):
+            pass
+        try:
+            with open(self._path(self.INDEX_NAME), 'rb') as index:
+                for line in index:
+                    try:
+                        entry = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        continue
+                    self._index[entry.pop('url')] = entry
+        except (IOError, OSError):
+            pass
+
+    @staticmethod
+    def request_key(url, params=None):
+        """
+        Gives the full url of a request, with its params sorted, so equal requests get equal keys.
+
+        :param str url: requested url
+        :param params: query parameters
+        :type params: dict or None
+        :rtype: str
+        """
+        from requests import Request
+
+        return Request('GET', url, params=sorted((params or {}).items())).prepare().url
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def save(self, url, params, status_code, headers, content):
+        """
+        Records a response.
+
+        :param str url: requested url
+        :param params: query parameters
+        :type params: dict or None
+        :param int status_code: response status
+        :param headers: response headers
+        :type headers: dict
+        :param bytes content: decoded response body
+        :return: self
+        :rtype: Recording
+        """
+        digest = sha1(content).hexdigest()
+        headers = dict((name, value) for name, value in headers.items() if name.lower() not in self.SKIPPED_HEADERS)
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            body_path = self._path(digest + '.gz')
+            if not os.path.exists(body_path):
+                self._write(body_path, self._gzip(content))
+            key = self.request_key(url, params)
+            entry = {'status_code': status_code, 'headers': headers, 'body': digest}
+            with open(self._path(self.INDEX_NAME), 'ab') as index:
+                index.write(json.dumps(dict(entry, url=key), sort_keys=True).encode('utf-8') + b'\n')
+            self._index[key] = entry
+        return self
+
+    def load(self, url, params=None):
+        """
+        Gives a recorded response.
+
+        :param str url: requested url
+        :param params: query parameters
+        :type params: dict or None
+        :return: status, headers and decoded body of the response or None if it wasn't recorded
+        :rtype: tuple or None
+        """
+        entry = self._index.get(self.request_key(url, params))
+        if entry is None:
+            return None
+        with gzip.open(self._path(entry['body'] + '.gz'), 'rb') as body:
+            content = body.read()
+        return entry['status_code'], entry['headers'], content
+
+    @staticmethod
+    def _gzip(content):
+        from io import BytesIO
+
+        buffer = BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as compressed:
+            compressed.write(content)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _write(path, data):
+        # written aside, then renamed, so a crash never leaves a truncated file
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as temporary:
+            temporary.write(data)
+        getattr(os, 'replace', os.rename)(temporary_path, path)
+
+    def __contains__(self, url):
+        return url in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+
+class RecordingTransport(Transport):
+    """
+       The RecordingTransport makes requests through another transport and records their responses in a `Recording`.
+       304 Not Modified responses aren't recorded, since they'd replace the recorded page with an empty one.
+    """
+
+    def __init__(self, directory, transport=None):
+        """
+        Creates a RecordingTransport instance.
+
+        :param str directory: directory of the recording
+        :param transport: transport making the requests. Default is a new `transports.RequestsTransport`
+        :type transport: transports.Transport or None
+        """
+        self.recording = Recording(directory)
+        self.transport = transport or RequestsTransport()
+
+    def get(self, url, params=None, headers=None, stream=False):
+        response = self.transport.get(url, params=params, headers=headers)
+        if response.status_code != 304:
+            self.recording.save(url, params, response.status_code, response.headers, response.content)
+        return response
+
+    def raise_for_status(self, response):
+        self.transport.raise_for_status(response)
+
+    def wire_bytes(self, response):
+        return self.transport.wire_bytes(response)
+
+    def close(self):
+        self.transport.close()
+
+
+class CachingTransport(RecordingTransport):
+    """
+       The CachingTransport serves responses recorded in a `Recording` and requests and records the others,
+       so a crawl run again (or resumed) doesn't request the pages it already has. Only 200 OK responses are recorded.
+       Recorded pages never expire, so a recording is meant for a single crawl.
+    """
+
+    def get(self, url, params=None, headers=None, stream=False):
+        recorded = self.recording.load(url, params)
+        if recorded is not None:
+            status_code, recorded_headers, content = recorded
+            return ReplayTransport.build_response(Recording.request_key(url, params), status_code, recorded_headers, content)
+        response = self.transport.get(url, params=params, headers=headers)
+        if response.status_code == 200:
+            self.recording.save(url, params, response.status_code, response.headers, response.content)
+        return response
+
+
+class ReplayTransport(Transport):
+    """
+       The ReplayTransport serves the responses of a `Recording` without any network, for reproducible tests
+       and benchmarks. Every response waits `latency` seconds, then its body's size divided by `bandwidth`.
+       Conditional request headers are ignored, so recorded pages are always served whole.
+    """
+
+    def __init__(self, directory, latency=0, bandwidth=None, sleep=None):
+        """
+        Creates a ReplayTransport instance.
+
+        :param str directory: directory of the recording
+        :param latency: simulated seconds until the response's headers
+        :type latency: int or float
+        :param bandwidth: simulated bytes per second of the body download. Default is no limit
+        :type bandwidth: int or float or None
+        :param sleep: Callable waiting the given seconds. Default is `time.sleep`
+        :type sleep: callable or None
+        """
+        self.recording = Recording(directory)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._sleep = sleep or default_sleep
+
+    def get(self, url, params=None, headers=None, stream=False):
+        recorded = self.recording.load(url, params)
+        if recorded is None:
+            raise RecordingNotFoundException('No response is recorded for {0}'.format(Recording.request_key(url, params)))
+        status_code, recorded_headers, content = recorded
+        delay = self.latency + (len(content) / float(self.bandwidth) if self.bandwidth else 0)
+        if delay:
+            self._sleep(delay)
+        return self.build_response(Recording.request_key(url, params), status_code, recorded_headers, content, self.latency)
+
+    @staticmethod
+    def build_response(url, status_code, headers, content, latency=0):
+        """
+        Builds a `requests` response, as a real request would give.
+
+        :rtype: requests.models.Response
+        """
+        from requests.models import Response
+        from requests.structures import CaseInsensitiveDict
+
+        response = Response()
+        response.url = url
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.elapsed = timedelta(seconds=latency)
+        return response
@@ -0,0 +1,124 @@
+from multiprocessing.pool import ThreadPool
+
+from requests import RequestException, Session
+
+from .cache import TTLCache
+
+
+class Resolver(object):
+    """
+       The Resolver follows the redirect hops behind torrent download links and gives their final targets.
+       Links are resolved concurrently in a thread pool, with HEAD requests where the server allows them,
+       and the final targets are cached per source link for `ttl` seconds.
+
+       :attr: DEFAULT_TTL is the default time to live in seconds of a resolved link.
+       :attr: DEFAULT_POOL_SIZE is the default maximum of concurrently resolved links.
+       :attr: DEFAULT_TIMEOUT is the default timeout in seconds of every hop request.
+       :attr: HEAD_UNSUPPORTED_STATUS_CODES are the status codes on which a HEAD request is retried with a streamed GET request.
+       :attr: RESOLVABLE_PREFIXES are the link prefixes that are followed. Any other link (as magnet links) is already final.
+    """
+
+    DEFAULT_TTL = 60 * 60
+    DEFAULT_POOL_SIZE = 8
+    DEFAULT_TIMEOUT = 10
+    HEAD_UNSUPPORTED_STATUS_CODES = (405, 501)
+    RESOLVABLE_PREFIXES = ('http://', 'https://')
+
+    def __init__(self, session=None, pool_size=None, ttl=DEFAULT_TTL, timeout=None):
+        """
+        Creates a Resolver instance.
+
+        :param session: The session used to make the hop requests. Default is a new `requests.Session`
+        :type session: requests.Session or None
+        :param pool_size: Maximum of concurrently resolved links. Default is Resolver.DEFAULT_POOL_SIZE
+        :type pool_size: int or None
+        :param ttl: Seconds a resolved link stays cached. None caches resolved links forever.
+        :type ttl: int or None
+        :param timeout: Timeout in seconds of every hop request. Default is Resolver.DEFAULT_TIMEOUT
+        :type timeout: int or float or None
+        """
+        self._session = session or Session()
+        self.pool_size = pool_size or self.DEFAULT_POOL_SIZE
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self._cache = TTLCache(ttl)
+
+    def is_resolvable(self, link):
+        """
+        Checks if `link` is worth following. Empty links and non-HTTP links as magnet links are already final.
+
+        :param str link: link to check
+        :rtype: bool
+        """
+        return bool(link) and link.startswith(self.RESOLVABLE_PREFIXES)
+
+    def resolve(self, link):
+        """
+        Gives the final target of `link` after following all its redirect hops.
+        If a hop fails, `link` itself is given back and it's not cached, so it's retried on the next call.
+
+        :param str link: link to resolve
+        :return: final target of `link`
+        :rtype: str
+        """
+        if not self.is_resolvable(link):
+            return link
+        target = self._cache.get(link)
+        if target is None:
+            try:
+                target = self._follow(link)
+            except RequestException:
+                return link
+            self._cache.set(link, target)
+        return target
+
+    def resolve_all(self, links):
+        """
+        Resolves all given `links` concurrently, each unique link at most once.
+
+        :param list str links: links to resolve
+        :return: final targets in the same order as `links`
+        :rtype: list str
+        """
+        pending = []
+        for link in links:
+            if self.is_resolvable(link) and link not in pending and link not in self._cache:
+                pending.append(link)
+
+        resolved = {}
+        if len(pending) == 1:
+            resolved[pending[0]] = self.resolve(pending[0])
+        elif pending:
+            pool = ThreadPool(min(self.pool_size, len(pending)))
+            try:
+                resolved = dict(zip(pending, pool.map(self.resolve, pending)))
+            finally:
+                pool.close()
+                pool.join()
+        return [resolved[link] if link in resolved else self.resolve(link) for link in links]
+
+    def resolve_torrents(self, torrents):
+        """
+        Resolves the torrent links of all given `torrents` (as a whole page of a `List`) in one call.
+
+        :param torrents: torrents whose `torrent_link` to resolve
+        :type torrents: list structures.Torrent or structures.List
+        :return: final targets in the same order as `torrents`
+        :rtype: list str
+        """
+        return self.resolve_all([torrent.torrent_link for torrent in torrents])
+
+    def _follow(self, link):
+        """
+        Follows the redirect hops of `link`. Tries a HEAD request first and falls back to a streamed GET request,
+        whose body is never downloaded, if the server doesn't support HEAD.
+
+        :param str link: link to follow
+        :return: the url of the last hop
+        :rtype: str
+        """
+        response = self._session.head(link, allow_redirects=True, timeout=self.timeout)
+        if response.status_code in self.HEAD_UNSUPPORTED_STATUS_CODES:
+            response = self._session.get(link, allow_redirects=True, stream=True, timeout=self.timeout)
+            response.close()
+        response.raise_for_status()
+        return response.url
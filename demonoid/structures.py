@@ -1,9 +1,16 @@
-import json
-import sys
+from collections import deque
+from itertools import count, islice
+from threading import Lock, Thread
 
 from .exceptions import HeadReachedException, InvalidSearchParameterException
+from .checkpoints import CheckpointLog
 from .constants import Category, SortBy, Language, State, TrackedBy, Quality
+from .dedup import Deduplicator
+from .layouts import detect_layout
 from .parser import Parser
+from .planner import QueryPlan
+from .profiling import Profiler
+from .ranking import field_key, is_server_sorted, server_sort
 from .urls import Url
 
 
@@ -39,6 +46,10 @@ class Torrent(object):
         self._files = None
         self._comments = None
 
+    @property
+    def size_in_bytes(self):
+        return Parser.parse_size(self.size)
+
     @property
     def datetime(self):
         # exact date and time
@@ -61,57 +72,181 @@ class Torrent(object):
         return '{0} by {1}'.format(self.title, self.user)
 
 
+class RowError(object):
+
+    def __init__(self, exception, html, date=None, page=None):
+        self.exception = exception
+        self.html = html  # raw HTML of the torrent's rows
+        self.date = date
+        self.page = page
+
+    def __repr__(self):
+        return 'Row error on page {0}: {1!r}'.format(self.page, self.exception)
+
+
 class List(object):
     base_path = ''
 
-    def __init__(self, url):
+    def __init__(self, url, profiler=None, tolerant=None):
         url.path = self.base_path
         self._url = url
         self._torrents = None
+        self._profiler = profiler
+        # tolerant lists skip the rows they fail to parse and report them in `errors`
+        self.tolerant = tolerant or False
+        self.errors = []
+        # threads reading `items` at once wait for a single fetch
+        self._lock = Lock()
 
     @property
     def items(self):
         if self._torrents is None:
-            self._update_torrents()
+            with self._lock:
+                if self._torrents is None:
+                    self._update_torrents()
         return self._torrents
 
     def _update_torrents(self):
-        rows = Parser.get_torrents_rows(self._url.DOM)
-        self._torrents = self._build_torrents(rows)
+        self.errors = []
+        self._torrents = self._fetch_torrents()
         return self
 
+    def _fetch_torrents(self, url=None, coalesce=True):
+        # every fetch is made with its own snapshot of the url, so lists can be read from many threads
+        url = url or self._url.snapshot()
+        if coalesce and url.single_flight is not None:
+            # identical loads in flight share one request and parse, and the row errors of tolerant ones
+            (torrents, errors), shared = url.single_flight.do((url.cache_key, self.tolerant),
+                                                              lambda: self._load_torrents(url))
+            if shared:
+                url.metrics.increment('fetch.coalesced')
+                self.errors.extend(errors)
+            return list(torrents)
+        if self._profiler is None:
+            return self._parse_page(url)
+        with self._profiler:
+            return self._parse_page(url)
+
+    def _load_torrents(self, url):
+        # a page's torrents and the row errors added while it was loaded
+        errors = len(self.errors)
+        torrents = self._fetch_torrents(url, coalesce=False)
+        return torrents, self.errors[errors:]
+
+    def _parse_page(self, url):
+        # build plain torrents, then let go of the page's tree. A page not modified has none to request again
+        dom = None if url.not_modified else url.DOM
+        url.release_DOM()
+        cached_page = url.cached_page
+        if url.not_modified:
+            return list(cached_page.parsed)
+        metrics = url.metrics
+        with metrics.timer('parser.layout'):
+            layout = detect_layout(dom)
+        if layout is None:
+            self._cache_page(url, None, ())
+            return []
+        with metrics.timer('parser.rows'):
+            rows = layout.get_rows(dom)
+        metrics.increment('parser.rows', len(rows))
+        digest = None
+        if cached_page is not None:
+            # rows are cleared while torrents are built, so they're digested first
+            digest = layout.digest(rows)
+            if digest == cached_page.digest and cached_page.parsed is not None:
+                metrics.increment('parser.unchanged')
+                cached_page.store(url.validators, digest, cached_page.parsed)
+                url.page_cache.record('unchanged')
+                return list(cached_page.parsed)
+        errors = len(self.errors)
+        torrents = self._build_torrents(rows, layout, url)
+        metrics.increment('parser.torrents', len(torrents))
+        # a tolerant list's partial torrents aren't what a strict list would get from the page
+        if len(self.errors) == errors:
+            self._cache_page(url, digest, torrents)
+        return torrents
+
+    @staticmethod
+    def _cache_page(url, digest, torrents):
+        # the page's validators are only stored with what was parsed from it
+        cached_page = url.cached_page
+        if cached_page is None:
+            return
+        cached_page.store(url.validators, digest, torrents)
+        url.page_cache.record('parsed')
+
     def __iter__(self):
         return iter(self.items)
 
-    def _build_torrents(self, rows):
+    def _build_torrents(self, rows, layout, url):
         torrents = []
-        current_date = None
-        torrent_info = []  # 2 rows hold info about 1 torrent
-        for row in rows:
-            date_td = Parser.get_date_td(row)
-            if date_td:
-                current_date = Parser.parse_date(date_td)
-            elif len(torrent_info) < 2:
-                torrent_info.append(row)
-            else:
-                torrent = self._build_torrent(torrent_info, current_date)
-                torrents.append(torrent)
-                torrent_info = []
+        timer = url.metrics.timer('parser.row')
+        date_errors = []
+        if self.tolerant:
+            # a malformed date row is reported, then costs the torrents dated by it
+            def on_date_error(exception, row):
+                date_errors.append(exception)
+                self._add_error(exception, [row], None, url)
+
+            groups = layout.group_rows(rows, on_date_error)
+        else:
+            groups = layout.group_rows(rows)
+        for date, torrent_rows in groups:
+            try:
+                if date is None and date_errors:
+                    raise ValueError("The torrent's date row couldn't be parsed: {0}".format(date_errors[-1]))
+                with timer:
+                    torrent = self._build_torrent(torrent_rows, date, layout, url)
+            except Exception as exception:
+                if not self.tolerant:
+                    raise
+                # a malformed row costs only its torrent
+                self._add_error(exception, torrent_rows, date, url)
+                continue
+            torrents.append(torrent)
         return torrents
 
-    def _build_torrent(self, rows, date):
-        first_row_args = Parser.parse_first_row(rows[0])
-        second_row_args = Parser.parse_second_row(rows[1])
-        args = [date] + first_row_args + second_row_args
+    def _add_error(self, exception, rows, date, url):
+        from lxml import html
+
+        raw_html = ''.join(html.tostring(row, encoding='unicode') for row in rows)
+        self.errors.append(RowError(exception, raw_html, date, url.params.get('page')))
+        url.metrics.increment('parser.errors')
+
+    def _build_torrent(self, rows, date, layout, url):
+        args = [date] + layout.parse_torrent(rows, url)
         return Torrent(*args)
 
 
 class Paginated(List):
 
-    def __init__(self, url, page=None, multipage=None):
-        super(Paginated, self).__init__(url)
+    def __init__(self, url, page=None, multipage=None, bounded=None, profiler=None, tolerant=None, dedupe=None,
+                 checkpoint=None):
+        super(Paginated, self).__init__(url, profiler, tolerant)
         self._url.params['page'] = page or 1
+        # pages given by `page_at` and `pages`, per number
+        self._pages = {}
+        self._pages_lock = Lock()
+        # the count of pages and of torrents, kept once discovered
+        self._page_count = None
+        self._total = None
+        self._count_lock = Lock()
         self.multipage = multipage or False
+        # bounded lists stream their torrents page by page and never keep them
+        self.bounded = bounded or False
+        # a CheckpointLog (or its path) logs finished pages, so an interrupted crawl resumes where it stopped
+        if checkpoint is not None and not isinstance(checkpoint, CheckpointLog):
+            checkpoint = CheckpointLog(checkpoint)
+        self.checkpoint = checkpoint
+        # checkpointed crawls dedupe unless told not to, since pages shift while a crawl is stopped
+        if dedupe is None and checkpoint is not None:
+            dedupe = True
+        # True dedupes every crawl with a new Deduplicator. A Deduplicator instance, as one with a Bloom filter,
+        # is shared by every crawl of the list, so torrents seen once are never given again
+        self._fresh_deduplicator = dedupe is True
+        if dedupe is True:
+            dedupe = Deduplicator()
+        self.deduplicator = dedupe or None
 
     @property
     def _page(self):
@@ -120,21 +255,68 @@ class Paginated(List):
     @property
     def items(self):
         if self._torrents is None:
-            self._update_torrents()
-            if self.multipage:
-                while True:
-                    self.next()
-                    self._url.update_DOM()
-                    new_torrents = Parser.get_torrents_rows(self._url.DOM)
-                    if not new_torrents:
-                        break
-                    self._torrents.extend(new_torrents)
+            with self._lock:
+                if self._torrents is None:
+                    self._torrents = list(self.iter_torrents())
         return self._torrents
 
+    def __iter__(self):
+        if self.bounded:
+            return self.iter_torrents()
+        return super(Paginated, self).__iter__()
+
+    def iter_torrents(self):
+        # one page in memory at a time. Multipage streams until an empty page.
+        # Pages are fetched with snapshots of the url, so iterating never changes the list and can run in many threads
+        page = self.page
+        self.errors = []
+        deduplicator = self.deduplicator
+        if self._fresh_deduplicator:
+            # `deduplicator` is the one of the latest crawl, for its counts
+            deduplicator = self.deduplicator = Deduplicator()
+        if self.checkpoint is not None:
+            last_page = self.checkpoint.open(self._checkpoint_crawl())
+            if last_page is not None:
+                # committed pages are given again from the log, then the crawl goes on
+                for _, torrents in self.checkpoint.pages():
+                    for torrent in self._dedupe(torrents, deduplicator):
+                        yield torrent
+                if self.checkpoint.done or not self.multipage:
+                    return
+                # deduplicated crawls fetch the last page again, in case torrents shifted to it meanwhile
+                page = last_page if deduplicator is not None else last_page + 1
+        while True:
+            torrents = self._fetch_torrents(self._url.snapshot(page=page))
+            if self.checkpoint is not None:
+                self.checkpoint.append(page, torrents)
+            page_size = len(torrents)
+            for torrent in self._dedupe(torrents, deduplicator):
+                yield torrent
+            # a page of duplicates only isn't the end, an empty page is
+            if not self.multipage or not page_size:
+                break
+            page += 1
+
+    def _dedupe(self, torrents, deduplicator):
+        if deduplicator is None:
+            return torrents
+        unique = deduplicator.filter_page(torrents)
+        self._url.metrics.increment('dedup.duplicates', len(torrents) - len(unique))
+        return unique
+
+    def _checkpoint_crawl(self):
+        # the crawl's url and params, but the page, identify its checkpoint log
+        url, params = self._url.cache_key
+        return [url, [list(param) for param in params if param[0] != 'page']]
+
     def make_multipage(self):
         self.multipage = True
         return self
 
+    def make_bounded(self):
+        self.bounded = True
+        return self
+
     @property
     def page(self):
         return self._url.params['page']
@@ -144,17 +326,241 @@ class Paginated(List):
         if not isinstance(value, int):
             value = int(value)
         self._url.params['page'] = value
+        # `items` are the torrents of the new page
+        self._torrents = None
 
     def next(self):
-        self.page(self.page + 1)
+        self.page = self.page + 1
         return self
 
     def previous(self):
         if self.page <= 1:
             raise HeadReachedException('Reached head of paginated list. Can\'t go to previous.')
-        self.page(self.page - 1)
+        self.page = self.page - 1
+        return self
+
+    def page_at(self, number, keep=True):
+        """
+        Gives page `number` of the list. It's fetched when its torrents are first read (or prefetched), then kept,
+        so jumping to a page costs a single request and reading it again costs none.
+
+        :param int number: page number, starting at 1
+        :param bool keep: if the page is kept for the next calls. Unkept pages are freed once unused,
+            but a page kept before is still given
+        :rtype: Page
+        """
+        if number < 1:
+            raise HeadReachedException('Page {0} is before the head of paginated list.'.format(number))
+        with self._pages_lock:
+            page = self._pages.get(number)
+            if page is None:
+                page = Page(self, number)
+                if keep:
+                    self._pages[number] = page
+        return page
+
+    def pages(self, numbers=None, prefetch=None, keep=True):
+        """
+        Gives pages in the order of `numbers`, as `reversed(range(1, 11))` from the 10th back to the 1st.
+        Without `numbers`, pages are given from the current one until an empty page, which isn't given.
+        Torrents aren't deduplicated across pages, `unique` does it.
+        Crawls of every page should pass `keep=False`, so only the given page and the prefetched ones are in memory.
+
+        :param numbers: page numbers. Default is every page from `self.page`
+        :type numbers: iterable or None
+        :param prefetch: count of pages fetched in the background ahead of the given one. Default is none
+        :type prefetch: int or None
+        :param bool keep: if pages are kept for `page_at`
+        :rtype: generator
+        """
+        until_empty = numbers is None
+        numbers = count(self.page) if until_empty else iter(numbers)
+        ahead = deque(self.page_at(number, keep).prefetch() for number in islice(numbers, prefetch or 0))
+        while True:
+            if ahead:
+                page = ahead.popleft()
+            else:
+                number = next(numbers, None)
+                if number is None:
+                    return
+                page = self.page_at(number, keep)
+            if prefetch:
+                number = next(numbers, None)
+                if number is not None:
+                    ahead.append(self.page_at(number, keep).prefetch())
+            if until_empty and not page.torrents:
+                return
+            yield page
+
+    def unique(self, torrents):
+        """
+        Gives the torrents of `torrents` not seen before by the list's deduplicator, in order, so pages given by
+        `pages` are deduplicated as crawls are. Without a deduplicator, every torrent is given.
+
+        :param list torrents: torrents of a page
+        :rtype: list
+        """
+        return self._dedupe(torrents, self.deduplicator)
+
+    def page_count(self):
+        """
+        Gives the count of pages of the list, counted from page 1 whatever `self.page`, so they can be fetched
+        in parallel right away, as `pages(range(1, count + 1), prefetch=8)`.
+        It's worked out from the items total and page size the first page's pagination shows, costing one request.
+        Without them, pages are probed from the last page linked (or the first one): the probed step is doubled
+        until an empty page, then the last non-empty page is binary searched, costing about 2 log2(count) requests.
+        A last linked page emptied since is searched down from instead.
+        The first page is kept for `page_at`, probed pages aren't. The count is kept until the search criteria change.
+
+        :return: count of non-empty pages
+        :rtype: int
+        """
+        if self._page_count is None:
+            with self._count_lock:
+                if self._page_count is None:
+                    self._count_pages()
+        return self._page_count
+
+    def total_estimate(self):
+        """
+        Gives the count of torrents of the list: the items total the first page's pagination shows or,
+        without it, the first page's size for every page but the last one, plus the last page's size.
+        It's an estimate, as torrents are added while a list is crawled and deduplication isn't accounted.
+
+        :rtype: int
+        """
+        self.page_count()
+        return self._total
+
+    def _count_pages(self):
+        # the first page's tree is read for its pagination before it's parsed
+        url = self._url.snapshot(page=1)
+        dom = url.DOM
+        last_page, page_size, total = Parser.parse_pagination(dom) if dom is not None else (None, None, None)
+        torrents = self.page_at(1).seed(self._fetch_torrents(url)).torrents
+        if not torrents:
+            page_count, total = 0, 0
+        elif total and page_size:
+            page_count = -(-total // page_size)
+        else:
+            page_count, last_size = self._probe_pages(last_page or 1)
+            total = (page_count - 1) * len(torrents) + last_size
+        # the total is set first, as the count is read without the lock
+        self._total = total
+        self._page_count = page_count
+
+    def _probe_pages(self, start):
+        # page 1 isn't empty. From a non-empty `start`, steps double until a page is, and an empty `start`
+        # (emptied since it was linked) is searched down from. Then the gap is halved
+        sizes = {}
+
+        def probe(number):
+            sizes[number] = len(self.page_at(number, keep=False))
+            return sizes[number]
+
+        if probe(start):
+            last_full, step = start, 1
+            while probe(last_full + step):
+                last_full += step
+                step *= 2
+            first_empty = last_full + step
+        else:
+            last_full, first_empty = 1, start
+        while first_empty - last_full > 1:
+            middle = (last_full + first_empty) // 2
+            if probe(middle):
+                last_full = middle
+            else:
+                first_empty = middle
+        return last_full, sizes.get(last_full) or probe(last_full)
+
+    def _forget_pages(self):
+        # items, pages and counts belong to the criteria they were fetched with
+        with self._pages_lock:
+            self._pages = {}
+        self._page_count = self._total = None
+        self._torrents = None
+
+    def _fetch_page(self, number):
+        return self._fetch_torrents(self._url.snapshot(page=number))
+
+
+class Page(object):
+    """
+       The Page is a page of a `Paginated` list. Its torrents are fetched on first read, or in the background
+       when it's prefetched, and kept. Reading a page while its prefetch is running waits for it.
+    """
+
+    def __init__(self, paginated, number):
+        self.paginated = paginated
+        self.number = number
+        self._torrents = None
+        self._prefetching = False
+        self._lock = Lock()
+
+    @property
+    def torrents(self):
+        if self._torrents is None:
+            with self._lock:
+                if self._torrents is None:
+                    self._torrents = self.paginated._fetch_page(self.number)
+        return self._torrents
+
+    @property
+    def fetched(self):
+        return self._torrents is not None
+
+    def seed(self, torrents):
+        """
+        Sets the page's torrents, fetched by other means, unless it's fetched already.
+
+        :param list torrents: torrents of the page
+        :return: self
+        :rtype: Page
+        """
+        with self._lock:
+            if self._torrents is None:
+                self._torrents = torrents
+        return self
+
+    def prefetch(self):
+        """
+        Starts fetching the page in a background thread, unless it's fetched or being fetched.
+        A failed prefetch is retried, and raises, when the torrents are read.
+
+        :return: self
+        :rtype: Page
+        """
+        if self._torrents is None and not self._prefetching:
+            self._prefetching = True
+            thread = Thread(target=self._prefetch)
+            thread.daemon = True
+            thread.start()
         return self
 
+    def _prefetch(self):
+        try:
+            self.torrents
+        except Exception:
+            pass
+        finally:
+            self._prefetching = False
+
+    def next(self):
+        return self.paginated.page_at(self.number + 1)
+
+    def previous(self):
+        return self.paginated.page_at(self.number - 1)
+
+    def __iter__(self):
+        return iter(self.torrents)
+
+    def __len__(self):
+        return len(self.torrents)
+
+    def __repr__(self):
+        return 'Page {0}'.format(self.number)
+
 
 class Search(Paginated):
     base_path = '/files'
@@ -163,12 +569,46 @@ class Search(Paginated):
         url = kwargs.pop('url')
         page = kwargs.pop('page', None)
         multipage = kwargs.pop('multipage', None)
-        super(Search, self).__init__(url, page, multipage)
-        self.modify(kwargs)
+        bounded = kwargs.pop('bounded', None)
+        profiler = kwargs.pop('profiler', None)
+        tolerant = kwargs.pop('tolerant', None)
+        dedupe = kwargs.pop('dedupe', None)
+        checkpoint = kwargs.pop('checkpoint', None)
+        super(Search, self).__init__(url, page, multipage, bounded, profiler, tolerant, dedupe, checkpoint)
+        self.modify(**kwargs)
 
     def modify(self, **params):
         self._validate_params(params)
         self._url.params.update(params)
+        self._forget_pages()
+
+    def copy(self, **params):
+        """
+        Gives a new search with the criteria and options of this one, its criteria updated with `params`.
+        The copy can be changed and crawled without changing this search. Its checkpoint isn't copied.
+
+        :param params: search criteria to change in the copy
+        :rtype: Search
+        """
+        dedupe = True if self._fresh_deduplicator else self.deduplicator
+        search = Search(url=self._url.snapshot(), page=self.page, multipage=self.multipage, bounded=self.bounded,
+                        profiler=self._profiler, tolerant=self.tolerant, dedupe=dedupe)
+        search.modify(**params)
+        return search
+
+    def server_sorted(self, field, largest=True):
+        """
+        Gives a copy of this search that the server sorts by a numeric `field`, as `use_server_sort` would,
+        leaving this search as is. The copy crawls every page, as queries over `field` need the whole list.
+        Check the copy with `ranking.is_server_sorted`, since a search sorted otherwise keeps its order.
+
+        :param str field: numeric torrent field
+        :param bool largest: if larger values come first
+        :rtype: Search
+        """
+        search = self.copy().make_multipage()
+        search.use_server_sort(field, largest)
+        return search
 
     def _validate_params(self, params):
         valid_params = ('query', 'category', 'subcategory', 'quality',
@@ -177,8 +617,8 @@ class Search(Paginated):
             if param not in valid_params:
                 name = params[param]
                 valid_params_names = ','.join(valid_params)
-                raise InvalidSearchParameterException('{} is not a valid search criteria. \
-                                              The valid parameters are {1}'.format(name, valid_params_names))
+                raise InvalidSearchParameterException('{0} is not a valid search criteria. '
+                                                      'The valid parameters are {1}'.format(name, valid_params_names))
 
     @property
     def query(self):
@@ -187,18 +627,95 @@ class Search(Paginated):
     @query.setter
     def query(self, value):
         self._url.params['query'] = value
+        self._forget_pages()
 
-    # TO-DO. Needs update in Constants type and Torrent members, before it's possible.
-    def filter(self, **params):
-        self._validate_search_params(params)
-        raise NotImplementedError
+    @property
+    def sort(self):
+        return self._url.params.get('sort', SortBy.DATE)
+
+    @sort.setter
+    def sort(self, value):
+        self._url.params['sort'] = value
+        self._forget_pages()
+
+    def use_server_sort(self, field, largest=True):
+        """
+        Lets the server sort by a numeric `field` (one of `ranking.FIELDS`), unless the search is sorted otherwise.
+        Searches sorted by date, the default, are switched to the matching `constants.SortBy` order.
+        This changes the search. `server_sorted` gives a switched copy instead.
+
+        :param str field: numeric torrent field
+        :param bool largest: if larger values come first
+        :return: if the server sorts by `field` in the wanted direction
+        :rtype: bool
+        """
+        order = server_sort(field, largest)
+        if self.sort == SortBy.DATE:
+            self.sort = order
+        return self.sort == order
+
+    def filter(self, field, minimum=None, maximum=None):
+        """
+        Streams the torrents whose numeric `field` is within `minimum` and `maximum`, as seeders >= 100,
+        from every page of the search, which is left as is.
+        When the server can sort by `field` (see `Search.server_sorted`), pages are fetched only until
+        the sorted values cross the threshold. Otherwise every page is fetched and filtered.
+
+        :param str field: numeric torrent field, one of `ranking.FIELDS`
+        :param minimum: smallest accepted value
+        :type minimum: int or None
+        :param maximum: largest accepted value
+        :type maximum: int or None
+        :rtype: iterator
+        """
+        field_key(field)  # validates `field` before streaming
+        # descending order ends at the minimum, ascending one at the maximum
+        largest = minimum is not None or maximum is None
+        search = self.server_sorted(field, largest)
+        return search._filter(field, minimum, maximum, largest, is_server_sorted(search, field, largest))
+
+    def _filter(self, field, minimum, maximum, largest, sorted_by_server):
+        for torrent in self.iter_torrents():
+            value = getattr(torrent, field)
+            if value is None:
+                continue
+            if minimum is not None and value < minimum:
+                if sorted_by_server and largest:
+                    return
+                continue
+            if maximum is not None and value > maximum:
+                if sorted_by_server and not largest:
+                    return
+                continue
+            yield torrent
 
 
 class Demonoid(object):
 
-    def __init__(self, base_url=None):
-        self.url = Url(base_url)
+    def __init__(self, base_url=None, metrics=None, profile=None, page_cache=None, transport=None, single_flight=None):
+        # a page cache is shared by all searches, so repeated polls of a page are conditional
+        self.url = Url(base_url, metrics=metrics, page_cache=page_cache, transport=transport, single_flight=single_flight)
+        # and so is a single flight, so identical searches made at once share their pages
+        # the transport is shared too, so searches made from many threads share its connections
+        self.transport = self.url.transport
+        # True profiles with a new Profiler, a Profiler instance is shared with other crawls
+        if profile is True:
+            profile = Profiler()
+        self.profiler = profile or None
 
     def search(self, **kwargs):
+        kwargs.setdefault('url', Url(self.url.base_url, metrics=self.url.metrics, page_cache=self.url.page_cache,
+                                     transport=self.transport, single_flight=self.url.single_flight))
+        kwargs.setdefault('profiler', self.profiler)
         search = Search(**kwargs)
         return search
+
+    @property
+    def stats(self):
+        # how pages were loaded through the page cache, with its hit rate
+        if self.url.page_cache is None:
+            return {}
+        return self.url.page_cache.stats
+
+    def plan(self, concurrency=None, dedupe=None, **kwargs):
+        return QueryPlan(self, concurrency, dedupe, **kwargs)
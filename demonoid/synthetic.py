@@ -0,0 +1,352 @@
+from __future__ import unicode_literals
+
+from datetime import date, timedelta
+from random import Random
+from threading import Lock, Thread
+from time import sleep
+
+try:
+    from urllib.parse import parse_qs, urlparse
+except ImportError:
+    from urlparse import parse_qs, urlparse
+
+
+PAGE_TEMPLATE = '''<html>
+<head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"><title>Demonoid - Files</title></head>
+<body>
+<div id="fslispc3"><center><table><tr><td>
+<div id="fslispc"><table><tr><td>
+<table><tr><td>Menu</td></tr></table>
+<table><tr><td><a href="{spam_url}" target="_blank">Sponsored</a></td></tr></table>
+<table><tr><td>Search</td></tr></table>
+<table><tr><td>Filters</td></tr></table>
+<table><tr><td>News</td></tr></table>
+<table><tr><td><table>
+<tr align="right"><td colspan="9" class="tone_3_bl">Sort by:</td></tr>
+<tr align="center"><td colspan="9" class="tone_3_bl">{navigation}</td></tr>
+<tr align="center"><td colspan="9" class="tone_2_bl">{pagination}</td></tr>
+<tr align="center"><td class="torrent_header_2">Category</td><td align="left" class="torrent_header_1" width="100%">Name</td>
+<td class="torrent_header_2">Owner</td><td class="torrent_header_1">Download</td><td class="torrent_header_2">Size</td>
+<td class="torrent_header_1">Comments</td><td class="torrent_header_2">Times completed</td>
+<td class="torrent_header_1">Seeders</td><td class="torrent_header_2">Leechers</td></tr>
+{rows}
+<tr><td colspan="9" align="center" class="tone_2_bl">{pagination}</td></tr>
+<tr><td colspan="9" align="center">{navigation}</td></tr>
+<tr align="right"><td colspan="9" class="tone_3_bl">Sort by:</td></tr>
+</table></td></tr></table>
+</td></tr></table></div>
+</td></tr></table></center></div>
+</body>
+</html>
+'''
+
+EMPTY_ROWS = '<tr><td colspan="9" class="tone_1_pad">No torrents found</td></tr>'
+
+DATE_ROW = '<tr align="left" bgcolor="#CCCCCC"><td colspan="9" class="added_today">{0}</td></tr>\n'
+
+FIRST_ROW = ('<tr><td rowspan="2" align="center" class="tone_2_bl"><a href="{category_url}">'
+             '<img src="/images/cats/{icon}.gif" height="30" alt="{category}" title="{category}" border="0"></a></td>'
+             '<td colspan="9" class="tone_1_pad"><a href="/files/details/{id}/">{title}</a>{external}</td></tr>\n')
+
+SECOND_ROW = ('<tr><td width="100%" class="tone_1_bl" align="left">{properties}&#160;</td>'
+              '<td nowrap class="tone_2_bl" align="left"><a href="/users/{user}" class="user">'
+              '<img src="/images/p.gif" alt="" width="2" height="1" border="0">{user}</a></td>'
+              '<td nowrap class="tone_1_bl" align="center">{spam}<a href="{torrent_link}">'
+              '<img src="/images/dmi.gif" width="31" height="16" alt="Download torrent" border="0"></a></td>'
+              '<td nowrap class="tone_2_bl" align="right">{size}</td>'
+              '<td nowrap class="tone_1_bl" align="center">{comments}</td>'
+              '<td nowrap class="tone_2_bl" align="center"><font class="blue">{times_completed}</font></td>'
+              '<td nowrap class="tone_1_bl" align="center"><font class="green">{seeders}</font></td>'
+              '<td nowrap class="tone_2_bl" align="center"><font class="red">{leechers}</font></td></tr>\n')
+
+FILTER_URL = ('/files/?uid=0&amp;category={category}&amp;subcategory={subcategory}&amp;language={language}'
+              '&amp;seeded=2&amp;quality={quality}&amp;query=&amp;sort=')
+
+PAGE_URL = ('/files/?to=0&amp;uid=0&amp;category=0&amp;subcategory=0&amp;language=0&amp;seeded=2&amp;quality=0'
+            '&amp;external=2&amp;query=&amp;sort=&amp;page={0}')
+
+SPAM_URL = 'https://dltags.com/?pubid=243320&amp;search={0}'
+
+# category id, icon, name and some of its subcategories as id and name
+CATEGORIES = (
+    (1, 'applications', 'Applications', ((5, 'Windows'), (6, 'Mac'), (7, 'Linux'))),
+    (3, 'movies', 'Movies', ((42, 'Action'), (43, 'Comedy'), (44, 'Drama'))),
+    (4, 'games', 'Games', ((17, 'PC'), (18, 'PlayStation'))),
+    (11, 'books', 'Books', ((137, 'Computers and Technology'), (138, 'Fiction'))),
+    (13, 'musicvideos', 'Music Videos', ((237, 'Rock'), (238, 'Pop'))),
+)
+QUALITIES = ((41, 'Other quality'), (12, 'DVDRip'), (13, '720p'))
+LANGUAGES = ((1, 'English'), (6, 'Bulgarian'), (9, 'German'))
+WORDS = ('Genesis', 'Collection', 'Live', 'Complete', 'Season', 'Edition', 'Magazine', 'North', 'South',
+         'Video', 'Remastered', 'Deluxe', 'Guide', 'Ultimate', 'Archive', 'Anthology')
+USERS = ('Sergesha', 'skydiving666', 'uploader', 'seedbox', 'archivist')
+
+
+class PageGenerator(object):
+    """
+       The PageGenerator renders synthetic `/files` result pages with the markup of Demonoid's torrents list:
+       the nested tables `Parser.TORRENTS_LIST_XPATH` expects, 4 heading and 3 trailing rows, date rows
+       and 2 rows per torrent with internal and external torrents, spam links and properties.
+       Pages after `pages` have no torrents, as the real site's do. Pages are generated deterministically from `seed`.
+
+       :attr: DEFAULT_ROWS is the default count of torrents per page, as on the real site.
+    """
+
+    DEFAULT_ROWS = 50
+
+    def __init__(self, pages=10, rows=None, seed=0, today=None, per_day=20, external_rate=0.3, spam_rate=0.5):
+        """
+        Creates a PageGenerator instance.
+
+        :param int pages: count of pages with torrents
+        :param rows: count of torrents per page. Default is PageGenerator.DEFAULT_ROWS
+        :type rows: int or None
+        :param int seed: seed of the generated torrents
+        :param today: date of the newest torrents. Default is today
+        :type today: datetime.date or None
+        :param int per_day: count of torrents added per day
+        :param float external_rate: share of external torrents
+        :param float spam_rate: share of torrents whose download link comes after a spam link
+        """
+        self.pages = pages
+        self.rows = rows or self.DEFAULT_ROWS
+        self.seed = seed
+        self.today = today or date.today()
+        self.per_day = per_day
+        self.external_rate = external_rate
+        self.spam_rate = spam_rate
+
+    def torrents(self, page):
+        """
+        Gives the torrents of `page`, newest first.
+
+        :param int page: page number, starting at 1
+        :return: every torrent's values as a dict
+        :rtype: list dict
+        """
+        if not 1 <= page <= self.pages:
+            return []
+        random = Random(self.seed * 1000003 + page)
+        first = (page - 1) * self.rows
+        torrents = []
+        for index in range(first, first + self.rows):
+            category_id, icon, category, subcategories = random.choice(CATEGORIES)
+            subcategory_id, subcategory = random.choice(subcategories)
+            quality_id, quality = random.choice(QUALITIES)
+            language_id, language = random.choice(LANGUAGES)
+            torrent_id = 3200000 - index * 2
+            seeders = int(random.paretovariate(1.2)) - 1
+            torrents.append({
+                'date': self.today - timedelta(days=index // self.per_day),
+                'id': '{0}/{1:012d}'.format(torrent_id, random.randrange(10 ** 11)),
+                'title': ' '.join(random.sample(WORDS, 4)) + ' ({0})'.format(2000 + index % 16),
+                'external': random.random() < self.external_rate,
+                'category_id': category_id, 'icon': icon, 'category': category,
+                'subcategory_id': subcategory_id, 'subcategory': subcategory,
+                'quality_id': quality_id, 'quality': quality,
+                'language_id': language_id if random.random() < 0.5 else 0, 'language': language,
+                'user': random.choice(USERS),
+                'torrent_link': 'http://www.demonoid.pw/files/download/{0}/'.format(torrent_id),
+                'spam': random.random() < self.spam_rate,
+                'size': '{0:.2f} {1}'.format(random.uniform(1, 999), random.choice(('MB', 'GB'))),
+                'comments': random.randrange(10),
+                'times_completed': seeders * random.randrange(1, 5),
+                'seeders': seeders,
+                'leechers': int(random.paretovariate(1.5)) - 1,
+            })
+        return torrents
+
+    def render(self, page):
+        """
+        Renders `page` as a whole HTML document.
+
+        :param int page: page number, starting at 1
+        :return: UTF-8 encoded page
+        :rtype: bytes
+        """
+        torrents = self.torrents(page)
+        rows = []
+        current_date = None
+        for torrent in torrents:
+            if torrent['date'] != current_date:
+                current_date = torrent['date']
+                rows.append(DATE_ROW.format(self.date_text(current_date)))
+            rows.append(self.render_torrent(torrent))
+        return PAGE_TEMPLATE.format(
+            rows=''.join(rows) or EMPTY_ROWS,
+            navigation=self.navigation(page),
+            pagination=self.pagination(page),
+            spam_url=SPAM_URL.format('ad'),
+        ).encode('utf-8')
+
+    @staticmethod
+    def date_text(day):
+        # the site only heads the real current day as today
+        if day == date.today():
+            return 'Added today'
+        return 'Added on {0}'.format(day.strftime('%A, %b %d, %Y'))
+
+    @staticmethod
+    def render_torrent(torrent):
+        properties = ['<a href="{0}" class="subcategory">{1}</a>'.format(
+            FILTER_URL.format(category=torrent['category_id'], subcategory=torrent['subcategory_id'], language=0, quality=0),
+            torrent['subcategory'])]
+        properties.append('<a href="{0}" class="subcategory">{1}</a>'.format(
+            FILTER_URL.format(category=torrent['category_id'], subcategory=0, language=0, quality=torrent['quality_id']),
+            torrent['quality']))
+        if torrent['language_id']:
+            properties.append('<a href="{0}" class="subcategory">{1}</a>'.format(
+                FILTER_URL.format(category=torrent['category_id'], subcategory=0, language=torrent['language_id'], quality=0),
+                torrent['language']))
+        spam = ''
+        if torrent['spam']:
+            spam = '<a href="{0}" target="_blank"><img src="/img/dirdown.png" alt="Direct download" border="0"></a>'.format(
+                SPAM_URL.format(torrent['torrent_link']))
+        values = dict(torrent, properties=' : '.join(properties), spam=spam,
+                      category_url=FILTER_URL.format(category=torrent['category_id'], subcategory=0, language=0, quality=0),
+                      external=' <font class="red">(external)</font>' if torrent['external'] else '')
+        return FIRST_ROW.format(**values) + SECOND_ROW.format(**values)
+
+    def pagination(self, page):
+        links = []
+        for number in range(1, self.pages + 1):
+            label = '{0} - {1}'.format((number - 1) * self.rows + 1, number * self.rows)
+            if number == page:
+                links.append('<b><u>{0}</u></b>'.format(label))
+            else:
+                links.append('<a href="{0}">{1}</a>'.format(PAGE_URL.format(number), label))
+        if not links:
+            return ''
+        return '| {0} |  <strong>{1:,} items total</strong>'.format(' | '.join(links), self.pages * self.rows)
+
+    def navigation(self, page):
+        previous = '&lt;&lt; Prev' if page <= 1 else '<a href="{0}" class="menu">&lt;&lt; Prev</a>'.format(PAGE_URL.format(page - 1))
+        following = 'Next &gt;&gt;' if page >= self.pages else '<a href="{0}" class="menu">Next &gt;&gt;</a>'.format(
+            PAGE_URL.format(page + 1))
+        return '{0}&#160;&#160;&#160;{1}'.format(previous, following)
+
+
+class MockServer(object):
+    """
+       The MockServer serves a `PageGenerator`'s pages over HTTP on localhost, one thread per connection, for load tests.
+       Every request waits `latency` seconds, then fails with a 500 at `error_rate` or is throttled with a 429
+       and a Retry-After header at `throttle_rate`. Any path is served, the page comes from the `page` parameter.
+
+       :attr: stats counts the served responses per status.
+    """
+
+    def __init__(self, generator=None, latency=0, error_rate=0, throttle_rate=0, retry_after=1, seed=0, port=0):
+        """
+        Creates a MockServer instance. It's started with `start` or as a context manager.
+
+        :param generator: pages to serve. Default is a `PageGenerator` with its defaults
+        :type generator: PageGenerator or None
+        :param latency: seconds every request waits
+        :type latency: int or float
+        :param float error_rate: share of requests failing with 500 Internal Server Error
+        :param float throttle_rate: share of requests failing with 429 Too Many Requests
+        :param int retry_after: seconds of the Retry-After header of 429 responses
+        :param int seed: seed deciding which requests fail
+        :param int port: port to listen on. Default is any free port
+        """
+        self.generator = generator or PageGenerator()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.port = port
+        self.stats = {}
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/'.format(self.port)
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        :return: self
+        :rtype: MockServer
+        """
+        try:
+            from http.server import BaseHTTPRequestHandler, HTTPServer
+            from socketserver import ThreadingMixIn
+        except ImportError:
+            from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+            from SocketServer import ThreadingMixIn
+
+        mock_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, headers, body = mock_server.respond(self.path)
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(('127.0.0.1', self.port), Handler)
+        self.port = self._server.server_port
+        self._thread = Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving.
+
+        :return: self
+        :rtype: MockServer
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+        return self
+
+    def respond(self, path):
+        """
+        Gives the response to a request of `path`.
+
+        :param str path: requested path with its query
+        :return: status, headers and body
+        :rtype: tuple
+        """
+        if self.latency:
+            sleep(self.latency)
+        with self._lock:
+            draw = self._random.random()
+        if draw < self.error_rate:
+            status, headers, body = 500, [('Content-Type', 'text/plain')], b'Internal Server Error'
+        elif draw < self.error_rate + self.throttle_rate:
+            status, headers = 429, [('Content-Type', 'text/plain'), ('Retry-After', str(self.retry_after))]
+            body = b'Too Many Requests'
+        else:
+            page = parse_qs(urlparse(path).query).get('page', ['1'])[0]
+            status, headers = 200, [('Content-Type', 'text/html; charset=utf-8')]
+            body = self.generator.render(int(page) if page.isdigit() else 1)
+        with self._lock:
+            self.stats[status] = self.stats.get(status, 0) + 1
+        return status, headers, body
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,213 @@
+from threading import Lock
+from time import sleep as default_sleep
+
+try:
+    from time import perf_counter as default_timer
+except ImportError:
+    from time import time as default_timer
+
+
+class Transport(object):
+    """
+       The Transport is the interface `urls.Url` makes its requests through, so the HTTP client can be swapped.
+       Responses need `status_code`, `headers` (case-insensitive), `content` and `elapsed`, as `requests` responses have.
+
+       :attr: DEFAULT_CONCURRENCY is the default maximum of requests made at a time by `get_many`.
+    """
+
+    DEFAULT_CONCURRENCY = 8
+
+    def get(self, url, params=None, headers=None, stream=False):
+        """
+        Makes a GET request.
+
+        :param str url: url to request
+        :param params: query parameters
+        :type params: dict or None
+        :param headers: extra request headers
+        :type headers: dict or None
+        :param bool stream: if the body may be downloaded when `content` is first accessed
+        :return: the response
+        """
+        raise NotImplementedError
+
+    def get_many(self, requests, concurrency=None):
+        """
+        Makes GET requests concurrently.
+
+        :param list tuple requests: every request's url and params
+        :param concurrency: maximum of requests made at a time. Default is Transport.DEFAULT_CONCURRENCY
+        :type concurrency: int or None
+        :return: the responses in the order of `requests`
+        :rtype: list
+        """
+        if not requests:
+            return []
+        from multiprocessing.pool import ThreadPool
+
+        pool = ThreadPool(min(concurrency or self.DEFAULT_CONCURRENCY, len(requests)))
+        try:
+            return pool.map(lambda request: self.get(*request), requests)
+        finally:
+            pool.close()
+            pool.join()
+
+    def raise_for_status(self, response):
+        """
+        Raises an exception if `response` is a Client or Server error.
+
+        :param response: response to check
+        """
+        response.raise_for_status()
+
+    def wire_bytes(self, response):
+        """
+        Gives how many bytes of `response`'s body went over the wire, compressed if the server compressed it.
+
+        :param response: response to check. Its body must be downloaded
+        :return: count of bytes or None if it isn't known
+        :rtype: int or None
+        """
+        return None
+
+    def close(self):
+        """
+        Closes the transport's connections.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+       The RequestsTransport makes HTTP/1.1 requests with a `requests.Session`. It's the default transport.
+       Connections are kept alive and reused, and gzip (plus brotli, if installed) responses are accepted.
+       When metrics are turned on, new connections are timed by an `adapters.InstrumentedAdapter`.
+    """
+
+    def __init__(self, session=None, metrics=None):
+        """
+        Creates a RequestsTransport instance.
+
+        :param session: session to make requests with. Default is a new `requests.Session`
+        :type session: requests.Session or None
+        :param metrics: Receiver of the `fetch.connect` timer. Default is no metrics
+        :type metrics: metrics.Metrics or None
+        """
+        if session is None:
+            from requests import Session
+
+            session = Session()
+            if metrics is not None and metrics.enabled:
+                from .adapters import InstrumentedAdapter
+
+                adapter = InstrumentedAdapter(metrics)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+        self.session = session
+
+    def get(self, url, params=None, headers=None, stream=False):
+        return self.session.get(url, params=params, headers=headers, stream=stream)
+
+    def wire_bytes(self, response):
+        raw = getattr(response, 'raw', None)
+        wire_bytes = raw.tell() if raw is not None and hasattr(raw, 'tell') else None
+        return wire_bytes if isinstance(wire_bytes, int) else None
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(Transport):
+    """
+       The HTTP2Transport makes requests with an `httpx.Client` speaking HTTP/2, so concurrent requests to a host
+       are multiplexed over a single connection, and responses may be compressed (gzip, deflate and brotli
+       or zstd, if installed). It needs the optional `httpx` and `h2` packages (`pip install httpx[http2]`).
+
+       Plain http urls are requested with HTTP/2 prior knowledge when `http1` is False,
+       otherwise HTTP/2 is negotiated over TLS and HTTP/1.1 is the fallback.
+       Crawls fetching pages from many threads, as `structures.Paginated.pages` with `prefetch`, `QueryPlan`
+       or the command line's `--concurrency`, share the client, so their requests are multiplexed too.
+       Bodies are always downloaded with the response, so `elapsed` spans the whole request.
+    """
+
+    def __init__(self, client=None, http1=True, timeout=None):
+        """
+        Creates a HTTP2Transport instance.
+
+        :param client: client to make requests with. Default is a new `httpx.Client` with HTTP/2 turned on
+        :type client: httpx.Client or None
+        :param bool http1: if HTTP/1.1 is allowed. Without it, plain http urls use HTTP/2 prior knowledge
+        :param timeout: timeout in seconds of every request. Default is httpx's
+        :type timeout: int or float or None
+        """
+        if client is None:
+            try:
+                import httpx
+            except ImportError:
+                raise ImportError('HTTP2Transport needs httpx with HTTP/2 support. Install it with `pip install httpx[http2]`')
+
+            kwargs = {'http1': http1, 'http2': True}
+            if timeout is not None:
+                kwargs['timeout'] = timeout
+            client = httpx.Client(**kwargs)
+        self.client = client
+
+    def get(self, url, params=None, headers=None, stream=False):
+        return self.client.get(url, params=params, headers=headers)
+
+    def raise_for_status(self, response):
+        # httpx raises for redirects and 304 Not Modified too
+        if response.status_code >= 400:
+            response.raise_for_status()
+
+    def wire_bytes(self, response):
+        return response.num_bytes_downloaded
+
+    def close(self):
+        self.client.close()
+
+
+class RateLimitedTransport(Transport):
+    """
+       The RateLimitedTransport spaces the requests of another transport evenly, `rate` requests per second at most,
+       however many threads make them. Requests over the rate wait for their turn.
+    """
+
+    def __init__(self, transport, rate, clock=None, sleep=None):
+        """
+        Creates a RateLimitedTransport instance.
+
+        :param transport: transport making the requests
+        :type transport: Transport
+        :param rate: maximum of requests per second
+        :type rate: int or float
+        :param clock: Callable returning the current time in seconds. Default is `time.perf_counter`
+        :type clock: callable or None
+        :param sleep: Callable waiting the given seconds. Default is `time.sleep`
+        :type sleep: callable or None
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive, not {0}'.format(rate))
+        self.transport = transport
+        self.interval = 1.0 / rate
+        self._clock = clock or default_timer
+        self._sleep = sleep or default_sleep
+        self._next_request = None
+        self._lock = Lock()
+
+    def get(self, url, params=None, headers=None, stream=False):
+        with self._lock:
+            now = self._clock()
+            start = now if self._next_request is None else max(now, self._next_request)
+            self._next_request = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+        return self.transport.get(url, params=params, headers=headers, stream=stream)
+
+    def raise_for_status(self, response):
+        self.transport.raise_for_status(response)
+
+    def wire_bytes(self, response):
+        return self.transport.wire_bytes(response)
+
+    def close(self):
+        self.transport.close()
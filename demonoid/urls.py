@@ -1,5 +1,9 @@
-from lxml import html
-from requests import Session
+import codecs
+from threading import local
+
+from .cache import CachedPage, PageCache, SingleFlight
+from .metrics import NULL_METRICS
+from .transports import RequestsTransport
 
 
 class Url(object):
@@ -9,11 +13,15 @@ class Url(object):
        It shouldn't be used directly.
 
        :attr: DEFAULT_BASE_URL is 'http://www.demonoid.pw/'. Changing it directly isn't recommended. Instead pass a `base_url` parameter to `Url` class.
+       :attr: _parsers holds the reused lxml HTML parsers per encoding. It's thread-local, since lxml parsers can't be shared between threads.
     """
 
     DEFAULT_BASE_URL = 'http://www.demonoid.pw/'
 
-    def __init__(self, base_url=None, path=None, params=None):
+    _parsers = local()
+
+    def __init__(self, base_url=None, path=None, params=None, metrics=None, page_cache=None, transport=None,
+                 single_flight=None):
         """
         Creates a Url instance.
 
@@ -23,13 +31,35 @@ class Url(object):
         :type base_url: str or None
         :param params: The parameters to pass to the future request. Default is {}
         :type params: dict or None
+        :param metrics: Receiver of the stage timers and counters. Default is the turned-off `metrics.NULL_METRICS`
+        :type metrics: metrics.Metrics or None
+        :param page_cache: Pages' validators for conditional requests. True uses a new `cache.PageCache`. Default is no conditional requests
+        :type page_cache: bool or cache.PageCache or None
+        :param transport: HTTP client making the requests. Default is a new `transports.RequestsTransport`
+        :type transport: transports.Transport or None
+        :param single_flight: Coalescer of identical concurrent page loads. True uses a new `cache.SingleFlight`. Default is no coalescing
+        :type single_flight: bool or cache.SingleFlight or None
         """
 
         self.base_url = base_url or self.DEFAULT_BASE_URL
         self.path = path or ''
         self.params = params or {}
+        self.metrics = metrics or NULL_METRICS
+        if page_cache is True:
+            page_cache = PageCache()
+        # an empty cache is falsy, so it's compared to False rather than tested for truth
+        self.page_cache = None if page_cache is False else page_cache
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight = None if single_flight is False else single_flight
+        # the cached page of the last update, the validators of its response and if the server answered it's not modified
+        self.cached_page = None
+        self.validators = None
+        self.not_modified = False
 
-        self._session = Session()
+        # requests and lxml are imported when first needed, not with the module
+        self.transport = transport or RequestsTransport(metrics=self.metrics)
+        self._session = getattr(self.transport, 'session', None)
         self._DOM = None
 
     def add_params(self, params):
@@ -56,6 +86,20 @@ class Url(object):
         self.params[key] = value
         return self
 
+    def snapshot(self, **params):
+        """
+        Gives a copy of the url to make a single request with, its params updated with `params`.
+        The copy has its own params and DOM, but shares the transport, metrics, page cache and single flight,
+        so snapshots of one url can be fetched from many threads at once, while the url itself doesn't change.
+
+        :return: copy of self
+        :rtype: Url
+        """
+        copied_params = dict(self.params)
+        copied_params.update(params)
+        return type(self)(self.base_url, self.path, copied_params, self.metrics, self.page_cache, self.transport,
+                          self.single_flight)
+
     @property
     def url(self):
         """
@@ -85,13 +129,23 @@ class Url(object):
             url += '/' + path
         return url
 
+    @property
+    def cache_key(self):
+        """
+        Gives the key of the fully qualified url, params included, in `self.page_cache`.
+
+        :rtype: tuple
+        """
+        return self.url, tuple(sorted((key, str(value)) for key, value in self.params.items()))
+
     @property
     def DOM(self):
         """
-        Lazy gets (or builds if needed) a DOM from response's text of combined url.
+        Lazy gets (or builds if needed) a DOM from response's content of combined url.
+        It's None when the server answered that the cached page wasn't modified (see `self.not_modified`).
 
         :return: DOM built from response
-        :rtype: lxml.HtmlElement
+        :rtype: lxml.HtmlElement or None
         """
         if self._DOM is None:
             self.update_DOM()
@@ -102,23 +156,151 @@ class Url(object):
         Makes a request and updates `self._DOM`.
         Worth using only if you manually change `self.base_url` or `self.path`.
 
+        With a `self.page_cache`, `self.cached_page` is the page's entry, holding what was parsed from it last time,
+        and `self.validators` are the response's ETag and Last-Modified, to be stored once the page is parsed.
+        A page parsed before is requested conditionally. If the server answers 304 Not Modified,
+        nothing is downloaded or built and `self.not_modified` is set.
+
+        :return: self
+        :rtype: Url
+        """
+        self.cached_page = None
+        self.validators = None
+        self.not_modified = False
+        cached = self.page_cache.get(self.cache_key) if self.page_cache is not None else None
+        headers = cached.conditional_headers() if cached is not None and cached.parsed is not None else None
+        if not headers:
+            response = self.fetch()
+        else:
+            response = self.fetch(headers)
+            if response.status_code == 304:
+                self.metrics.increment('fetch.not_modified')
+                self.page_cache.record('not_modified')
+                self.cached_page = cached
+                self.not_modified = True
+                return self
+
+        with self.metrics.timer('dom.build'):
+            self._DOM = self.build_DOM(response.content, self.get_encoding(response))
+        if self.page_cache is not None:
+            if cached is None:
+                cached = CachedPage()
+                self.page_cache.set(self.cache_key, cached)
+            self.cached_page = cached
+            # kept with what's parsed from the page, once it's parsed (see `CachedPage.store`)
+            self.validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return self
+
+    def release_DOM(self):
+        """
+        Forgets `self._DOM`, so the tree is freed as soon as nothing else references it.
+        The next `self.DOM` access makes a new request.
+
         :return: self
         :rtype: Url
         """
-        response = self.fetch()
-        self._DOM = html.fromstring(response.text)
+        self._DOM = None
         return self
 
-    def fetch(self):
+    @classmethod
+    def build_DOM(cls, content, encoding=None):
+        """
+        Builds a DOM straight from the raw `content` bytes, without decoding them to text first.
+        If `encoding` isn't given, lxml sniffs it from the document's meta tags.
+
+        :param bytes content: raw HTML to parse
+        :param encoding: declared encoding of `content`
+        :type encoding: str or None
+        :return: DOM built from `content`
+        :rtype: lxml.HtmlElement
+        """
+        from lxml import html
+
+        return html.fromstring(content, parser=cls.get_parser(encoding))
+
+    @classmethod
+    def get_parser(cls, encoding=None):
+        """
+        Gives a reusable HTML parser for `encoding`, building it on first use in the current thread.
+        An unknown encoding, as a garbage charset in a header, gets the parser sniffing the encoding instead.
+
+        :param encoding: encoding the parser expects
+        :type encoding: str or None
+        :return: parser for `encoding`
+        :rtype: lxml.html.HTMLParser
+        """
+        key = cls.known_encoding(encoding)
+        parsers = cls._parsers.__dict__.setdefault('by_encoding', {})
+        if key not in parsers:
+            from lxml import html
+
+            try:
+                parsers[key] = html.HTMLParser(encoding=key)
+            except LookupError:
+                # known to Python, but not to libxml2
+                parsers[key] = cls.get_parser()
+        return parsers[key]
+
+    @staticmethod
+    def known_encoding(encoding):
+        """
+        Gives the normalized name of `encoding`, as 'utf-8' for 'UTF8', if Python knows it.
+
+        :param encoding: encoding name to check
+        :type encoding: str or None
+        :return: normalized name or None if `encoding` is None or unknown
+        :rtype: str or None
+        """
+        if not encoding:
+            return None
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            return None
+
+    @staticmethod
+    def get_encoding(response):
+        """
+        Gets the charset declared in `response`'s Content-Type header.
+        Unlike `response.encoding` it doesn't fall back to ISO-8859-1 and unlike `response.text` it never guesses.
+
+        :param requests.models.Response response: response to check
+        :return: declared charset or None if there's none
+        :rtype: str or None
+        """
+        content_type = response.headers.get('content-type', '')
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'charset':
+                return value.strip('"\' ') or None
+        return None
+
+    def fetch(self, headers=None):
         """
         Makes a request to combined url with `self._params` as parameters.
         If the server at combined url responds with Client or Server error, raises an exception.
 
+        :param headers: extra request headers, as conditional request ones
+        :type headers: dict or None
         :return: the response from combined url
         :rtype: requests.models.Response
         """
-        response = self._session.get(self.url, params=self.params)
-        response.raise_for_status()
+        if not self.metrics.enabled:
+            response = self.transport.get(self.url, params=self.params, headers=headers)
+            self.transport.raise_for_status(response)
+            return response
+
+        with self.metrics.timer('fetch'):
+            # stream to time the body download apart from the time to first byte
+            response = self.transport.get(self.url, params=self.params, headers=headers, stream=True)
+            self.metrics.observe('fetch.ttfb', response.elapsed.total_seconds())
+            with self.metrics.timer('fetch.download'):
+                content = response.content
+        self.metrics.increment('fetch.bytes', len(content))
+        wire_bytes = self.transport.wire_bytes(response)
+        if wire_bytes is not None:
+            self.metrics.increment('fetch.wire_bytes', wire_bytes)
+        self.transport.raise_for_status(response)
         return response
 
     def __str__(self):
@@ -0,0 +1,123 @@
+from threading import local
+
+
+class Selector(object):
+    """
+       The Selector is a compiled XPath expression, callable with the element to evaluate it on.
+       The expression is compiled once per thread on first use (lxml is imported then too) and reused afterwards,
+       unlike `element.xpath(expression)`, which compiles the expression on every call.
+    """
+
+    def __init__(self, expression):
+        """
+        Creates a Selector instance.
+
+        :param str expression: XPath expression to compile
+        """
+        self.expression = expression
+        self._local = local()
+
+    @property
+    def evaluator(self):
+        """
+        Lazy gets (or compiles if needed) the current thread's evaluator of `self.expression`.
+
+        :rtype: lxml.etree.XPath
+        """
+        try:
+            return self._local.evaluator
+        except AttributeError:
+            from lxml import etree
+
+            self._local.evaluator = etree.XPath(self.expression, smart_strings=False)
+            return self._local.evaluator
+
+    def __call__(self, element):
+        return self.evaluator(element)
+
+    def __eq__(self, other):
+        return isinstance(other, Selector) and self.expression == other.expression
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.expression)
+
+    def __repr__(self):
+        return 'Selector({0!r})'.format(self.expression)
+
+
+class SelectorSet(object):
+    """
+       The SelectorSet groups the selectors the `Parser` uses to find a page's parts, so a mirror or a layout version
+       with different markup only needs another set, not another parse loop.
+
+       :attr: NAMES are the selectors every set has.
+        `torrents_list` captures the torrent list rows, `date_tag` the date table data of a row
+        and `first_row` the anchors of a torrent's first row.
+    """
+
+    NAMES = ('torrents_list', 'date_tag', 'first_row')
+
+    def __init__(self, name, **expressions):
+        """
+        Creates a SelectorSet instance.
+
+        :param str name: name of the set, as the layout version or mirror it's meant for
+        :param expressions: XPath expression of every name in `SelectorSet.NAMES`
+        """
+        missing = [selector for selector in self.NAMES if selector not in expressions]
+        if missing:
+            raise ValueError('Missing selectors: {0}'.format(', '.join(missing)))
+        self.name = name
+        for selector, expression in expressions.items():
+            setattr(self, selector, expression if isinstance(expression, Selector) else Selector(expression))
+
+    def override(self, name, **expressions):
+        """
+        Gives a new set with the selectors of this set and the given `expressions` replacing some of them.
+
+        :param str name: name of the new set
+        :param expressions: XPath expressions to replace
+        :rtype: SelectorSet
+        """
+        merged = dict((selector, getattr(self, selector)) for selector in self.NAMES)
+        merged.update(expressions)
+        return SelectorSet(name, **merged)
+
+    def __repr__(self):
+        return 'SelectorSet({0!r})'.format(self.name)
+
+
+DEFAULT_SELECTORS = SelectorSet(
+    'default',
+    torrents_list='//*[@id="fslispc"]/table/tr/td[1]/table[6]/tr/td/table/tr[position() > 4]',
+    date_tag='./td[@class="added_today"]',
+    first_row='./td/a | ./td/font',
+)
+
+_registry = {DEFAULT_SELECTORS.name: DEFAULT_SELECTORS}
+
+
+def register_selectors(selector_set):
+    """
+    Registers `selector_set` under its name, replacing any set of the same name.
+
+    :param SelectorSet selector_set: set to register
+    :return: `selector_set`
+    :rtype: SelectorSet
+    """
+    _registry[selector_set.name] = selector_set
+    return selector_set
+
+
+def get_selectors(name):
+    """
+    Gets the registered set named `name`.
+
+    :param str name: name of the set
+    :rtype: SelectorSet
+    :raises KeyError: if there's no such set
+    """
+    return _registry[name]
@@ -25,6 +25,9 @@ setup(
     install_requires=using_requirements,
     tests_require=developing_requirements,
     test_suite='tests',
+    entry_points={
+        'console_scripts': ['demonoid = demonoid.cli:main'],
+    },
     include_package_data=True,
     license='MIT',
     description='Unofficial demonoid.pw API.',
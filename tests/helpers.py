@@ -0,0 +1,24 @@
+import os
+from sys import version_info
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'files.html')
+
+with open(FIXTURE_PATH, 'rb') as fixture:
+    FIXTURE_CONTENT = fixture.read()
+
+EMPTY_CONTENT = b'<html><body><p>No torrents found</p></body></html>'
+
+
+def mocked_response(content=FIXTURE_CONTENT):
+    return mock.Mock(content=content, headers={'content-type': 'text/html; charset=utf-8'})
+
+
+def pages_responses(pages):
+    # `pages` fixture pages followed by an empty page ending a multipage crawl
+    return [mocked_response() for _ in range(pages)] + [mocked_response(EMPTY_CONTENT)]
@@ -0,0 +1,91 @@
+from threading import Event, Thread
+from time import sleep
+from unittest import TestCase
+
+from requests import ConnectionError
+
+from demonoid.cache import CachedPage, PageCache, SingleFlight
+
+
+class PageCacheTests(TestCase):
+
+    def test_least_recently_used_page_is_dropped(self):
+        cache = PageCache(max_pages=2)
+        cache.set('first', CachedPage('"1"'))
+        cache.set('second', CachedPage('"2"'))
+        cache.get('first')
+        cache.set('third', CachedPage('"3"'))
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual('"1"', cache.get('first').etag)
+        self.assertEqual(2, len(cache))
+
+    def test_conditional_headers(self):
+        page = CachedPage('"abc"', 'Mon, 20 Apr 2015 10:00:00 GMT')
+        self.assertEqual({'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 20 Apr 2015 10:00:00 GMT'},
+                         page.conditional_headers())
+        self.assertEqual({}, CachedPage().conditional_headers())
+
+    def test_store(self):
+        page = CachedPage('"abc"').store((None, 'Mon, 20 Apr 2015 10:00:00 GMT'), 'digest', iter([1, 2]))
+        self.assertIsNone(page.etag)
+        self.assertEqual('Mon, 20 Apr 2015 10:00:00 GMT', page.last_modified)
+        self.assertEqual(('digest', (1, 2)), (page.digest, page.parsed))
+
+    def test_stats(self):
+        cache = PageCache()
+        self.assertEqual(0.0, cache.stats['hit_rate'])
+        cache.record('parsed').record('unchanged').record('not_modified').record('parsed')
+        self.assertEqual({'not_modified': 1, 'unchanged': 1, 'parsed': 2, 'hit_rate': 0.5}, cache.stats)
+
+
+class SingleFlightTests(TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = Event()
+        self.calls = []
+
+    def slow_call(self, result=None, exception=None):
+        self.calls.append(result)
+        self.release.wait(5)
+        if exception is not None:
+            raise exception
+        return result
+
+    def run_concurrently(self, function, count=4):
+        results = []
+
+        def target():
+            try:
+                results.append(self.flight.do('key', function))
+            except Exception as exception:
+                results.append(exception)
+
+        threads = [Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        # the first call is held until every other one waits for it
+        while len(self.calls) < 1 or self.flight.coalesced < count - 1:
+            sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_share_one_result(self):
+        results = self.run_concurrently(lambda: self.slow_call('page'))
+        self.assertEqual(['page'], self.calls)
+        self.assertEqual(['page'] * 4, [result for result, shared in results])
+        self.assertEqual(3, sum(shared for result, shared in results))
+        self.assertEqual(0, len(self.flight))
+
+    def test_concurrent_calls_share_the_exception(self):
+        results = self.run_concurrently(lambda: self.slow_call(exception=ConnectionError()))
+        self.assertEqual(1, len(self.calls))
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+
+    def test_finished_calls_run_again(self):
+        self.release.set()
+        self.assertEqual((1, False), self.flight.do('key', lambda: self.slow_call(1)))
+        self.assertEqual((2, False), self.flight.do('key', lambda: self.slow_call(2)))
+        self.assertEqual(0, self.flight.coalesced)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import TestCase
+
+from demonoid.checkpoints import CheckpointLog
+from demonoid.exceptions import CheckpointMismatchException
+from demonoid.structures import Demonoid, Torrent
+from demonoid.synthetic import MockServer, PageGenerator
+
+CRAWL = ['http://www.demonoid.pw/files', [['query', 'banana']]]
+
+
+def make_torrent(index):
+    return Torrent(date(2015, 3, 5), '{0}/001075547600'.format(index), 'Torrent {0}'.format(index), 'Demonoid',
+                   'http://www.demonoid.pw/files/?category=3', 'http://www.demonoid.pw/files/details/{0}/'.format(index),
+                   'Movies', None, 'DVDRip', None, 'Sergesha', 'http://www.demonoid.pw/users/Sergesha',
+                   'http://www.demonoid.pw/files/download/{0}/'.format(index), '1.50 MB', 3, 10, index, 2)
+
+
+class CheckpointLogTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'crawl.log')
+
+    def test_pages_are_logged(self):
+        log = CheckpointLog(self.path)
+        self.assertIsNone(log.open(CRAWL))
+        log.append(1, [make_torrent(1), make_torrent(2)])
+        log.append(2, [make_torrent(3)])
+        self.assertEqual(2, CheckpointLog(self.path).open(CRAWL))
+        pages = list(CheckpointLog(self.path).pages())
+        self.assertEqual([1, 2], [page for page, torrents in pages])
+        torrent = pages[0][1][1]
+        self.assertEqual(('2/001075547600', date(2015, 3, 5), 2, '1.50 MB'),
+                         (torrent.id, torrent.date, torrent.seeders, torrent.size))
+
+    def test_undated_torrent_is_logged(self):
+        log = CheckpointLog(self.path)
+        log.open(CRAWL)
+        undated = make_torrent(1)
+        undated.date = None
+        log.append(1, [undated, make_torrent(2)])
+        pages = list(CheckpointLog(self.path).pages())
+        self.assertEqual([None, date(2015, 3, 5)], [torrent.date for torrent in pages[0][1]])
+
+    def test_empty_page_ends_the_crawl(self):
+        log = CheckpointLog(self.path)
+        log.open(CRAWL)
+        log.append(1, [make_torrent(1)])
+        self.assertFalse(log.done)
+        log.append(2, [])
+        log = CheckpointLog(self.path)
+        self.assertEqual(2, log.open(CRAWL))
+        self.assertTrue(log.done)
+
+    def test_torn_last_line_is_cut(self):
+        log = CheckpointLog(self.path)
+        log.open(CRAWL)
+        log.append(1, [make_torrent(1)])
+        size = os.path.getsize(self.path)
+        with open(self.path, 'ab') as torn:
+            torn.write(b'{"page": 2, "torr')
+        self.assertEqual(1, CheckpointLog(self.path).open(CRAWL))
+        self.assertEqual(size, os.path.getsize(self.path))
+
+    def test_log_of_another_crawl(self):
+        CheckpointLog(self.path).open(CRAWL)
+        with self.assertRaises(CheckpointMismatchException):
+            CheckpointLog(self.path).open(['http://www.demonoid.pw/files', [['query', 'peel']]])
+
+
+class CheckpointedSearchTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'crawl.log')
+        self.server = MockServer(PageGenerator(pages=5, rows=20)).start()
+        self.addCleanup(self.server.stop)
+        self.demonoid = Demonoid(self.server.base_url)
+        self.expected_ids = [torrent['id'] for page in range(1, 6) for torrent in self.server.generator.torrents(page)]
+
+    def search(self):
+        return self.demonoid.search(query='banana', multipage=True, bounded=True, checkpoint=self.path)
+
+    def requests(self):
+        return sum(self.server.stats.values())
+
+    def test_interrupted_crawl_resumes(self):
+        interrupted = iter(self.search())
+        ids = [next(interrupted).id for _ in range(45)]
+        interrupted.close()
+        self.assertEqual(3, self.requests())
+        # the 3rd page is fetched again, the 2nd isn't
+        ids += [torrent.id for torrent in self.search()][45:]
+        self.assertEqual(self.expected_ids, ids)
+        self.assertEqual(3 + 4, self.requests())
+
+    def test_finished_crawl_is_replayed(self):
+        self.assertEqual(self.expected_ids, [torrent.id for torrent in self.search()])
+        self.assertEqual(6, self.requests())
+        self.assertEqual(self.expected_ids, [torrent.id for torrent in self.search()])
+        self.assertEqual(6, self.requests())
+
+    def test_undeduplicated_crawl_resumes_after_last_page(self):
+        search = self.demonoid.search(query='banana', multipage=True, checkpoint=self.path, dedupe=False)
+        self.assertIsNone(search.deduplicator)
+        interrupted = iter(search.iter_torrents())
+        [next(interrupted) for _ in range(21)]
+        interrupted.close()
+        search = self.demonoid.search(query='banana', multipage=True, checkpoint=self.path, dedupe=False)
+        self.assertEqual(self.expected_ids, [torrent.id for torrent in search.items])
+        self.assertEqual(2 + 4, self.requests())
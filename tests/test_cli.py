@@ -0,0 +1,154 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from requests import ConnectionError
+
+from demonoid import cli
+from demonoid.synthetic import MockServer, PageGenerator
+
+
+class ShiftedGenerator(PageGenerator):
+
+    def __init__(self, *args, **kwargs):
+        super(ShiftedGenerator, self).__init__(*args, **kwargs)
+        # count of torrents pushed toward later pages, as if newer ones were posted on top
+        self.shift = 0
+
+    def torrents(self, page):
+        torrents = [torrent for number in range(1, self.pages + 1)
+                    for torrent in super(ShiftedGenerator, self).torrents(number)]
+        start = max((page - 1) * self.rows - self.shift, 0)
+        return torrents[start:page * self.rows - self.shift]
+
+
+class CommandLineTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.server = MockServer(PageGenerator(pages=5, rows=20)).start()
+        self.addCleanup(self.server.stop)
+        self.stderr_patcher = mock.patch('sys.stderr', new_callable=io.StringIO)
+        self.stderr = self.stderr_patcher.start()
+        self.addCleanup(self.stderr_patcher.stop)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def main(self, *args):
+        return cli.main(list(args) + ['--base-url', self.server.base_url])
+
+    def read_ids(self, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt') as exported:
+            return [row['id'] for row in csv.DictReader(exported)]
+
+    def expected_ids(self, pages=5):
+        generator = self.server.generator
+        return [torrent['id'] for page in range(1, pages + 1) for torrent in generator.torrents(page)]
+
+    def test_crawl_to_file(self):
+        self.assertEqual(0, self.main('banana', '--category', '3', '-o', self.path('crawl.csv.gz')))
+        self.assertEqual(self.expected_ids(), self.read_ids(self.path('crawl.csv.gz')))
+        self.assertEqual({200: 6}, self.server.stats)
+        self.assertFalse(os.path.exists(self.path('crawl.csv.gz.checkpoint')))
+        self.assertIn('page 5: 100 torrents', self.stderr.getvalue())
+
+    def test_single_page(self):
+        self.assertEqual(0, self.main('--single-page', '--page', '2', '--fields', 'id', '-o', self.path('crawl.ndjson')))
+        with open(self.path('crawl.ndjson')) as exported:
+            self.assertEqual(20, len(exported.readlines()))
+
+    def test_invalid_format(self):
+        self.assertEqual(2, self.main('-o', self.path('crawl.txt')))
+
+    def test_concurrent_crawl_keeps_page_order(self):
+        self.assertEqual(0, self.main('--concurrency', '4', '-q', '-o', self.path('crawl.csv')))
+        self.assertEqual(self.expected_ids(), self.read_ids(self.path('crawl.csv')))
+        self.assertEqual('100 torrents\n', self.stderr.getvalue())
+
+    def test_concurrency_below_one(self):
+        for concurrency in ('0', '-1', 'many'):
+            with self.assertRaises(SystemExit) as raised:
+                self.main('--concurrency', concurrency, '-o', self.path('crawl.csv'))
+            self.assertEqual(2, raised.exception.code)
+        self.assertIn("'0' is not a whole number of at least 1", self.stderr.getvalue())
+
+    def interrupted_crawl(self, path, pages, *args):
+        # the crawl fails after `pages` pages and a partly written one
+        fetch_pages = cli.fetch_pages
+
+        def failing_fetch_pages(*args):
+            for page, torrents in fetch_pages(*args):
+                if page > pages:
+                    raise ConnectionError('connection reset')
+                yield page, torrents
+
+        with mock.patch.object(cli, 'fetch_pages', failing_fetch_pages):
+            self.assertEqual(1, self.main('-o', path, *args))
+        with open(path, 'ab') as output:
+            output.write(b'partial')
+
+    def test_interrupted_crawl_resumes(self):
+        for name in ('crawl.csv', 'crawl.csv.gz'):
+            path = self.path(name)
+            self.interrupted_crawl(path, 2)
+            with open(path + '.checkpoint') as checkpoint:
+                self.assertEqual(2, json.load(checkpoint)['page'])
+            requests = sum(self.server.stats.values())
+            self.assertEqual(0, self.main('-o', path))
+            self.assertEqual(self.expected_ids(), self.read_ids(path))
+            # pages 3 to 5 and the empty one
+            self.assertEqual(4, sum(self.server.stats.values()) - requests)
+            self.assertIn('100 torrents', self.stderr.getvalue().splitlines()[-1])
+
+    def test_deduplicated_crawl_resumes_without_shifted_duplicates(self):
+        self.server.generator = ShiftedGenerator(pages=5, rows=20)
+        path = self.path('crawl.csv')
+        expected_ids = self.expected_ids()
+        self.interrupted_crawl(path, 2, '--dedupe')
+        # the last 3 torrents of page 2 shifted to page 3 while the crawl was stopped
+        self.server.generator.shift = 3
+        self.assertEqual(2, self.main('-o', path))
+        self.assertEqual(0, self.main('--dedupe', '-o', path))
+        self.assertEqual(expected_ids, self.read_ids(path))
+
+    def test_checkpoint_of_another_crawl(self):
+        path = self.path('crawl.csv')
+        self.interrupted_crawl(path, 1)
+        self.assertEqual(2, self.main('other', '-o', path))
+        self.assertEqual(0, self.main('other', '--restart', '-o', path))
+        self.assertEqual(self.expected_ids(), self.read_ids(path))
+
+    def test_cache_dir(self):
+        cache_dir = self.path('cache')
+        self.assertEqual(0, self.main('--cache-dir', cache_dir, '-o', self.path('crawl.csv')))
+        self.assertEqual(0, self.main('--cache-dir', cache_dir, '--rate-limit', '1', '-o', self.path('again.csv')))
+        self.assertEqual({200: 6}, self.server.stats)
+        self.assertEqual(self.read_ids(self.path('crawl.csv')), self.read_ids(self.path('again.csv')))
+
+    def test_http2_transport(self):
+        args = cli.build_parser().parse_args(['--http2', '--rate-limit', '5'])
+        with mock.patch.object(cli, 'HTTP2Transport') as patched_transport:
+            transport = cli.build_transport(args)
+        self.assertIs(patched_transport.return_value, transport.transport)
+        patched_transport.assert_called_once_with(http1=False)
+        args = cli.build_parser().parse_args(['--http2', '--base-url', 'https://www.demonoid.pw/'])
+        with mock.patch.object(cli, 'HTTP2Transport') as patched_transport:
+            cli.build_transport(args)
+        patched_transport.assert_called_once_with(http1=True)
+        with mock.patch.object(cli, 'HTTP2Transport', side_effect=ImportError('HTTP2Transport needs httpx')):
+            self.assertEqual(2, self.main('--http2', '-o', self.path('crawl.csv')))
+        self.assertIn('needs httpx', self.stderr.getvalue())
@@ -0,0 +1,110 @@
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from demonoid.dedup import BloomFilter, Deduplicator, SeenSet
+from demonoid.structures import Paginated
+from demonoid.urls import Url
+
+from .helpers import EMPTY_CONTENT, FIXTURE_CONTENT, mocked_response
+
+
+def torrents(*ids):
+    return [mock.Mock(id='{0}/001075547600'.format(torrent_id)) for torrent_id in ids]
+
+
+class SeenSetTests(TestCase):
+
+    def test_add(self):
+        seen = SeenSet()
+        self.assertFalse(seen.add('3163982/001075547600'))
+        self.assertTrue(seen.add('3163982/001075547600'))
+        self.assertIn('3163982/001075547600', seen)
+        self.assertEqual(1, len(seen))
+
+    def test_compact(self):
+        self.assertEqual(3163982, SeenSet.compact('3163982/001075547600'))
+        self.assertEqual('not-a-number', SeenSet.compact('not-a-number'))
+
+
+class BloomFilterTests(TestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        ids = ['{0}/001075547600'.format(i) for i in range(1000)]
+        for torrent_id in ids:
+            bloom.add(torrent_id)
+        self.assertTrue(all(torrent_id in bloom for torrent_id in ids))
+        self.assertTrue(all(bloom.add(torrent_id) for torrent_id in ids))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add('{0}/001075547600'.format(i))
+        false_positives = sum('{0}/001075547600'.format(i) in bloom for i in range(1000, 11000))
+        self.assertLess(false_positives, 10000 * 0.03)
+
+    def test_size(self):
+        bloom = BloomFilter(capacity=10 ** 6, error_rate=0.001)
+        # about 1.8 MB for a million ids
+        self.assertLess(len(bloom._bits), 2 * 1024 * 1024)
+        self.assertEqual(10, bloom.hashes)
+
+
+class DeduplicatorTests(TestCase):
+
+    def test_filter_page_drops_seen_torrents(self):
+        deduplicator = Deduplicator()
+        self.assertEqual(3, len(deduplicator.filter_page(torrents(5, 4, 3))))
+        page = deduplicator.filter_page(torrents(4, 3, 2, 1))
+        self.assertEqual(['2/001075547600', '1/001075547600'], [torrent.id for torrent in page])
+        self.assertEqual(2, deduplicator.duplicates)
+
+    def test_shift_is_detected(self):
+        deduplicator = Deduplicator()
+        deduplicator.filter_page(torrents(9, 8, 7))
+        deduplicator.filter_page(torrents(7, 6, 5))
+        deduplicator.filter_page(torrents(4, 3, 2))
+        self.assertEqual(1, deduplicator.shifts)
+        self.assertEqual(1, deduplicator.shifted)
+
+    def test_bloom_filter_backend(self):
+        deduplicator = Deduplicator(BloomFilter(capacity=100))
+        deduplicator.filter_page(torrents(3, 2, 1))
+        self.assertEqual([], deduplicator.filter_page(torrents(3, 2, 1)))
+
+
+class PaginatedDedupeTests(TestCase):
+
+    def test_multipage_crawl_through_shifted_page(self):
+        responses = [mock.Mock(content=content, headers={}) for content in (FIXTURE_CONTENT, FIXTURE_CONTENT, EMPTY_CONTENT)]
+        with mock.patch.object(Url, 'fetch', side_effect=responses) as patched_fetch:
+            paginated = Paginated(Url(), multipage=True, dedupe=True)
+            items = paginated.items
+        # the whole second page was pushed by new torrents, yet the crawl goes on to the end
+        self.assertEqual(3, patched_fetch.call_count)
+        self.assertEqual(50, len(items))
+        self.assertEqual(50, len(set(torrent.id for torrent in items)))
+        self.assertEqual(1, paginated.deduplicator.shifts)
+        self.assertEqual(50, paginated.deduplicator.duplicates)
+
+    def test_every_crawl_dedupes_on_its_own(self):
+        with mock.patch.object(Url, 'fetch', side_effect=lambda *args, **kwargs: mocked_response()):
+            paginated = Paginated(Url(), dedupe=True, bounded=True)
+            self.assertEqual(50, len(list(paginated)))
+            self.assertEqual(50, len(list(paginated)))
+
+    def test_shared_deduplicator_spans_crawls(self):
+        deduplicator = Deduplicator()
+        with mock.patch.object(Url, 'fetch', side_effect=lambda *args, **kwargs: mocked_response()):
+            paginated = Paginated(Url(), dedupe=deduplicator, bounded=True)
+            self.assertEqual(50, len(list(paginated)))
+            self.assertEqual([], list(paginated))
+        self.assertIs(deduplicator, paginated.deduplicator)
+
+    def test_no_dedupe_by_default(self):
+        self.assertIsNone(Paginated(Url()).deduplicator)
@@ -0,0 +1,119 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import TestCase, skipUnless
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    PYARROW_AVAILABLE = False
+else:
+    PYARROW_AVAILABLE = True
+
+from demonoid.exporters import (FIELDS, INTEGER_FIELDS, CSVExporter, NDJSONExporter, ParquetExporter, export,
+                                guess_format, torrent_record)
+from demonoid.structures import List, Torrent
+from demonoid.urls import Url
+
+from .helpers import mock, mocked_response
+
+
+def make_torrent(index):
+    return Torrent(date(2015, 3, 5), '{0}/001075547600'.format(index), 'Torrent {0}'.format(index), 'Demonoid',
+                   'http://www.demonoid.pw/files/?category=3', 'http://www.demonoid.pw/files/details/{0}/'.format(index),
+                   'Movies', None, 'DVDRip', None, 'Sergesha', 'http://www.demonoid.pw/users/Sergesha',
+                   'http://www.demonoid.pw/files/download/{0}/'.format(index), '1.50 MB', 3, 10, index, 2)
+
+
+class ExporterTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.torrents = [make_torrent(index) for index in range(1, 6)]
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_torrent_record(self):
+        record = torrent_record(self.torrents[0])
+        self.assertEqual(FIELDS, tuple(field for field in FIELDS if field in record))
+        self.assertEqual('2015-03-05', record['date'])
+        self.assertIsNone(record['subcategory'])
+        self.assertEqual(1572864, record['size_in_bytes'])
+        self.assertIsNone(record['language'])
+
+    def parsed_torrents(self):
+        with mock.patch.object(Url, 'fetch', return_value=mocked_response()):
+            return List(Url()).items
+
+    def test_parsed_torrents_have_one_type_per_field(self):
+        records = [torrent_record(torrent) for torrent in self.parsed_torrents()]
+        for field in FIELDS:
+            expected = int if field in INTEGER_FIELDS else type(u'')
+            types = set(type(record[field]) for record in records if record[field] is not None)
+            self.assertLessEqual(types, set([expected]), field)
+        self.assertEqual(set([None]), set(record['subcategory'] for record in records))
+        self.assertIn(None, set(record['quality'] for record in records))
+        self.assertEqual(len(records), export(self.parsed_torrents(), self.path('crawl.ndjson')))
+
+    def test_csv(self):
+        self.assertEqual(5, export(iter(self.torrents), self.path('crawl.csv')))
+        with open(self.path('crawl.csv')) as exported:
+            rows = list(csv.DictReader(exported))
+        self.assertEqual(['1/001075547600', '2/001075547600'], [row['id'] for row in rows[:2]])
+        self.assertEqual(['1', '2', '3', '4', '5'], [row['seeders'] for row in rows])
+        self.assertEqual('', rows[0]['language'])
+
+    def test_gzipped_ndjson(self):
+        self.assertEqual(5, export(self.torrents, self.path('crawl.ndjson.gz'), fields=('id', 'seeders')))
+        with gzip.open(self.path('crawl.ndjson.gz'), 'rt') as exported:
+            records = [json.loads(line) for line in exported]
+        self.assertEqual({'id': '1/001075547600', 'seeders': 1}, records[0])
+        self.assertEqual(5, len(records))
+
+    def test_given_file_object_isnt_closed(self):
+        output = io.BytesIO()
+        with NDJSONExporter(output, fields=('id',), compression='bz2') as exporter:
+            exporter.write(self.torrents[:2])
+            exporter.write(self.torrents[2:])
+        self.assertEqual(5, exporter.count)
+        self.assertFalse(output.closed)
+        self.assertEqual(5, len(bz2.decompress(output.getvalue()).splitlines()))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            CSVExporter(io.BytesIO(), fields=('id', 'password'))
+        with self.assertRaises(ValueError):
+            export(self.torrents, self.path('crawl.txt'))
+        with self.assertRaises(ValueError):
+            export(self.torrents, io.BytesIO(), 'csv', compression='rar')
+
+    def test_guess_format(self):
+        self.assertEqual('csv', guess_format('crawl.CSV'))
+        self.assertEqual('ndjson', guess_format('/tmp/crawl.ndjson.xz'))
+        self.assertEqual('parquet', guess_format('crawl.parquet'))
+        self.assertIsNone(guess_format('crawl.gz'))
+
+    @skipUnless(PYARROW_AVAILABLE, 'needs pyarrow')
+    def test_parquet_row_groups(self):
+        with ParquetExporter(self.path('crawl.parquet'), row_group_size=2) as exporter:
+            exporter.write(self.torrents)
+        parquet_file = pyarrow.parquet.ParquetFile(self.path('crawl.parquet'))
+        self.assertEqual(3, parquet_file.num_row_groups)
+        table = parquet_file.read()
+        self.assertEqual([1, 2, 3, 4, 5], table.column('seeders').to_pylist())
+        self.assertEqual(list(FIELDS), table.schema.names)
+
+    @skipUnless(PYARROW_AVAILABLE, 'needs pyarrow')
+    def test_parquet_parsed_torrents(self):
+        torrents = self.parsed_torrents()
+        self.assertEqual(len(torrents), export(torrents, self.path('crawl.parquet')))
+        table = pyarrow.parquet.read_table(self.path('crawl.parquet'))
+        self.assertEqual([torrent.quality or None for torrent in torrents], table.column('quality').to_pylist())
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase, skipIf
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+@skipIf(sys.version_info < (3, 7), 'lazy module attributes need Python 3.7')
+class LazyImportTests(TestCase):
+    """
+        Test that heavy dependencies are imported on first use only, in fresh interpreters.
+    """
+
+    def loaded_modules(self, statements):
+        code = statements + '; import sys; print(" ".join(sorted(sys.modules)))'
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+        return set(output.decode().split())
+
+    def test_import_package_loads_nothing_heavy(self):
+        modules = self.loaded_modules('import demonoid')
+        for name in ('requests', 'lxml', 'demonoid.constants', 'demonoid.structures', 'demonoid.urls'):
+            self.assertNotIn(name, modules)
+
+    def test_import_client_defers_requests_and_lxml(self):
+        modules = self.loaded_modules('from demonoid import Demonoid')
+        self.assertIn('demonoid.structures', modules)
+        self.assertNotIn('requests', modules)
+        self.assertNotIn('lxml', modules)
+
+    def test_client_instance_loads_requests(self):
+        modules = self.loaded_modules('from demonoid import Demonoid; Demonoid()')
+        self.assertIn('requests', modules)
+
+    def test_lazy_attributes(self):
+        import demonoid
+        from demonoid.structures import Demonoid
+        self.assertIs(Demonoid, demonoid.Demonoid)
+        self.assertIn('Category', dir(demonoid))
+        with self.assertRaises(AttributeError):
+            demonoid.Missing
@@ -0,0 +1,73 @@
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from lxml import html
+
+from demonoid import layouts
+from demonoid.exceptions import UnknownLayoutException
+from demonoid.layouts import ANCHORED_LAYOUT, KNOWN_LAYOUT, detect_layout, register_layout
+from demonoid.structures import List
+from demonoid.urls import Url
+
+from .helpers import FIXTURE_CONTENT, mocked_response
+
+
+def shifted_content():
+    # an extra table before the torrents list table, as if Demonoid added a banner
+    dom = html.fromstring(FIXTURE_CONTENT)
+    list_table = dom.xpath('//*[@id="fslispc"]/table/tr/td[1]/table[6]')[0]
+    list_table.addprevious(html.fromstring('<table><tr><td>Banner</td></tr></table>'))
+    return html.tostring(dom)
+
+
+class DetectLayoutTests(TestCase):
+
+    def test_known_layout(self):
+        self.assertIs(KNOWN_LAYOUT, detect_layout(html.fromstring(FIXTURE_CONTENT)))
+
+    def test_shifted_layout_falls_back_to_anchored(self):
+        dom = html.fromstring(shifted_content())
+        self.assertFalse(KNOWN_LAYOUT.matches(dom))
+        self.assertIs(ANCHORED_LAYOUT, detect_layout(dom))
+        # a later page of the known layout gets the known layout back
+        self.assertIs(KNOWN_LAYOUT, detect_layout(html.fromstring(FIXTURE_CONTENT)))
+
+    def test_page_without_torrents(self):
+        self.assertIsNone(detect_layout(html.fromstring('<html><body><p>No torrents found</p></body></html>')))
+
+    def test_unknown_layout(self):
+        dom = html.fromstring(shifted_content())
+        with mock.patch.object(layouts, '_registry', [KNOWN_LAYOUT]):
+            with self.assertRaises(UnknownLayoutException):
+                detect_layout(dom)
+
+    def test_register_layout_before_anchored(self):
+        layout = layouts.Layout('test', 'boolean(//*[@id="test-layout"])')
+        with mock.patch.object(layouts, '_registry', [KNOWN_LAYOUT, ANCHORED_LAYOUT]):
+            register_layout(layout)
+            self.assertEqual([KNOWN_LAYOUT, layout, ANCHORED_LAYOUT], layouts._registry)
+            self.assertIs(layout, detect_layout(html.fromstring('<div id="test-layout"></div>')))
+
+
+class LayoutParsingTests(TestCase):
+
+    def items(self, content):
+        response = mocked_response(content)
+        with mock.patch.object(Url, 'fetch', return_value=response):
+            return List(Url()).items
+
+    def test_anchored_layout_parses_like_known_layout(self):
+        known = self.items(FIXTURE_CONTENT)
+        anchored = self.items(shifted_content())
+        self.assertEqual(50, len(anchored))
+        self.assertEqual([vars(torrent) for torrent in known], [vars(torrent) for torrent in anchored])
+
+    def test_anchored_layout_on_known_page(self):
+        dom = html.fromstring(FIXTURE_CONTENT)
+        groups = list(ANCHORED_LAYOUT.group_rows(ANCHORED_LAYOUT.get_rows(dom)))
+        self.assertEqual(50, len(groups))
@@ -0,0 +1,107 @@
+import logging
+from sys import version_info
+from threading import Thread
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+else:
+    import mock
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from demonoid.metrics import NULL_METRICS, NULL_TIMER, LoggingSink, Metrics, PrometheusSink
+from demonoid.structures import List
+from demonoid.urls import Url
+
+from .helpers import FIXTURE_CONTENT
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(FIXTURE_CONTENT)))
+        self.end_headers()
+        self.wfile.write(FIXTURE_CONTENT)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.metrics = Metrics([lambda *event: self.events.append(event)])
+
+    def test_timer_reports_duration(self):
+        with self.metrics.timer('stage'):
+            pass
+        self.assertEqual(1, len(self.events))
+        kind, name, value = self.events[0]
+        self.assertEqual((Metrics.TIMER, 'stage'), (kind, name))
+        self.assertGreaterEqual(value, 0)
+
+    def test_increment_reports_amount(self):
+        self.metrics.increment('bytes', 10)
+        self.assertEqual([(Metrics.COUNTER, 'bytes', 10)], self.events)
+
+    def test_null_metrics_are_turned_off(self):
+        self.assertFalse(NULL_METRICS.enabled)
+        self.assertIs(NULL_TIMER, NULL_METRICS.timer('stage'))
+        NULL_METRICS.increment('bytes')
+        NULL_METRICS.observe('stage', 1)
+        with NULL_METRICS.timer('stage'):
+            pass
+
+    def test_url_without_metrics_mounts_no_adapter(self):
+        u = Url()
+        self.assertIs(NULL_METRICS, u.metrics)
+        self.assertNotIn('InstrumentedAdapter', [type(adapter).__name__ for adapter in u._session.adapters.values()])
+
+    def test_fetch_and_parse_stages(self):
+        server = HTTPServer(('127.0.0.1', 0), FixtureHandler)
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        u = Url('http://127.0.0.1:{0}/'.format(server.server_port), metrics=self.metrics)
+        torrents = List(u).items
+
+        timers = [name for kind, name, _ in self.events if kind == Metrics.TIMER]
+        counters = dict((name, value) for kind, name, value in self.events if kind == Metrics.COUNTER)
+        for stage in ('fetch', 'fetch.connect', 'fetch.ttfb', 'fetch.download', 'dom.build', 'parser.rows'):
+            self.assertEqual(1, timers.count(stage), stage)
+        self.assertEqual(len(torrents), timers.count('parser.row'))
+        self.assertEqual(len(FIXTURE_CONTENT), counters['fetch.bytes'])
+        self.assertEqual(101, counters['parser.rows'])
+        self.assertEqual(50, counters['parser.torrents'])
+
+
+class SinksTests(TestCase):
+
+    def test_logging_sink(self):
+        logger = mock.Mock()
+        sink = LoggingSink(logger, logging.INFO)
+        sink(Metrics.TIMER, 'fetch', 0.5)
+        logger.log.assert_called_with(logging.INFO, '%s took %.6fs', 'fetch', 0.5)
+        sink(Metrics.COUNTER, 'fetch.bytes', 10)
+        logger.log.assert_called_with(logging.INFO, '%s +%s', 'fetch.bytes', 10)
+
+    def test_prometheus_sink_render(self):
+        sink = PrometheusSink()
+        metrics = Metrics([sink])
+        metrics.observe('fetch', 0.25)
+        metrics.observe('fetch', 0.5)
+        metrics.increment('fetch.bytes', 100)
+        metrics.increment('fetch.bytes', 20)
+        expected = ('# TYPE demonoid_fetch_seconds summary\n'
+                    'demonoid_fetch_seconds_count 2\n'
+                    'demonoid_fetch_seconds_sum 0.75\n'
+                    '# TYPE demonoid_fetch_bytes_total counter\n'
+                    'demonoid_fetch_bytes_total 120\n')
+        self.assertEqual(expected, sink.render())
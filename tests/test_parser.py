@@ -1,3 +1,4 @@
+import os
 from datetime import date, datetime
 from sys import version_info
 from unittest import TestCase
@@ -13,9 +14,13 @@ from requests import Session, HTTPError, Response
 
 from demonoid.constants import Category, Quality, Language
 from demonoid.parser import Parser
+from demonoid.recording import ReplayTransport
 from demonoid.urls import Url
 
 
+RECORDING_PATH = os.path.join(os.path.dirname(__file__), 'data', 'recording')
+
+
 class OfflineParserTests(TestCase):
     """
        Test Parser against offline HTML pages and with lots of mocked behavior.
@@ -23,7 +28,8 @@ class OfflineParserTests(TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.url = Url(path='files')
+        # the recorded /files page is replayed, so no network is needed
+        cls.url = Url(path='files', transport=ReplayTransport(RECORDING_PATH))
         cls.rows = Parser.get_torrents_rows(cls.url.DOM)
         cls.date_td = Parser.get_date_td(cls.rows[0])
 
@@ -84,10 +90,11 @@ class OfflineParserTests(TestCase):
         mocked_category_td = mock.Mock(**{'get.return_value': '/files/?uid=0&category=0&subcategory=0&language=0&seeded=0&quality=0&query=&sort='})
         mocked_torrent_anchor_td = mock.Mock(text=title, **{'get.return_value': torrent_url})
         mocked_tags = [mocked_category_td, mocked_torrent_anchor_td]
-        mocked_first_row = mock.Mock(**{'xpath.return_value': mocked_tags})
+        mocked_first_row = mock.Mock()
+        mocked_selectors = mock.Mock(**{'first_row.return_value': mocked_tags})
 
-        result = Parser.parse_first_row(mocked_first_row, self.url)
-        mocked_first_row.xpath.assert_called_with(Parser.FIRST_ROW_XPATH)
+        result = Parser.parse_first_row(mocked_first_row, self.url, mocked_selectors)
+        mocked_selectors.first_row.assert_called_with(mocked_first_row)
         self.assertEqual(5, len(result))
         self.assertEqual('012345/012345678901', result[0])
         self.assertEqual(title, result[1])
@@ -108,10 +115,11 @@ class OfflineParserTests(TestCase):
         mocked_category_td = mock.Mock(**{'get.return_value': '/files/?uid=0&category=0&subcategory=0&language=0&seeded=0&quality=0&query=&sort='})
         mocked_torrent_anchor_td = mock.Mock(text=title, **{'get.return_value': torrent_url})
         mocked_tags = [mocked_category_td, mocked_torrent_anchor_td, 'give external property!']
-        mocked_first_row = mock.Mock(**{'xpath.return_value': mocked_tags})
+        mocked_first_row = mock.Mock()
+        mocked_selectors = mock.Mock(**{'first_row.return_value': mocked_tags})
 
-        result = Parser.parse_first_row(mocked_first_row, self.url)
-        mocked_first_row.xpath.assert_called_with(Parser.FIRST_ROW_XPATH)
+        result = Parser.parse_first_row(mocked_first_row, self.url, mocked_selectors)
+        mocked_selectors.first_row.assert_called_with(mocked_first_row)
         self.assertEqual(5, len(result))
         self.assertEqual('012345/012345678901', result[0])
         self.assertEqual(title, result[1])
@@ -125,16 +133,17 @@ class OfflineParserTests(TestCase):
         self.assertEqual(5, len(online_result))
 
     @mock.patch('demonoid.parser.Parser.parse_torrent_link', return_value='http://www.demonoid.pw/files/download/1234567/')
-    @mock.patch('demonoid.parser.Parser.parse_torrent_properties', return_value=['Audio books', 'Adventure', 'AAC', 'Bulgarian'])
+    @mock.patch('demonoid.parser.Parser.parse_torrent_properties', return_value={'category': 'Audio books', 'subcategory': 'Adventure',
+                                                                                 'quality': 'AAC', 'language': 'Bulgarian'})
     def test_parse_second_row(self, patched_parse_torrent_properties, patched_parse_torrent_link):
         mocked_user_anchor = mock.Mock(**{'text_content.return_value': 'example', 'get.return_value': '/users/example'})
         mocked_user_info = mock.Mock(**{'find.return_value': mocked_user_anchor})
 
         mocked_size = mock.Mock(text='1.47GB')
-        mocked_comments = mock.Mock(text=0)
-        mocked_times_completed = mock.Mock(text=1)
-        mocked_seeders = mock.Mock(text=5)
-        mocked_leechers = mock.Mock(text=10)
+        mocked_comments = mock.Mock(**{'text_content.return_value': '0'})
+        mocked_times_completed = mock.Mock(**{'text_content.return_value': '1'})
+        mocked_seeders = mock.Mock(**{'text_content.return_value': ' 5 '})
+        mocked_leechers = mock.Mock(**{'text_content.return_value': '1,010'})
 
         mocked_tags = ['properties', mocked_user_info, 'torrent link',
                        mocked_size, mocked_comments, mocked_times_completed, mocked_seeders, mocked_leechers]
@@ -158,10 +167,10 @@ class OfflineParserTests(TestCase):
         self.assertEqual(self.url.combine('/users/example'), result[5])
         self.assertEqual(patched_parse_torrent_link.return_value, result[6])
         self.assertEqual(mocked_size.text, result[7])
-        self.assertEqual(mocked_comments.text, result[8])
-        self.assertEqual(mocked_times_completed.text, result[9])
-        self.assertEqual(mocked_seeders.text, result[10])
-        self.assertEqual(mocked_leechers.text, result[11])
+        self.assertEqual(0, result[8])
+        self.assertEqual(1, result[9])
+        self.assertEqual(5, result[10])
+        self.assertEqual(1010, result[11])
         # assert online version returns correct amount of properties
         online_result = Parser.parse_second_row(self.rows[2], self.url)
         self.assertEqual(12, len(online_result))
@@ -214,6 +223,16 @@ class OfflineParserTests(TestCase):
         mocked_anchor.get.assert_called_with('href')
         self.assertEqual(url, result)
 
+    def test_parse_count(self):
+        self.assertEqual(12, Parser.parse_count(mock.Mock(**{'text_content.return_value': '12'})))
+        self.assertIsNone(Parser.parse_count(mock.Mock(**{'text_content.return_value': 'N/A'})))
+
+    def test_parse_size(self):
+        self.assertEqual(int(9.21 * 1024 ** 3), Parser.parse_size('9.21 GB'))
+        self.assertEqual(1536, Parser.parse_size('1.5KB'))
+        self.assertIsNone(Parser.parse_size('9.21 parsecs'))
+        self.assertIsNone(Parser.parse_size(None))
+
     def test_is_subcategory(self):
         params = {'category': 0, 'subcategory': 0, 'quality': 0, 'seeded': 2, 'external': 2, 'query': '', 'sort': ''}
         self.assertFalse(Parser.is_subcategory(params))
@@ -232,6 +251,11 @@ class OfflineParserTests(TestCase):
         params['language'] = Language.BULGARIAN
         self.assertTrue(Parser.is_language(params))
 
+    def test_parse_pagination(self):
+        # the pagination links to pages 2 to 16 of 50 torrents, out of 600,652 torrents
+        self.assertEqual((16, 50, 600652), Parser.parse_pagination(self.url.DOM))
+        self.assertEqual((None, None, None), Parser.parse_pagination(Url.build_DOM(b'<html><body><p>Nothing</p></body></html>')))
+
 
 class OnlineParserTests(TestCase):
     """
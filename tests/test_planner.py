@@ -0,0 +1,98 @@
+from datetime import date
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from demonoid.constants import Category, SortBy
+from demonoid.planner import QueryPlan, categories, date_order_key
+from demonoid.structures import Demonoid
+from demonoid.urls import Url
+
+from .helpers import EMPTY_CONTENT, FIXTURE_CONTENT, mocked_response
+
+
+# the same torrents under other ids, as if they were posted in another category
+OTHER_CONTENT = FIXTURE_CONTENT.replace(b'/files/details/31', b'/files/details/41')
+
+
+def torrent(torrent_id, day):
+    return mock.Mock(id='{0}/001075547600'.format(torrent_id), date=date(2014, 5, day))
+
+
+class QueryPlanTests(TestCase):
+
+    def test_categories(self):
+        values = categories()
+        self.assertEqual(12, len(values))
+        self.assertNotIn(Category.ALL.value, values)
+
+    def test_is_split(self):
+        demonoid = Demonoid()
+        self.assertTrue(QueryPlan(demonoid, query='ubuntu').is_split)
+        self.assertFalse(QueryPlan(demonoid, category=Category.MUSIC.value).is_split)
+        self.assertFalse(QueryPlan(demonoid, sort=SortBy.SEEDERS).is_split)
+        self.assertEqual(1, len(QueryPlan(demonoid, sort=SortBy.SEEDERS).sub_searches()))
+
+    def test_sub_searches_per_category(self):
+        sub_searches = QueryPlan(Demonoid(), query='ubuntu').sub_searches()
+        self.assertEqual(categories(), [sub_search._url.params['category'] for sub_search in sub_searches])
+        self.assertTrue(all(sub_search.query == 'ubuntu' for sub_search in sub_searches))
+
+    def test_merge_keeps_date_order(self):
+        streams = [iter([torrent(9, 3), torrent(4, 2)]),
+                   iter([]),
+                   iter([torrent(7, 3), torrent(8, 3), torrent(5, 2), torrent(1, 1)])]
+        merged = QueryPlan.merge(streams)
+        self.assertEqual(['9', '7', '8', '4', '5', '1'], [item.id.split('/')[0] for item in merged])
+
+    def test_parallel_crawl_merges_categories(self):
+        music = Category.MUSIC.value
+        games = Category.GAMES.value
+
+        def fetch(url):
+            page, category = url.params['page'], url.params['category']
+            if page == 1 and category == music:
+                content = FIXTURE_CONTENT
+            elif page == 1 and category == games:
+                content = OTHER_CONTENT
+            else:
+                content = EMPTY_CONTENT
+            return mocked_response(content)
+
+        with mock.patch.object(Url, 'fetch', autospec=True, side_effect=fetch) as patched_fetch:
+            items = list(Demonoid().plan(concurrency=2))
+        self.assertEqual(100, len(items))
+        self.assertEqual(sorted(items, key=date_order_key), items)
+        self.assertEqual(len(set(torrent.id for torrent in items)), len(items))
+        # a single page for the empty categories, two pages for the others
+        self.assertEqual(len(categories()) + 2, patched_fetch.call_count)
+
+    def test_page_of_split_query_is_sliced_from_the_merge(self):
+        music = Category.MUSIC.value
+        games = Category.GAMES.value
+
+        def fetch(url):
+            page, category = url.params['page'], url.params['category']
+            if page == 1 and category in (music, games):
+                content = FIXTURE_CONTENT if category == music else OTHER_CONTENT
+            else:
+                content = EMPTY_CONTENT
+            return mocked_response(content)
+
+        with mock.patch.object(Url, 'fetch', autospec=True, side_effect=fetch) as patched_fetch:
+            items = list(Demonoid().plan(page=2))
+        # every sub-search starts from its first page, the merge skips the first page of 50 torrents
+        self.assertEqual({1, 2}, set(call[0][0].params['page'] for call in patched_fetch.call_args_list))
+        self.assertEqual(50, len(items))
+        with mock.patch.object(Url, 'fetch', autospec=True, side_effect=fetch):
+            all_items = list(Demonoid().plan())
+        self.assertEqual([torrent.id for torrent in all_items[50:]], [torrent.id for torrent in items])
+
+    def test_failure_is_raised_to_the_consumer(self):
+        with mock.patch.object(Url, 'fetch', side_effect=ValueError('boom')):
+            with self.assertRaises(ValueError):
+                list(Demonoid().plan())
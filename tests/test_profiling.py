@@ -0,0 +1,129 @@
+import os
+import shutil
+import sys
+import tempfile
+from sys import version_info
+import time
+from multiprocessing.pool import ThreadPool
+from threading import Event, Thread
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from demonoid.profiling import Profiler
+from demonoid.structures import Demonoid, List
+from demonoid.urls import Url
+
+from .helpers import mocked_response
+
+
+class ProfilerTests(TestCase):
+
+    def setUp(self):
+        response = mocked_response()
+        self.fetch_patcher = mock.patch.object(Url, 'fetch', return_value=response)
+        self.fetch_patcher.start()
+        self.addCleanup(self.fetch_patcher.stop)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def calls(self, profiler):
+        return dict((name.split(':')[1], calls) for name, calls, _, _ in profiler.stats())
+
+    def test_context_manager_traces_package_functions_only(self):
+        with Profiler() as profiler:
+            List(Url()).items
+            sorted([3, 2, 1])
+        calls = self.calls(profiler)
+        self.assertEqual(50, calls['Parser.parse_first_row'])
+        self.assertEqual(50, calls['Parser.parse_second_row'])
+        self.assertEqual(50, calls['List._build_torrent'])
+        self.assertEqual(1, calls['List._build_torrents'])
+        self.assertTrue(all(name.startswith('demonoid.') for name, _, _, _ in profiler.stats()))
+
+    def test_parse_costs(self):
+        with Profiler() as profiler:
+            List(Url()).items
+        names = [name for name, _, _, _ in profiler.parse_costs()]
+        self.assertIn('demonoid.parser:Parser.parse_date', names)
+        self.assertIn('demonoid.structures:List._build_torrents', names)
+        self.assertIn('demonoid.layouts:Layout.group_rows', names)
+        self.assertNotIn('demonoid.urls:Url.update_DOM', names)
+        for _, _, total, own in profiler.parse_costs():
+            self.assertLessEqual(own, total + 1e-9)
+        self.assertIn('Parser.parse_first_row', profiler.format_report())
+
+    def test_write_collapsed(self):
+        with Profiler() as profiler:
+            List(Url()).items
+        path = os.path.join(self.directory, 'crawl.folded')
+        self.assertGreater(profiler.write_collapsed(path), 0)
+        with open(path) as collapsed:
+            lines = collapsed.read().splitlines()
+        stacks = [line.rsplit(' ', 1)[0].split(';') for line in lines]
+        self.assertIn(['demonoid.structures:List.items', 'demonoid.structures:List._update_torrents',
+                       'demonoid.structures:List._fetch_torrents', 'demonoid.structures:List._parse_page',
+                       'demonoid.structures:List._build_torrents', 'demonoid.structures:List._build_torrent',
+                       'demonoid.layouts:Layout.parse_torrent', 'demonoid.parser:Parser.parse_first_row'], stacks)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+    def test_nested_start_is_reentrant(self):
+        profiler = Profiler()
+        with profiler:
+            with profiler:
+                pass
+            List(Url()).items
+        self.assertEqual(50, self.calls(profiler)['List._build_torrent'])
+
+    def test_stop_from_another_thread_removes_every_hook(self):
+        profiler = Profiler()
+        started, stopped = Event(), Event()
+        hooks = []
+
+        def traced():
+            profiler.start()
+            started.set()
+            stopped.wait(5)
+            hooks.append(sys.getprofile())
+
+        thread = Thread(target=traced)
+        thread.start()
+        started.wait(5)
+        # a thread started while tracing gets the hook too
+        late_thread = Thread(target=lambda: (stopped.wait(5), hooks.append(sys.getprofile())))
+        late_thread.start()
+        profiler.stop()
+        stopped.set()
+        thread.join()
+        late_thread.join()
+        self.assertEqual([None, None], hooks)
+
+    def test_threads_running_before_tracing_are_traced(self):
+        response = mocked_response()
+
+        def slow_fetch(*args, **kwargs):
+            # the pages' loads overlap, so every thread but the first starts the held profiler
+            time.sleep(0.05)
+            return response
+
+        pool = ThreadPool(8)
+        self.addCleanup(pool.close)
+        search = Demonoid(profile=True).search(query='banana')
+        with mock.patch.object(Url, 'fetch', side_effect=slow_fetch):
+            pages = pool.map(lambda number: len(search.page_at(number)), range(1, 9))
+        self.assertEqual([50] * 8, pages)
+        calls = self.calls(search._profiler)
+        self.assertEqual(8, calls['List._parse_page'])
+        self.assertEqual(400, calls['List._build_torrent'])
+        self.assertIsNone(pool.apply(sys.getprofile))
+
+    def test_demonoid_profile_mode(self):
+        demonoid = Demonoid(profile=True)
+        self.assertIsInstance(demonoid.profiler, Profiler)
+        search = demonoid.search(query='banana')
+        self.assertEqual(50, len(search.items))
+        self.assertEqual(50, self.calls(demonoid.profiler)['Parser.parse_second_row'])
+        self.assertIsNone(Demonoid().profiler)
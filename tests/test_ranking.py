@@ -0,0 +1,83 @@
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from demonoid.constants import SortBy
+from demonoid.ranking import field_key, is_server_sorted, merge_sorted, top
+from demonoid.structures import Demonoid
+from demonoid.urls import Url
+
+from .helpers import EMPTY_CONTENT, mocked_response
+
+
+def torrents(*seeders):
+    return [mock.Mock(id=str(index), seeders=count) for index, count in enumerate(seeders)]
+
+
+class RankingTests(TestCase):
+
+    def test_field_key_rejects_other_fields(self):
+        with self.assertRaises(ValueError):
+            field_key('title')
+
+    def test_top_keeps_largest(self):
+        result = top(iter(torrents(3, None, 10, 7, 1)), 3)
+        self.assertEqual([10, 7, 3], [torrent.seeders for torrent in result])
+
+    def test_top_smallest_puts_missing_last(self):
+        result = top(torrents(3, None, 10), 3, largest=False)
+        self.assertEqual([3, 10, None], [torrent.seeders for torrent in result])
+
+    def test_merge_sorted(self):
+        merged = merge_sorted([torrents(9, 4, 1), torrents(), torrents(8, 5, 4)])
+        self.assertEqual([9, 8, 5, 4, 4, 1], [torrent.seeders for torrent in merged])
+
+
+class SearchRankingTests(TestCase):
+
+    def setUp(self):
+        self.fetch_patcher = mock.patch.object(Url, 'fetch', autospec=True)
+        self.patched_fetch = self.fetch_patcher.start()
+        self.addCleanup(self.fetch_patcher.stop)
+        self.patched_fetch.side_effect = [mocked_response() for _ in range(3)] + [mocked_response(EMPTY_CONTENT)]
+
+    def test_top_crawls_unsorted_search(self):
+        search = Demonoid().search(multipage=True, sort=SortBy.SEEDERS.DESCENDING)
+        result = top(search, 5, field='leechers')
+        self.assertEqual(4, self.patched_fetch.call_count)
+        self.assertEqual(5, len(result))
+        leechers = [torrent.leechers for torrent in result]
+        self.assertEqual(sorted(leechers, reverse=True), leechers)
+        self.assertFalse(is_server_sorted(search, 'leechers'))
+
+    def test_top_stops_early_on_server_sorted_search(self):
+        search = Demonoid().search(multipage=True, sort=SortBy.SEEDERS.DESCENDING)
+        self.assertTrue(is_server_sorted(search, 'seeders'))
+        self.assertEqual(60, len(top(search, 60)))
+        self.assertEqual(2, self.patched_fetch.call_count)
+
+    def test_top_switches_date_sorted_search_to_server_sort(self):
+        search = Demonoid().search()
+        self.assertEqual(10, len(top(search, 10, field='times_completed', largest=False)))
+        self.assertEqual(SortBy.COMPLETED.ASCENDING, self.patched_fetch.call_args[0][0].params['sort'])
+        self.assertEqual(1, self.patched_fetch.call_count)
+        # a copy was switched, the search still lets the server sort it otherwise
+        self.assertEqual(SortBy.DATE, search.sort)
+        self.assertTrue(search.use_server_sort('seeders'))
+
+    def test_top_ranks_every_page_of_single_page_search(self):
+        search = Demonoid().search(sort=SortBy.SEEDERS.DESCENDING)
+        self.assertEqual(5, len(top(search, 5, field='leechers')))
+        self.assertEqual(4, self.patched_fetch.call_count)
+
+    def test_merge_sorted_switches_searches_to_server_sort(self):
+        searches = [Demonoid().search(multipage=True, query=query) for query in ('one', 'two')]
+        merged = merge_sorted(searches, field='size_in_bytes')
+        next(merged)
+        self.assertEqual([SortBy.SIZE.DESCENDING] * 2, [call[0][0].params['sort'] for call in self.patched_fetch.call_args_list])
+        self.assertEqual(2, self.patched_fetch.call_count)
+        self.assertEqual([SortBy.DATE] * 2, [search.sort for search in searches])
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from demonoid.exceptions import RecordingNotFoundException
+from demonoid.recording import CachingTransport, Recording, RecordingTransport, ReplayTransport
+from demonoid.structures import Paginated
+from demonoid.transports import Transport
+from demonoid.urls import Url
+
+from .helpers import EMPTY_CONTENT, FIXTURE_CONTENT
+
+
+RECORDING_PATH = os.path.join(os.path.dirname(__file__), 'data', 'recording')
+
+
+def record_pages(directory, pages):
+    # `pages` fixture pages followed by an empty page, as a multipage crawl sees them
+    recording = Recording(directory)
+    headers = {'Content-Type': 'text/html; charset=utf-8', 'Content-Encoding': 'gzip'}
+    for page in range(1, pages + 2):
+        content = FIXTURE_CONTENT if page <= pages else EMPTY_CONTENT
+        recording.save(Url.DEFAULT_BASE_URL, {'page': page}, 200, headers, content)
+    return recording
+
+
+class RecordingTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_bodies_are_content_addressed(self):
+        recording = record_pages(self.directory, 3)
+        self.assertEqual(4, len(recording))
+        # 3 equal fixture pages and the empty page
+        self.assertEqual(3, len(os.listdir(self.directory)))
+        self.assertIn('http://www.demonoid.pw/?page=2', recording)
+
+    def test_load(self):
+        record_pages(self.directory, 1)
+        status_code, headers, content = Recording(self.directory).load(Url.DEFAULT_BASE_URL, {'page': 1})
+        self.assertEqual(200, status_code)
+        self.assertEqual({'Content-Type': 'text/html; charset=utf-8'}, headers)
+        self.assertEqual(FIXTURE_CONTENT, content)
+        self.assertIsNone(Recording(self.directory).load(Url.DEFAULT_BASE_URL, {'page': 7}))
+
+    def test_index_is_appended_to(self):
+        record_pages(self.directory, 2)
+        Recording(self.directory).save(Url.DEFAULT_BASE_URL, {'page': 1}, 200, {}, EMPTY_CONTENT)
+        with open(os.path.join(self.directory, Recording.INDEX_NAME), 'ab') as index:
+            index.write(b'{"url": "http://www.demonoid.pw/?page=9", "sta')
+        with open(os.path.join(self.directory, Recording.INDEX_NAME), 'rb') as index:
+            self.assertEqual(5, len(index.read().splitlines()))
+        # the later line of page 1 wins and the torn line is ignored
+        recording = Recording(self.directory)
+        self.assertEqual(3, len(recording))
+        self.assertEqual(EMPTY_CONTENT, recording.load(Url.DEFAULT_BASE_URL, {'page': 1})[2])
+
+    def test_legacy_index_is_read(self):
+        self.assertEqual(1, len(Recording(RECORDING_PATH)))
+
+    def test_recording_transport(self):
+        transport = mock.Mock(spec=Transport)
+        transport.get.side_effect = [
+            ReplayTransport.build_response(Url.DEFAULT_BASE_URL, 200, {'ETag': '"v1"'}, FIXTURE_CONTENT),
+            ReplayTransport.build_response(Url.DEFAULT_BASE_URL, 304, {}, b'')]
+        recording_transport = RecordingTransport(self.directory, transport)
+        recording_transport.get(Url.DEFAULT_BASE_URL, {'page': 1})
+        recording_transport.get(Url.DEFAULT_BASE_URL, {'page': 1}, {'If-None-Match': '"v1"'})
+        self.assertEqual((200, {'ETag': '"v1"'}, FIXTURE_CONTENT), Recording(self.directory).load(Url.DEFAULT_BASE_URL, {'page': 1}))
+
+    def test_caching_transport(self):
+        transport = mock.Mock(spec=Transport)
+        transport.get.side_effect = [
+            ReplayTransport.build_response(Url.DEFAULT_BASE_URL, 503, {}, b'Busy'),
+            ReplayTransport.build_response(Url.DEFAULT_BASE_URL, 200, {}, FIXTURE_CONTENT)]
+        caching_transport = CachingTransport(self.directory, transport)
+        self.assertEqual(503, caching_transport.get(Url.DEFAULT_BASE_URL, {'page': 1}).status_code)
+        self.assertEqual(FIXTURE_CONTENT, caching_transport.get(Url.DEFAULT_BASE_URL, {'page': 1}).content)
+        self.assertEqual(FIXTURE_CONTENT, caching_transport.get(Url.DEFAULT_BASE_URL, {'page': 1}).content)
+        self.assertEqual(2, transport.get.call_count)
+
+
+class ReplayTransportTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        record_pages(self.directory, 3)
+        self.sleep = mock.Mock()
+
+    def test_multipage_crawl_is_replayed(self):
+        transport = ReplayTransport(self.directory, sleep=self.sleep)
+        paginated = Paginated(Url(transport=transport), multipage=True)
+        self.assertEqual(150, len(paginated.items))
+        self.assertFalse(self.sleep.called)
+
+    def test_latency_and_bandwidth_are_simulated(self):
+        transport = ReplayTransport(self.directory, latency=0.05, bandwidth=len(FIXTURE_CONTENT) * 10, sleep=self.sleep)
+        response = transport.get(Url.DEFAULT_BASE_URL, {'page': 1})
+        self.sleep.assert_called_once_with(0.05 + 0.1)
+        self.assertEqual(0.05, response.elapsed.total_seconds())
+        self.assertEqual('text/html; charset=utf-8', response.headers['content-type'])
+
+    def test_missing_response_raises(self):
+        with self.assertRaises(RecordingNotFoundException):
+            ReplayTransport(self.directory).get(Url.DEFAULT_BASE_URL, {'page': 99})
@@ -0,0 +1,100 @@
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from requests import ConnectionError
+
+from demonoid.cache import TTLCache
+from demonoid.resolvers import Resolver
+
+
+def mocked_response(url, status_code=200):
+    return mock.Mock(url=url, status_code=status_code)
+
+
+class TTLCacheTests(TestCase):
+
+    def setUp(self):
+        self.now = 100
+        self.cache = TTLCache(10, clock=lambda: self.now)
+
+    def test_get_before_expiry(self):
+        self.cache.set('key', 'value')
+        self.now += 9
+        self.assertEqual('value', self.cache.get('key'))
+        self.assertIn('key', self.cache)
+
+    def test_get_after_expiry(self):
+        self.cache.set('key', 'value')
+        self.now += 10
+        self.assertIsNone(self.cache.get('key'))
+        self.assertNotIn('key', self.cache)
+
+    def test_expire_drops_only_expired_entries(self):
+        self.cache.set('old', 1)
+        self.now += 5
+        self.cache.set('new', 2)
+        self.now += 5
+        self.assertEqual(1, self.cache.expire())
+        self.assertEqual(1, len(self.cache))
+
+    def test_no_ttl_never_expires(self):
+        cache = TTLCache(None, clock=lambda: self.now)
+        cache.set('key', 'value')
+        self.now += 10 ** 9
+        self.assertEqual('value', cache.get('key'))
+
+
+class ResolverTests(TestCase):
+
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.head.side_effect = lambda link, **kwargs: mocked_response(link + 'final/')
+        self.resolver = Resolver(session=self.session, pool_size=4)
+
+    def test_resolve_follows_redirects_with_head(self):
+        link = 'http://www.demonoid.pw/files/download/3163982/'
+        self.assertEqual(link + 'final/', self.resolver.resolve(link))
+        self.session.head.assert_called_with(link, allow_redirects=True, timeout=Resolver.DEFAULT_TIMEOUT)
+        self.assertFalse(self.session.get.called)
+
+    def test_resolve_falls_back_to_get_when_head_is_unsupported(self):
+        link = 'http://www.demonoid.pw/files/download/3163982/'
+        self.session.head.side_effect = lambda link, **kwargs: mocked_response(link, 405)
+        self.session.get.return_value = mocked_response(link + 'final/')
+        self.assertEqual(link + 'final/', self.resolver.resolve(link))
+        self.session.get.assert_called_with(link, allow_redirects=True, stream=True, timeout=Resolver.DEFAULT_TIMEOUT)
+        self.assertTrue(self.session.get.return_value.close.called)
+
+    def test_resolve_caches_by_source_link(self):
+        link = 'http://www.demonoid.pw/files/download/3163982/'
+        self.resolver.resolve(link)
+        self.resolver.resolve(link)
+        self.assertEqual(1, self.session.head.call_count)
+
+    def test_resolve_leaves_magnet_links_alone(self):
+        link = 'magnet:?xt=urn:btih:0123456789abcdef'
+        self.assertEqual(link, self.resolver.resolve(link))
+        self.assertFalse(self.session.head.called)
+
+    def test_resolve_gives_source_link_back_on_failure(self):
+        link = 'http://www.demonoid.pw/files/download/3163982/'
+        self.session.head.side_effect = ConnectionError()
+        self.assertEqual(link, self.resolver.resolve(link))
+        self.assertNotIn(link, self.resolver._cache)
+
+    def test_resolve_all_keeps_order_and_resolves_duplicates_once(self):
+        links = ['http://www.demonoid.pw/files/download/{0}/'.format(i) for i in range(10)]
+        result = self.resolver.resolve_all(links + links[:3])
+        self.assertEqual([link + 'final/' for link in links + links[:3]], result)
+        self.assertEqual(10, self.session.head.call_count)
+
+    def test_resolve_torrents(self):
+        torrents = [mock.Mock(torrent_link='http://www.demonoid.pw/files/download/1/'),
+                    mock.Mock(torrent_link='magnet:?xt=urn:btih:0123456789abcdef')]
+        result = self.resolver.resolve_torrents(torrents)
+        self.assertEqual(['http://www.demonoid.pw/files/download/1/final/', 'magnet:?xt=urn:btih:0123456789abcdef'], result)
@@ -0,0 +1,501 @@
+import gc
+import os
+import re
+from sys import version_info
+from unittest import TestCase, skipUnless
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from demonoid.constants import SortBy
+from demonoid.dedup import Deduplicator
+from demonoid.exceptions import HeadReachedException
+from demonoid.metrics import Metrics
+from demonoid.structures import Demonoid, List, Paginated, RowError, Search, Torrent
+from demonoid.synthetic import MockServer, PageGenerator
+from demonoid.urls import Url
+
+from .helpers import EMPTY_CONTENT, FIXTURE_CONTENT, mocked_response, pages_responses
+
+
+STATM_PATH = '/proc/self/statm'
+
+# the 2nd torrent's details link lost its href, so its first row can't be parsed
+MALFORMED_CONTENT = FIXTURE_CONTENT.replace(b'<a href="/files/details/3163902/001075547600/" >', b'<a>', 1)
+
+# the date row heading every torrent has a date that doesn't exist
+MALFORMED_DATE_CONTENT = FIXTURE_CONTENT.replace(b'>Added today<', b'>Added on Caturday, Smarch 13, 2015<', 1)
+
+
+def current_rss():
+    with open(STATM_PATH) as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class ListTests(TestCase):
+
+    def setUp(self):
+        self.url = Url()
+        self.fetch_patcher = mock.patch.object(Url, 'fetch', return_value=mocked_response())
+        self.patched_fetch = self.fetch_patcher.start()
+        self.addCleanup(self.fetch_patcher.stop)
+
+    def test_items_are_built_from_row_pairs(self):
+        items = List(self.url).items
+        self.assertEqual(50, len(items))
+        self.assertTrue(all(isinstance(torrent, Torrent) for torrent in items))
+        self.assertEqual('3163982/001075547600', items[0].id)
+        self.assertEqual('Sergesha', items[0].user)
+        self.assertEqual('http://www.demonoid.pw/files/download/3163982/', items[0].torrent_link)
+
+    def test_items_release_the_DOM(self):
+        List(self.url).items
+        self.assertIsNone(self.url._DOM)
+
+    def test_malformed_row_raises_by_default(self):
+        self.patched_fetch.return_value = mocked_response(MALFORMED_CONTENT)
+        with self.assertRaises(AttributeError):
+            List(self.url).items
+
+    def test_tolerant_list_skips_malformed_rows(self):
+        self.patched_fetch.return_value = mocked_response(MALFORMED_CONTENT)
+        torrents_list = List(self.url, tolerant=True)
+        items = torrents_list.items
+        self.assertEqual(49, len(items))
+        self.assertNotIn('3163902/001075547600', [torrent.id for torrent in items])
+        self.assertEqual(1, len(torrents_list.errors))
+        error = torrents_list.errors[0]
+        self.assertIsInstance(error, RowError)
+        self.assertIsInstance(error.exception, AttributeError)
+        self.assertIn('<a>FC3</a>', error.html)
+        self.assertIn('/users/', error.html)
+
+    def test_tolerant_list_reports_malformed_date_rows(self):
+        self.patched_fetch.return_value = mocked_response(MALFORMED_DATE_CONTENT)
+        with self.assertRaises(ValueError):
+            List(self.url).items
+        torrents_list = List(self.url, tolerant=True)
+        self.assertEqual([], torrents_list.items)
+        # the date row, then every torrent it dated
+        self.assertEqual(51, len(torrents_list.errors))
+        self.assertIn('Smarch', torrents_list.errors[0].html)
+        self.assertIsNone(torrents_list.errors[0].date)
+        self.assertTrue(all(isinstance(error.exception, ValueError) for error in torrents_list.errors))
+
+
+class ConditionalListTests(TestCase):
+
+    def setUp(self):
+        self.url = Url(page_cache=True)
+        self.session_patcher = mock.patch.object(self.url.transport, 'session')
+        self.session = self.session_patcher.start()
+        self.addCleanup(self.session_patcher.stop)
+        response = mocked_response()
+        response.status_code = 200
+        response.headers['ETag'] = '"v1"'
+        self.session.get.return_value = response
+
+    def test_not_modified_page_reuses_parsed_torrents(self):
+        first = List(self.url).items
+        self.session.get.return_value = mock.Mock(status_code=304, content=b'', headers={})
+        with mock.patch('demonoid.structures.detect_layout') as patched_detect_layout:
+            second = List(self.url).items
+        self.assertFalse(patched_detect_layout.called)
+        self.assertEqual([torrent.id for torrent in first], [torrent.id for torrent in second])
+        self.assertEqual({'If-None-Match': '"v1"'}, self.session.get.call_args[1]['headers'])
+        self.assertEqual(1, self.url.page_cache.stats['not_modified'])
+
+    def test_modified_page_is_parsed_again(self):
+        List(self.url).items
+        self.session.get.return_value = mocked_response(EMPTY_CONTENT)
+        self.assertEqual([], List(self.url).items)
+        self.assertEqual(0, self.url.page_cache.stats['not_modified'])
+
+    def test_page_failing_to_parse_keeps_former_validators(self):
+        List(self.url).items
+        response = mocked_response(MALFORMED_CONTENT)
+        response.status_code = 200
+        response.headers['ETag'] = '"v2"'
+        self.session.get.return_value = response
+        with self.assertRaises(AttributeError):
+            List(self.url).items
+        # the failed page isn't vouched for, so the next request can't be answered with stale torrents
+        with self.assertRaises(AttributeError):
+            List(self.url).items
+        self.assertEqual({'If-None-Match': '"v1"'}, self.session.get.call_args[1]['headers'])
+
+    def test_tolerant_partial_page_isnt_cached(self):
+        response = mocked_response(MALFORMED_CONTENT)
+        response.status_code = 200
+        response.headers['ETag'] = '"v2"'
+        self.session.get.return_value = response
+        self.assertEqual(49, len(List(self.url, tolerant=True).items))
+        # nothing was stored, so the next request isn't conditional
+        List(self.url, tolerant=True).items
+        self.assertIsNone(self.session.get.call_args[1]['headers'])
+        self.assertEqual(0, self.url.page_cache.stats['parsed'])
+
+    def test_other_page_isnt_conditional(self):
+        List(self.url).items
+        self.url.params['page'] = 2
+        List(self.url).items
+        self.assertIsNone(self.session.get.call_args[1]['headers'])
+
+
+class UnchangedListTests(TestCase):
+
+    def setUp(self):
+        self.url = Url(page_cache=True)
+        self.fetch_patcher = mock.patch.object(Url, 'fetch', return_value=mocked_response())
+        self.patched_fetch = self.fetch_patcher.start()
+        self.addCleanup(self.fetch_patcher.stop)
+
+    def test_unchanged_rows_reuse_built_torrents(self):
+        first = List(self.url).items
+        # only the markup around the torrents list changed
+        self.patched_fetch.return_value = mocked_response(FIXTURE_CONTENT.replace(b'</body>', b'<div>New ad</div></body>', 1))
+        with mock.patch.object(List, '_build_torrents') as patched_build_torrents:
+            second = List(self.url).items
+        self.assertFalse(patched_build_torrents.called)
+        self.assertEqual([torrent.id for torrent in first], [torrent.id for torrent in second])
+        self.assertEqual({'not_modified': 0, 'unchanged': 1, 'parsed': 1, 'hit_rate': 0.5}, self.url.page_cache.stats)
+
+    def test_changed_rows_are_built_again(self):
+        List(self.url).items
+        # the same torrents under other ids
+        self.patched_fetch.return_value = mocked_response(FIXTURE_CONTENT.replace(b'/files/details/31', b'/files/details/41'))
+        self.assertEqual('4163982/001075547600', List(self.url).items[0].id)
+        self.assertEqual(2, self.url.page_cache.stats['parsed'])
+
+    def test_demonoid_stats(self):
+        demonoid = Demonoid(page_cache=True)
+        demonoid.search().items
+        demonoid.search().items
+        self.assertEqual(0.5, demonoid.stats['hit_rate'])
+        self.assertEqual({}, Demonoid().stats)
+
+
+class PaginatedTests(TestCase):
+
+    def setUp(self):
+        self.url = Url()
+        self.fetch_patcher = mock.patch.object(Url, 'fetch')
+        self.patched_fetch = self.fetch_patcher.start()
+        self.addCleanup(self.fetch_patcher.stop)
+
+    def test_multipage_items_until_empty_page(self):
+        self.patched_fetch.side_effect = pages_responses(3)
+        paginated = Paginated(self.url, multipage=True)
+        self.assertEqual(150, len(paginated.items))
+        self.assertEqual(4, self.patched_fetch.call_count)
+        self.assertEqual(1, paginated.page)
+
+    def test_tolerant_multipage_errors_know_their_page(self):
+        self.patched_fetch.side_effect = [mocked_response(), mocked_response(MALFORMED_CONTENT), mocked_response(EMPTY_CONTENT)]
+        paginated = Paginated(self.url, multipage=True, tolerant=True)
+        self.assertEqual(99, len(paginated.items))
+        self.assertEqual([2], [error.page for error in paginated.errors])
+
+    def test_bounded_iteration_doesnt_keep_torrents(self):
+        self.patched_fetch.side_effect = pages_responses(3)
+        paginated = Paginated(self.url, multipage=True, bounded=True)
+        self.assertEqual(150, sum(1 for _ in paginated))
+        self.assertIsNone(paginated._torrents)
+        self.assertIsNone(self.url._DOM)
+
+    @skipUnless(os.path.exists(STATM_PATH), 'needs /proc to measure RSS')
+    def test_bounded_iteration_memory_stays_flat(self):
+        pages = 300
+        self.patched_fetch.side_effect = pages_responses(pages)
+        paginated = Paginated(self.url, multipage=True, bounded=True)
+        samples = []
+        for count, _ in enumerate(paginated, 1):
+            if count % (50 * 50) == 0:
+                gc.collect()
+                samples.append(current_rss())
+        self.assertEqual(pages + 1, self.patched_fetch.call_count)
+        # a pinned tree or kept torrents would grow RSS by megabytes every 50 pages
+        self.assertLess(samples[-1] - samples[0], 4 * 1024 * 1024)
+
+
+class SharedSearchTests(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(PageGenerator(pages=3, rows=20)).start()
+        self.addCleanup(self.server.stop)
+        self.demonoid = Demonoid(self.server.base_url)
+
+    def run_threads(self, function, count=8):
+        from multiprocessing.pool import ThreadPool
+
+        pool = ThreadPool(count)
+        try:
+            return pool.map(lambda _: function(), range(count))
+        finally:
+            pool.close()
+            pool.join()
+
+    def test_search_is_iterated_from_many_threads(self):
+        search = self.demonoid.search(multipage=True, bounded=True)
+        counts = self.run_threads(lambda: sum(1 for _ in search))
+        self.assertEqual([60] * 8, counts)
+        self.assertEqual(1, search.page)
+        self.assertEqual({200: 8 * 4}, self.server.stats)
+
+    def test_items_are_fetched_once(self):
+        search = self.demonoid.search(multipage=True)
+        results = self.run_threads(lambda: search.items)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual({200: 4}, self.server.stats)
+
+    def test_searches_share_the_transport(self):
+        self.assertIs(self.demonoid.search()._url.transport, self.demonoid.search()._url.transport)
+
+
+class BrokenRowGenerator(PageGenerator):
+
+    def render(self, page):
+        # the first torrent's details link lost its href
+        return re.sub(br'<a href="/files/details/[^"]*">', b'<a>', super(BrokenRowGenerator, self).render(page), 1)
+
+
+class SingleFlightSearchTests(TestCase):
+
+    def test_identical_concurrent_searches_share_one_request(self):
+        from multiprocessing.pool import ThreadPool
+
+        events = []
+        with MockServer(PageGenerator(pages=1, rows=20), latency=0.5) as server:
+            demonoid = Demonoid(server.base_url, metrics=Metrics([lambda *event: events.append(event)]), single_flight=True)
+            pool = ThreadPool(8)
+            try:
+                results = pool.map(lambda _: demonoid.search(query='banana').items, range(8))
+            finally:
+                pool.close()
+                pool.join()
+        self.assertEqual([20] * 8, [len(result) for result in results])
+        self.assertEqual({200: 1}, server.stats)
+        self.assertEqual(7, sum(value for kind, name, value in events if name == 'fetch.coalesced'))
+
+    def test_coalesced_tolerant_searches_report_row_errors(self):
+        from multiprocessing.pool import ThreadPool
+
+        with MockServer(BrokenRowGenerator(pages=1, rows=20), latency=0.5) as server:
+            demonoid = Demonoid(server.base_url, single_flight=True)
+            searches = [demonoid.search(query='banana', tolerant=True) for _ in range(4)]
+            pool = ThreadPool(4)
+            try:
+                results = pool.map(lambda search: search.items, searches)
+            finally:
+                pool.close()
+                pool.join()
+        self.assertEqual({200: 1}, server.stats)
+        self.assertEqual([19] * 4, [len(result) for result in results])
+        self.assertEqual([1] * 4, [len(search.errors) for search in searches])
+
+
+class PageCursorTests(TestCase):
+
+    def setUp(self):
+        self.server = MockServer(PageGenerator(pages=60, rows=5)).start()
+        self.addCleanup(self.server.stop)
+        self.search = Demonoid(self.server.base_url).search(query='banana')
+
+    def ids(self, page):
+        return [torrent['id'] for torrent in self.server.generator.torrents(page)]
+
+    def requests(self):
+        return sum(self.server.stats.values())
+
+    def test_next_and_previous(self):
+        self.assertEqual(self.ids(1), [torrent.id for torrent in self.search.items])
+        self.assertEqual(2, self.search.next().page)
+        self.assertEqual(self.ids(2), [torrent.id for torrent in self.search.items])
+        self.assertEqual(1, self.search.previous().page)
+        with self.assertRaises(HeadReachedException):
+            self.search.previous()
+
+    def test_page_at_costs_one_request(self):
+        page = self.search.page_at(50)
+        self.assertFalse(page.fetched)
+        self.assertEqual(0, self.requests())
+        self.assertEqual(self.ids(50), [torrent.id for torrent in page])
+        self.assertIs(page, self.search.page_at(50))
+        self.assertEqual(5, len(self.search.page_at(50)))
+        self.assertEqual(1, self.requests())
+        self.assertEqual(49, page.previous().number)
+        with self.assertRaises(HeadReachedException):
+            self.search.page_at(0)
+
+    def test_pages_in_reverse(self):
+        pages = list(self.search.pages(range(3, 0, -1)))
+        self.assertEqual([3, 2, 1], [page.number for page in pages])
+        self.assertEqual(self.ids(3) + self.ids(2) + self.ids(1), [torrent.id for page in pages for torrent in page])
+
+    def test_pages_until_empty_page_with_prefetch(self):
+        self.server.latency = 0.05
+        self.search.page = 55
+        pages = []
+        for page in self.search.pages(prefetch=4):
+            pages.append(page.number)
+            # later pages are fetched while this one is read
+            self.assertTrue(self.search.page_at(page.number + 1)._prefetching or self.search.page_at(page.number + 1).fetched)
+        self.assertEqual([55, 56, 57, 58, 59, 60], pages)
+        # the empty page 61 ends it, with 4 pages after it prefetched
+        self.assertEqual(list(range(55, 66)), sorted(self.search._pages))
+
+    def test_unkept_pages(self):
+        kept = self.search.page_at(57)
+        self.search.page = 55
+        pages = list(self.search.pages(prefetch=2, keep=False))
+        self.assertEqual([55, 56, 57, 58, 59, 60], [page.number for page in pages])
+        self.assertIs(kept, pages[2])
+        self.assertEqual([57], list(self.search._pages))
+        self.assertEqual(pages[0].torrents, self.search.unique(pages[0].torrents))
+        self.search.deduplicator = Deduplicator()
+        self.assertEqual(5, len(self.search.unique(pages[0].torrents)))
+        self.assertEqual([], self.search.unique(pages[0].torrents))
+
+
+class LinksOnlyGenerator(PageGenerator):
+
+    def pagination(self, page):
+        return super(LinksOnlyGenerator, self).pagination(page).split('  <strong>')[0]
+
+
+class EmptiedPagesGenerator(LinksOnlyGenerator):
+
+    def __init__(self, pages, linked_pages, **kwargs):
+        # pages past `pages` emptied since the pagination linking `linked_pages` was rendered
+        super(EmptiedPagesGenerator, self).__init__(pages, **kwargs)
+        self.linked_pages = linked_pages
+
+    def pagination(self, page):
+        pages, self.pages = self.pages, self.linked_pages
+        try:
+            return super(EmptiedPagesGenerator, self).pagination(page)
+        finally:
+            self.pages = pages
+
+
+class NoPaginationGenerator(PageGenerator):
+
+    def pagination(self, page):
+        return ''
+
+
+class PageCountTests(TestCase):
+
+    def search(self, generator):
+        server = MockServer(generator).start()
+        self.addCleanup(server.stop)
+        self.server = server
+        return Demonoid(server.base_url).search(query='banana')
+
+    def requests(self):
+        return sum(self.server.stats.values())
+
+    def test_from_items_total(self):
+        search = self.search(PageGenerator(pages=37, rows=5))
+        self.assertEqual(37, search.page_count())
+        self.assertEqual(185, search.total_estimate())
+        # the first page is kept for the fan-out
+        self.assertEqual(1, self.requests())
+        self.assertTrue(search.page_at(1).fetched)
+        self.assertEqual(5, len(search.page_at(1)))
+        self.assertEqual(1, self.requests())
+
+    def test_probed_from_last_linked_page(self):
+        search = self.search(LinksOnlyGenerator(pages=37, rows=5))
+        self.assertEqual(37, search.page_count())
+        # the first page, the last linked one and the empty page after it
+        self.assertEqual(3, self.requests())
+        self.assertEqual(185, search.total_estimate())
+        self.assertEqual(3, self.requests())
+        # probed pages aren't kept
+        self.assertEqual([1], list(search._pages))
+
+    def test_emptied_last_linked_page(self):
+        search = self.search(EmptiedPagesGenerator(pages=23, linked_pages=37, rows=5))
+        self.assertEqual(23, search.page_count())
+        self.assertEqual(115, search.total_estimate())
+        # the first page, the last linked one and a binary search between them
+        self.assertLessEqual(self.requests(), 2 + 6)
+
+    def test_probed_without_pagination(self):
+        search = self.search(NoPaginationGenerator(pages=37, rows=5))
+        self.assertEqual(37, search.page_count())
+        self.assertEqual(185, search.total_estimate())
+        # steps of 1, 2, 4, .. 32 past page 1 and a binary search between pages 32 and 64
+        self.assertLessEqual(self.requests(), 2 * 6 + 1)
+        self.assertEqual(37, search.page_count())
+        self.assertLessEqual(self.requests(), 2 * 6 + 1)
+
+    def test_empty_search(self):
+        search = self.search(PageGenerator(pages=0))
+        self.assertEqual(0, search.page_count())
+        self.assertEqual(0, search.total_estimate())
+
+    def test_forgotten_when_criteria_change(self):
+        search = self.search(PageGenerator(pages=3, rows=5))
+        self.assertEqual(3, search.page_count())
+        search.query = 'peel'
+        self.assertFalse(search._pages)
+        self.assertEqual(3, search.page_count())
+        self.assertEqual(2, self.requests())
+
+    def test_items_forgotten_when_criteria_change(self):
+        search = self.search(PageGenerator(pages=3, rows=5))
+        self.assertEqual(5, len(search.items))
+        for change in (lambda: search.modify(category=3), lambda: setattr(search, 'query', 'peel'),
+                       lambda: setattr(search, 'sort', SortBy.SEEDERS.DESCENDING)):
+            requests = self.requests()
+            change()
+            self.assertEqual(5, len(search.items))
+            self.assertEqual(requests + 1, self.requests())
+
+
+class SearchFilterTests(TestCase):
+
+    def setUp(self):
+        # pages as the server sorts them by seeders, descending
+        pages = [[100, 90, 80], [70, 50, None, 20], [10, 5], []]
+        self.fetch_patcher = mock.patch.object(Search, '_fetch_torrents', side_effect=[
+            [mock.Mock(seeders=seeders) for seeders in page] for page in pages])
+        self.patched_fetch = self.fetch_patcher.start()
+        self.addCleanup(self.fetch_patcher.stop)
+
+    def test_filter_stops_once_threshold_is_crossed(self):
+        search = Demonoid().search(multipage=True)
+        result = [torrent.seeders for torrent in search.filter('seeders', minimum=60)]
+        self.assertEqual([100, 90, 80, 70], result)
+        self.assertEqual(SortBy.SEEDERS.DESCENDING, self.patched_fetch.call_args[0][0].params['sort'])
+        self.assertEqual(2, self.patched_fetch.call_count)
+        # the search is left as is
+        self.assertEqual(SortBy.DATE, search.sort)
+        self.assertTrue(search.use_server_sort('leechers'))
+
+    def test_filter_crawls_every_page_of_single_page_search(self):
+        search = Demonoid().search(sort=SortBy.SIZE.DESCENDING)
+        result = [torrent.seeders for torrent in search.filter('seeders', maximum=10)]
+        self.assertEqual([10, 5], result)
+        self.assertEqual(4, self.patched_fetch.call_count)
+        self.assertFalse(search.multipage)
+
+    def test_filter_crawls_every_page_when_sorted_otherwise(self):
+        search = Demonoid().search(multipage=True, sort=SortBy.SIZE.DESCENDING)
+        result = [torrent.seeders for torrent in search.filter('seeders', minimum=20, maximum=80)]
+        self.assertEqual([80, 70, 50, 20], result)
+        self.assertEqual(4, self.patched_fetch.call_count)
+
+    def test_filter_rejects_other_fields(self):
+        with self.assertRaises(ValueError):
+            Demonoid().search().filter('title', minimum=1)
+
+    def test_use_server_sort(self):
+        search = Demonoid().search()
+        self.assertTrue(search.use_server_sort('leechers', largest=False))
+        self.assertEqual(SortBy.LEECHERS.ASCENDING, search.sort)
+        self.assertFalse(search.use_server_sort('seeders'))
@@ -0,0 +1,85 @@
+from datetime import date
+from sys import version_info
+from unittest import TestCase
+
+if version_info >= (3, 3):
+    from unittest import mock
+else:
+    import mock
+
+from requests import HTTPError
+
+from demonoid.structures import List, Paginated
+from demonoid.synthetic import MockServer, PageGenerator
+from demonoid.urls import Url
+
+
+class PageGeneratorTests(TestCase):
+
+    def setUp(self):
+        self.generator = PageGenerator(pages=3, rows=30, seed=7, today=date(2015, 3, 5), per_day=20)
+
+    def parse(self, page):
+        with mock.patch.object(Url, 'fetch', return_value=mock.Mock(content=self.generator.render(page), headers={})):
+            return List(Url()).items
+
+    def test_pages_parse_as_the_torrents_list(self):
+        torrents = self.parse(1)
+        expected = self.generator.torrents(1)
+        self.assertEqual(30, len(torrents))
+        self.assertEqual([values['title'] for values in expected], [torrent.title for torrent in torrents])
+        self.assertEqual([values['seeders'] for values in expected], [torrent.seeders for torrent in torrents])
+        self.assertEqual([values['date'] for values in expected], [torrent.date for torrent in torrents])
+        self.assertEqual(date(2015, 3, 5), torrents[0].date)
+        self.assertEqual(date(2015, 3, 4), torrents[-1].date)
+
+    def test_variants(self):
+        generator = PageGenerator(pages=1, seed=1, external_rate=0.5, spam_rate=0.5)
+        with mock.patch.object(Url, 'fetch', return_value=mock.Mock(content=generator.render(1), headers={})):
+            torrents = List(Url()).items
+        external = [values['external'] for values in generator.torrents(1)]
+        self.assertTrue(any(external) and not all(external))
+        self.assertEqual(['(external)' if value else 'Demonoid' for value in external],
+                         [torrent.tracked_by for torrent in torrents])
+        # spam links come before the download link, which is still found
+        self.assertTrue(all('/files/download/' in torrent.torrent_link for torrent in torrents))
+
+    def test_pages_are_deterministic(self):
+        self.assertEqual(self.generator.render(2), PageGenerator(pages=3, rows=30, seed=7,
+                                                                 today=date(2015, 3, 5), per_day=20).render(2))
+        self.assertNotEqual(self.generator.render(1), self.generator.render(2))
+
+    def test_pages_after_last_are_empty(self):
+        self.assertEqual([], self.generator.torrents(4))
+        self.assertEqual([], self.parse(4))
+
+
+class MockServerTests(TestCase):
+
+    def test_crawls_every_page(self):
+        with MockServer(PageGenerator(pages=3, rows=20)) as server:
+            torrents = Paginated(Url(server.base_url), multipage=True).items
+        self.assertEqual(60, len(torrents))
+        self.assertEqual({200: 4}, server.stats)
+
+    def test_any_path_is_served(self):
+        server = MockServer(PageGenerator(pages=2, rows=5))
+        first_page = server.generator.render(1)
+        self.assertEqual((200, first_page), server.respond('/files')[::2])
+        self.assertEqual((200, first_page), server.respond('/files/?page=&query=')[::2])
+        self.assertEqual(server.generator.render(2), server.respond('/files/?query=a&page=2')[2])
+
+    def test_errors_and_throttling(self):
+        server = MockServer(PageGenerator(pages=1), error_rate=0.3, throttle_rate=0.3, retry_after=5, seed=3)
+        responses = [server.respond('/files/?page=1') for _ in range(200)]
+        statuses = [status for status, headers, body in responses]
+        self.assertAlmostEqual(0.3, statuses.count(500) / 200.0, delta=0.1)
+        self.assertAlmostEqual(0.3, statuses.count(429) / 200.0, delta=0.1)
+        self.assertEqual(statuses.count(200), server.stats[200])
+        throttled = [headers for status, headers, body in responses if status == 429]
+        self.assertTrue(all(('Retry-After', '5') in headers for headers in throttled))
+
+    def test_errors_are_raised(self):
+        with MockServer(PageGenerator(pages=1), error_rate=1) as server:
+            with self.assertRaises(HTTPError):
+                List(Url(server.base_url)).items
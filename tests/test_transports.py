@@ -0,0 +1,237 @@
+import gzip
+import socket
+from io import BytesIO
+from sys import version_info
+from threading import Lock, Thread
+from unittest import TestCase, skipIf, skipUnless
+
+if version_info >= (3, 3):
+    from unittest import mock
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+else:
+    import mock
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+from demonoid.metrics import Metrics
+from demonoid.structures import List
+from demonoid.transports import HTTP2Transport, RateLimitedTransport, RequestsTransport, Transport
+from demonoid.urls import Url
+
+if HTTP2_AVAILABLE:
+    # the transport needs httpx as well
+    try:
+        HTTP2Transport().close()
+    except ImportError:
+        HTTP2_AVAILABLE = False
+
+from .helpers import FIXTURE_CONTENT
+
+
+def gzipped(content):
+    buffer = BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as compressed:
+        compressed.write(content)
+    return buffer.getvalue()
+
+
+GZIPPED_CONTENT = gzipped(FIXTURE_CONTENT)
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        compress = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = GZIPPED_CONTENT if compress else FIXTURE_CONTENT
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # kept alive connections hold a handler thread each
+    daemon_threads = True
+
+
+class H2Server(object):
+    """
+       A local HTTP/2 (prior knowledge, no TLS) stand-in serving the fixture gzipped on every path.
+       It counts the connections it accepts, to check requests are multiplexed.
+    """
+
+    def __init__(self):
+        self.socket = socket.socket()
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.listen(5)
+        self.port = self.socket.getsockname()[1]
+        self.connections = 0
+        self._lock = Lock()
+        self._thread = Thread(target=self.serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                client, _ = self.socket.accept()
+            except (OSError, socket.error):
+                return
+            with self._lock:
+                self.connections += 1
+            thread = Thread(target=self.handle, args=(client,))
+            thread.daemon = True
+            thread.start()
+
+    def handle(self, client):
+        connection = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        connection.initiate_connection()
+        client.sendall(connection.data_to_send())
+        pending = {}  # stream id to the body left to send
+        while True:
+            data = client.recv(65535)
+            if not data:
+                break
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    connection.send_headers(event.stream_id, [
+                        (':status', '200'), ('content-type', 'text/html; charset=utf-8'),
+                        ('content-encoding', 'gzip'), ('content-length', str(len(GZIPPED_CONTENT)))])
+                    pending[event.stream_id] = GZIPPED_CONTENT
+                elif isinstance(event, h2.events.StreamReset):
+                    pending.pop(event.stream_id, None)
+            for stream_id in list(pending):
+                body = pending[stream_id]
+                size = min(len(body), connection.local_flow_control_window(stream_id),
+                           connection.max_outbound_frame_size)
+                while size > 0:
+                    connection.send_data(stream_id, body[:size])
+                    body = body[size:]
+                    size = min(len(body), connection.local_flow_control_window(stream_id),
+                               connection.max_outbound_frame_size)
+                if body:
+                    pending[stream_id] = body
+                else:
+                    connection.end_stream(stream_id)
+                    del pending[stream_id]
+            client.sendall(connection.data_to_send())
+        client.close()
+
+    def close(self):
+        self.socket.close()
+
+
+class TransportTests(TestCase):
+
+    def test_url_fetches_through_given_transport(self):
+        transport = mock.Mock(spec=Transport)
+        transport.get.return_value = mock.Mock(content=FIXTURE_CONTENT, headers={})
+        self.assertEqual(50, len(List(Url(transport=transport)).items))
+        transport.get.assert_called_with(Url.DEFAULT_BASE_URL, params={}, headers=None)
+        transport.raise_for_status.assert_called_with(transport.get.return_value)
+
+    def test_get_many_keeps_order(self):
+        transport = Transport()
+        transport.get = lambda url, params=None: (url, params)
+        requests = [('http://example.com/{0}'.format(page), {'page': page}) for page in range(20)]
+        self.assertEqual(requests, transport.get_many(requests, concurrency=4))
+        self.assertEqual([], transport.get_many([]))
+
+    def test_rate_limited_transport_spaces_requests(self):
+        now = [10.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        transport = mock.Mock(spec=Transport)
+        rate_limited = RateLimitedTransport(transport, 4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            rate_limited.get('http://example.com/')
+        now[0] += 1
+        rate_limited.get('http://example.com/')
+        self.assertEqual([0.25, 0.25], waits)
+        self.assertEqual(4, transport.get.call_count)
+        with self.assertRaises(ValueError):
+            RateLimitedTransport(transport, 0)
+
+    @skipIf(HTTP2_AVAILABLE, 'httpx is installed')
+    def test_http2_transport_needs_httpx(self):
+        with self.assertRaises(ImportError):
+            HTTP2Transport()
+
+
+class RequestsTransportTests(TestCase):
+
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GzipHandler)
+        thread = Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = 'http://127.0.0.1:{0}/'.format(server.server_port)
+
+    def test_gzip_is_negotiated(self):
+        events = []
+        transport = RequestsTransport()
+        self.addCleanup(transport.close)
+        u = Url(self.base_url, metrics=Metrics([lambda *event: events.append(event)]), transport=transport)
+        self.assertEqual(50, len(List(u).items))
+        counters = dict((name, value) for kind, name, value in events if kind == Metrics.COUNTER)
+        self.assertEqual(len(FIXTURE_CONTENT), counters['fetch.bytes'])
+        self.assertEqual(len(GZIPPED_CONTENT), counters['fetch.wire_bytes'])
+        # gzip saves about 90% of the fixture's bytes
+        self.assertLess(counters['fetch.wire_bytes'], counters['fetch.bytes'] * 0.2)
+
+    def test_get_many(self):
+        transport = RequestsTransport()
+        self.addCleanup(transport.close)
+        responses = transport.get_many([(self.base_url, {'page': page}) for page in range(1, 5)], concurrency=2)
+        self.assertEqual([FIXTURE_CONTENT] * 4, [response.content for response in responses])
+
+
+@skipUnless(HTTP2_AVAILABLE, 'needs httpx and h2')
+class HTTP2TransportTests(TestCase):
+
+    def setUp(self):
+        self.server = H2Server()
+        self.addCleanup(self.server.close)
+        self.base_url = 'http://127.0.0.1:{0}/'.format(self.server.port)
+        self.transport = HTTP2Transport(http1=False, timeout=5)
+        self.addCleanup(self.transport.close)
+
+    def test_pages_are_multiplexed_over_one_connection(self):
+        requests = [(self.base_url + 'files/', {'page': page}) for page in range(1, 9)]
+        responses = self.transport.get_many(requests, concurrency=8)
+        self.assertEqual(['HTTP/2'] * 8, [response.http_version for response in responses])
+        self.assertEqual([FIXTURE_CONTENT] * 8, [response.content for response in responses])
+        self.assertEqual(1, self.server.connections)
+
+    def test_url_reports_compressed_bytes(self):
+        events = []
+        u = Url(self.base_url, metrics=Metrics([lambda *event: events.append(event)]), transport=self.transport)
+        self.assertEqual(50, len(List(u).items))
+        counters = dict((name, value) for kind, name, value in events if kind == Metrics.COUNTER)
+        timers = dict((name, value) for kind, name, value in events if kind == Metrics.TIMER)
+        self.assertEqual(len(FIXTURE_CONTENT), counters['fetch.bytes'])
+        self.assertEqual(len(GZIPPED_CONTENT), counters['fetch.wire_bytes'])
+        self.assertGreater(timers['fetch'], 0)
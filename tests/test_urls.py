@@ -1,4 +1,6 @@
+import os
 from sys import version_info
+from threading import Thread
 from unittest import TestCase
 
 if version_info >= (3, 3):
@@ -12,6 +14,9 @@ from requests import Session, HTTPError, Response
 from demonoid.urls import Url
 
 
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'files.html')
+
+
 class UrlTests(TestCase):
     """
         Test Url class against online resources.
@@ -47,6 +52,16 @@ class UrlTests(TestCase):
         u.add_param('page', 7)
         self.assertEqual({'page': 7}, u.params)
 
+    def test_snapshot(self):
+        u = Url(path='/files', params={'query': 'x', 'page': 1}, page_cache=True)
+        snapshot = u.snapshot(page=2)
+        self.assertEqual({'query': 'x', 'page': 2}, snapshot.params)
+        self.assertEqual({'query': 'x', 'page': 1}, u.params)
+        self.assertEqual(u.url, snapshot.url)
+        self.assertIs(u.transport, snapshot.transport)
+        self.assertIs(u.page_cache, snapshot.page_cache)
+        self.assertIs(u.metrics, snapshot.metrics)
+
     def test_url_property(self):
         u = Url(Url.DEFAULT_BASE_URL, 'files')
         self.assertEqual(Url.DEFAULT_BASE_URL + 'files', u.url)
@@ -100,3 +115,44 @@ class UrlTests(TestCase):
     def test_string_representation(self):
         u = Url(Url.DEFAULT_BASE_URL)
         self.assertEqual(Url.DEFAULT_BASE_URL, str(u))
+
+    def test_update_DOM_builds_from_content_bytes(self):
+        u = Url(Url.DEFAULT_BASE_URL)
+        with open(FIXTURE_PATH, 'rb') as fixture:
+            response = mock.Mock(content=fixture.read(), headers={'content-type': 'text/html; charset=UTF-8'})
+        with mock.patch.object(u, 'fetch', return_value=response):
+            u.update_DOM()
+        self.assertIsInstance(u._DOM, HtmlElement)
+        self.assertIsNotNone(u._DOM.find('.//*[@id="fslispc"]'))
+
+    def test_build_DOM_decodes_with_given_encoding(self):
+        dom = Url.build_DOM('<html><body><p>\u0431\u0430\u043d\u0438\u0446\u0430</p></body></html>'.encode('cp1251'), 'cp1251')
+        self.assertEqual('\u0431\u0430\u043d\u0438\u0446\u0430', dom.find('.//p').text)
+
+    def test_build_DOM_sniffs_meta_encoding(self):
+        content = ('<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1251"></head>'
+                   '<body><p>\u0431\u0430\u043d\u0438\u0446\u0430</p></body></html>').encode('cp1251')
+        self.assertEqual('\u0431\u0430\u043d\u0438\u0446\u0430', Url.build_DOM(content).find('.//p').text)
+
+    def test_build_DOM_sniffs_unknown_encoding(self):
+        content = ('<html><head><meta http-equiv="Content-Type" content="text/html; charset=windows-1251"></head>'
+                   '<body><p>\u0431\u0430\u043d\u0438\u0446\u0430</p></body></html>').encode('cp1251')
+        self.assertEqual('\u0431\u0430\u043d\u0438\u0446\u0430', Url.build_DOM(content, 'bogus-charset').find('.//p').text)
+        self.assertIs(Url.get_parser(None), Url.get_parser('bogus-charset'))
+
+    def test_get_parser_is_reused_per_encoding_and_thread(self):
+        self.assertIs(Url.get_parser('utf-8'), Url.get_parser('UTF-8'))
+        self.assertIsNot(Url.get_parser('utf-8'), Url.get_parser(None))
+        parsers = []
+        thread = Thread(target=lambda: parsers.append(Url.get_parser('utf-8')))
+        thread.start()
+        thread.join()
+        self.assertIsNot(Url.get_parser('utf-8'), parsers[0])
+
+    def test_get_encoding(self):
+        response = mock.Mock(headers={'content-type': 'text/html; charset="utf-8"'})
+        self.assertEqual('utf-8', Url.get_encoding(response))
+        response = mock.Mock(headers={'content-type': 'text/html'})
+        self.assertIsNone(Url.get_encoding(response))
+        response = mock.Mock(headers={})
+        self.assertIsNone(Url.get_encoding(response))
@@ -0,0 +1,62 @@
+import os
+from threading import Thread
+from unittest import TestCase
+
+from lxml import html
+
+from demonoid.parser import Parser
+from demonoid.xpaths import DEFAULT_SELECTORS, Selector, SelectorSet, get_selectors, register_selectors
+
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'files.html')
+
+
+class SelectorTests(TestCase):
+
+    def test_evaluator_is_compiled_once_per_thread(self):
+        selector = Selector('./p')
+        self.assertIs(selector.evaluator, selector.evaluator)
+        evaluators = []
+        thread = Thread(target=lambda: evaluators.append(selector.evaluator))
+        thread.start()
+        thread.join()
+        self.assertIsNot(selector.evaluator, evaluators[0])
+
+    def test_call_evaluates_on_element(self):
+        dom = html.fromstring('<div><p>a</p><p>b</p></div>')
+        self.assertEqual(['a', 'b'], [p.text for p in Selector('./p')(dom)])
+
+    def test_equality(self):
+        self.assertEqual(Selector('./p'), Selector('./p'))
+        self.assertNotEqual(Selector('./p'), Selector('./a'))
+
+
+class SelectorSetTests(TestCase):
+
+    def test_default_selectors_match_parser_expressions(self):
+        self.assertIs(DEFAULT_SELECTORS, Parser.selectors)
+        self.assertEqual(Parser.TORRENTS_LIST_XPATH, DEFAULT_SELECTORS.torrents_list.expression)
+        self.assertEqual(Parser.DATE_TAG_XPATH, DEFAULT_SELECTORS.date_tag.expression)
+        self.assertEqual(Parser.FIRST_ROW_XPATH, DEFAULT_SELECTORS.first_row.expression)
+
+    def test_default_selectors_on_fixture(self):
+        with open(FIXTURE_PATH, 'rb') as fixture:
+            dom = html.fromstring(fixture.read())
+        self.assertEqual(dom.xpath(Parser.TORRENTS_LIST_XPATH), DEFAULT_SELECTORS.torrents_list(dom))
+
+    def test_missing_selectors(self):
+        with self.assertRaises(ValueError):
+            SelectorSet('broken', torrents_list='//tr')
+
+    def test_override_keeps_other_selectors(self):
+        mirror = DEFAULT_SELECTORS.override('mirror', date_tag='./td[@class="added"]')
+        self.assertEqual('./td[@class="added"]', mirror.date_tag.expression)
+        self.assertIs(DEFAULT_SELECTORS.first_row, mirror.first_row)
+        self.assertEqual('./td[@class="added_today"]', DEFAULT_SELECTORS.date_tag.expression)
+
+    def test_registry(self):
+        self.assertIs(DEFAULT_SELECTORS, get_selectors('default'))
+        mirror = register_selectors(DEFAULT_SELECTORS.override('test-mirror'))
+        self.assertIs(mirror, get_selectors('test-mirror'))
+        with self.assertRaises(KeyError):
+            get_selectors('unknown')